@@ -0,0 +1,580 @@
+"""
+Renderer benchmarks.
+
+Run from src/:
+    python benchmarks.py rays [--width 80] [--spp 8]
+    python benchmarks.py vec3 [--count 200000]
+    python benchmarks.py roulette [--width 24] [--spp 8] [--reference-spp 64] [--depth 3]
+    python benchmarks.py lights [--width 24] [--spp 8] [--reference-spp 256]
+    python benchmarks.py shadow [--count 20000]
+    python benchmarks.py pdfs [--count 20000]
+    python benchmarks.py output [--width 1920] [--height 1080]
+    python benchmarks.py adaptive [--width 32] [--spp 32] [--reference-spp 256] [--threshold 0.05]
+    python benchmarks.py samplers [--width 32] [--spp 4,16,64] [--reference-spp 1024]
+
+rays  - camera.ray_color throughput (rays per second) on a small scene that
+        uses every material in core/material.py
+vec3  - nanoseconds per util.vec3 operation, with the fused and in-place
+        forms next to the operator expressions they replace
+roulette - fixed-depth paths against Russian roulette (camera.roulette_depth):
+        rays traced, time and error against a high-spp fixed-depth
+        reference, per scene
+lights - BSDF sampling only against next-event estimation with MIS
+        (camera.sample_lights) on the Cornell box: error against a
+        high-spp reference and the samples per pixel each needs for
+        equal noise
+shadow - microseconds per shadow ray with a closest-hit query
+        (hit_range) and with the any-hit query (occluded), per scene
+pdfs   - direct light at the Cornell box floor estimated by sampling
+        directions from each core.pdf distribution: variance per sample
+        and microseconds per sample
+output - seconds and bytes to save a random linear image: per-pixel
+        write_color to ASCII P3 against write_image (P6, PFM, PNG)
+adaptive - uniform against adaptive sampling (camera.adaptive) at the
+        same sample budget on the random spheres scene: error against a
+        high-spp reference and where the samples went
+samplers - convergence of each camera.sampler: error against a high-spp
+        reference at several sample counts on the spheres scene (with
+        depth of field) and the Cornell box, and the samples random
+        sampling needs for the same error
+"""
+
+from core.material import *
+from core.texture import noise_texture
+from core.pdf import sphere_pdf, cosine_pdf, hittable_pdf, mixture_pdf
+from util import *
+from util import rng
+from core import *
+import argparse
+import math
+import os
+import tempfile
+import numpy as np
+import random
+import sys
+import time
+import timeit
+
+#------------------------------------------------------------------------
+
+class counting_hittable(hittable):
+    """Wraps a world and counts the rays traced against it."""
+
+    def __init__(self, world: hittable):
+        self.world = world
+        self.rays = 0
+
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        self.rays += 1
+        return self.world.hit_range(r, t_min, t_max, rec)
+
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        self.rays += 1
+        return self.world.occluded(r, t_min, t_max)
+
+    def bounding_box(self) -> aabb:
+        return self.world.bounding_box()
+
+#------------------------------------------------------------------------
+
+def material_scene() -> tuple[hittable_list, camera]:
+    """Spheres of every material under a quad light, with a fixed layout."""
+    random.seed(1)
+    rng.seed(1)  # noise_texture tables
+    world = hittable_list()
+    world.add(Sphere.stationary(point3(0, -1000, 0), 1000, lambertian.from_color(color(0.5, 0.5, 0.5))))
+    world.add(quad(point3(-2, 4, -2), vec3(4, 0, 0), vec3(0, 0, 4), diffuse_light.from_color(color(4, 4, 4))))
+
+    materials = [
+        lambda: lambertian.from_color(color.random() * color.random()),
+        lambda: lambertian.from_texture(noise_texture(4.0)),
+        lambda: metal(color.random(0.5, 1), random.uniform(0, 0.5)),
+        lambda: dielectric(1.5),
+        lambda: subsurface_simple(color.random(0.3, 0.9), 0.1),
+        lambda: subsurface_volumetric(color.random(0.3, 0.9), 0.08, 0.8, 0.7),
+    ]
+    for a in range(-3, 3):
+        for b in range(-3, 3):
+            center = point3(a + 0.9 * random.random(), 0.3, b + 0.9 * random.random())
+            world.add(Sphere.stationary(center, 0.3, materials[(a + b) % len(materials)]()))
+
+    bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
+    world = hittable_list()
+    world.add(bvh.flatten())
+
+    cam = camera()
+    cam.aspect_ratio = 16.0 / 9.0
+    cam.max_depth = 10
+    cam.vfov = 30
+    cam.lookfrom = point3(8, 3, 6)
+    cam.lookat = point3(0, 0.3, 0)
+    cam.background = color(0.10, 0.10, 0.15)
+    cam.seed = 0
+    return world, cam
+
+
+def cornell_scene() -> tuple[hittable_list, camera]:
+    """The Cornell box from scenes.cornell_box (closed room, deep paths)."""
+    world = hittable_list()
+    red = lambertian.from_color(color(0.65, 0.05, 0.05))
+    white = lambertian.from_color(color(0.73, 0.73, 0.73))
+    green = lambertian.from_color(color(0.12, 0.45, 0.15))
+    light = diffuse_light.from_color(color(15, 15, 15))
+
+    world.add(quad(point3(555, 0, 0), vec3(0, 555, 0), vec3(0, 0, 555), green))
+    world.add(quad(point3(0, 0, 0), vec3(0, 555, 0), vec3(0, 0, 555), red))
+    world.add(quad(point3(343, 554, 332), vec3(-130, 0, 0), vec3(0, 0, -105), light))
+    world.add(quad(point3(0, 0, 0), vec3(555, 0, 0), vec3(0, 0, 555), white))
+    world.add(quad(point3(555, 555, 555), vec3(-555, 0, 0), vec3(0, 0, -555), white))
+    world.add(quad(point3(0, 0, 555), vec3(555, 0, 0), vec3(0, 555, 0), white))
+
+    bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
+    world = hittable_list()
+    world.add(bvh.flatten())
+
+    cam = camera()
+    cam.aspect_ratio = 1.0
+    cam.max_depth = 20
+    cam.background = color(0, 0, 0)
+    cam.vfov = 40
+    cam.lookfrom = point3(278, 278, -800)
+    cam.lookat = point3(278, 278, 0)
+    cam.seed = 0
+    return world, cam
+
+
+def spheres_scene() -> tuple[hittable_list, camera]:
+    """scenes.vol1_sec14_1 (random spheres under a sky) with a fixed layout."""
+    random.seed(0)
+    world = hittable_list()
+    world.add(Sphere.stationary(point3(0, -1000, 0), 1000, lambertian.from_color(color(0.5, 0.5, 0.5))))
+
+    for a in range(-11, 11):
+        for b in range(-11, 11):
+            choose_mat = random.uniform(0, 1)
+            center = point3(a + 0.9 * random.uniform(0, 1), 0.2, b + 0.9 * random.uniform(0, 1))
+            if (center - point3(4, 0.2, 0)).length() > 0.9:
+                if choose_mat < 0.8:
+                    sphere_material = lambertian.from_color(color.random() * color.random())
+                elif choose_mat < 0.95:
+                    sphere_material = metal(color.random(0.5, 1), random.uniform(0, 0.5))
+                else:
+                    sphere_material = dielectric(1.5)
+                world.add(Sphere.stationary(center, 0.2, sphere_material))
+    world.add(Sphere.stationary(point3(0, 1, 0), 1.0, dielectric(1.5)))
+    world.add(Sphere.stationary(point3(-4, 1, 0), 1.0, lambertian.from_color(color(0.4, 0.2, 0.1))))
+    world.add(Sphere.stationary(point3(4, 1, 0), 1.0, metal(color(0.7, 0.6, 0.5), 0.0)))
+
+    bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
+    world = hittable_list()
+    world.add(bvh.flatten())
+
+    cam = camera()
+    cam.aspect_ratio = 16.0 / 9.0
+    cam.max_depth = 5
+    cam.vfov = 20
+    cam.lookfrom = point3(13, 2, 3)
+    cam.lookat = point3(0, 0, 0)
+    cam.background = color(0.70, 0.80, 1.00)
+    cam.seed = 0
+    return world, cam
+
+
+def render_counted(world: hittable, cam: camera) -> tuple[list[color], int, float]:
+    """Render cam's image with the scalar integrator in this process.
+    Returns the linear pixel colors, the number of rays traced and the seconds taken."""
+    cam.initialize()
+    cam.prepare_lights(world)
+    counter = counting_hittable(world)
+    start_time = time.perf_counter()
+    pixels = [cam.render_pixel(counter, w, h) for h in range(cam.img_height) for w in range(cam.img_width)]
+    return pixels, counter.rays, time.perf_counter() - start_time
+
+
+def bench_rays(width: int, spp: int) -> float:
+    """Render material_scene with the scalar integrator; returns rays per second."""
+    world, cam = material_scene()
+    cam.img_width = width
+    cam.samples_per_pixel = spp
+    _, rays, elapsed = render_counted(world, cam)
+
+    rate = rays / elapsed
+    print(f"rays: {rays} rays in {elapsed:.2f}s ({rate:,.0f} rays/s), "
+          f"{cam.img_width}x{cam.img_height} at {spp} spp")
+    return rate
+
+
+def _rmse(pixels: list[color], reference: list[color]) -> float:
+    """Root mean square error of the displayable ([0, 1] clamped) linear colors."""
+    total = 0.0
+    for a, b in zip(pixels, reference):
+        for x, y in ((a.x, b.x), (a.y, b.y), (a.z, b.z)):
+            d = min(max(x, 0.0), 1.0) - min(max(y, 0.0), 1.0)
+            total += d * d
+    return (total / (3 * len(pixels))) ** 0.5
+
+
+def bench_roulette(width: int, spp: int, reference_spp: int, depth: int) -> dict[str, dict[str, tuple[int, float, float]]]:
+    """
+    Render each scene at spp with fixed-depth paths and with Russian roulette
+    from bounce depth, and compare both to a fixed-depth render at
+    reference_spp (different seed). Returns {scene: {mode: (rays, seconds, rmse)}}.
+    Efficiency is 1 / (RMSE^2 * seconds): higher means less noise per second.
+    """
+    results = {}
+    for name, build in (("materials", material_scene), ("cornell", cornell_scene)):
+        world, cam = build()
+        cam.img_width = width
+        cam.samples_per_pixel = reference_spp
+        cam.seed = 1
+        reference, _, ref_elapsed = render_counted(world, cam)
+        print(f"roulette: {name} reference {reference_spp} spp, fixed depth {cam.max_depth} ({ref_elapsed:.1f}s)", file=sys.stderr)
+
+        results[name] = {}
+        for mode, roulette_depth in (("fixed", None), ("roulette", depth)):
+            world, cam = build()
+            cam.img_width = width
+            cam.samples_per_pixel = spp
+            cam.roulette_depth = roulette_depth
+            pixels, rays, elapsed = render_counted(world, cam)
+            rmse = _rmse(pixels, reference)
+            results[name][mode] = (rays, elapsed, rmse)
+            print(f"roulette: {name:<9} {mode:<8} {rays:>8} rays {elapsed:6.2f}s  "
+                  f"RMSE {rmse:.4f}  efficiency {1 / (rmse * rmse * elapsed):8.0f}")
+
+        fixed_rays = results[name]["fixed"][0]
+        saved = fixed_rays - results[name]["roulette"][0]
+        print(f"roulette: {name:<9} {saved} bounces saved ({saved / fixed_rays:.0%}), "
+              f"{saved / (cam.img_width * cam.img_height * spp):.2f} per path")
+    return results
+
+
+def bench_lights(width: int, spp: int, reference_spp: int) -> dict[str, tuple[float, float]]:
+    """
+    Render cornell_scene at spp with and without next-event estimation and
+    compare both to a reference_spp render with it (different seed).
+    Returns {mode: (seconds, rmse)}. Since RMSE falls as 1 / sqrt(spp), BSDF
+    sampling needs (rmse_bsdf / rmse_nee)^2 times the samples for equal noise.
+    """
+    world, cam = cornell_scene()
+    cam.img_width = width
+    cam.samples_per_pixel = reference_spp
+    cam.sample_lights = True
+    cam.seed = 1
+    reference, _, ref_elapsed = render_counted(world, cam)
+    print(f"lights: reference {reference_spp} spp with light sampling ({ref_elapsed:.1f}s)", file=sys.stderr)
+
+    results = {}
+    for mode, sample_lights in (("bsdf", False), ("nee+mis", True)):
+        world, cam = cornell_scene()
+        cam.img_width = width
+        cam.samples_per_pixel = spp
+        cam.sample_lights = sample_lights
+        pixels, rays, elapsed = render_counted(world, cam)
+        rmse = _rmse(pixels, reference)
+        results[mode] = (elapsed, rmse)
+        print(f"lights: {mode:<8} {rays:>8} rays {elapsed:6.2f}s  RMSE {rmse:.4f}  "
+              f"efficiency {1 / (rmse * rmse * elapsed):8.0f}")
+
+    (bsdf_elapsed, bsdf_rmse), (nee_elapsed, nee_rmse) = results["bsdf"], results["nee+mis"]
+    ratio = (bsdf_rmse / nee_rmse) ** 2
+    print(f"lights: equal noise needs {ratio:.1f}x the samples without light sampling "
+          f"({spp * ratio:.0f} spp vs {spp}), {ratio * bsdf_elapsed / nee_elapsed:.1f}x the time")
+    return results
+
+
+def bench_shadow(count: int) -> dict[str, tuple[float, float]]:
+    """
+    Time count shadow rays with hit_range and with occluded. Each ray runs
+    from a surface point (hit by a random ray from inside the scene) to a
+    random point on a light, as in camera.sample_light.
+    Returns {scene: (closest_us, any_us)}.
+    """
+    results = {}
+    for name, build in (("materials", material_scene), ("cornell", cornell_scene)):
+        world, cam = build()
+        lights = find_lights(world)
+        center = cam.lookat
+        rng.seed(0)
+        rays = []
+        while len(rays) < count:
+            rec = hit_record()
+            if not world.hit(Ray(center, random_unit_vector()), interval.from_floats(0.001, math.inf), rec):
+                continue
+            rays.append(Ray(rec.p, random.choice(lights).random(rec.p)))
+
+        start_time = time.perf_counter()
+        closest_hits = sum(world.hit_range(r, 0.001, 1 - 1e-6, hit_record()) for r in rays)
+        closest_us = (time.perf_counter() - start_time) / count * 1e6
+        start_time = time.perf_counter()
+        any_hits = sum(world.occluded(r, 0.001, 1 - 1e-6) for r in rays)
+        any_us = (time.perf_counter() - start_time) / count * 1e6
+        if any_hits != closest_hits:
+            sys.exit(f"shadow: {name} occluded disagrees with hit_range ({any_hits} vs {closest_hits})")
+
+        results[name] = (closest_us, any_us)
+        print(f"shadow: {name:<9} hit_range {closest_us:6.1f} us  occluded {any_us:6.1f} us  "
+              f"({closest_us / any_us:.2f}x, {any_hits / count:.0%} blocked)")
+    return results
+
+
+def bench_pdfs(count: int) -> dict[str, tuple[float, float, float]]:
+    """
+    Estimate the light reflected by a white floor point under the Cornell box
+    lamp (one bounce, red channel) with count directions from each pdf.
+    Returns {pdf: (mean, variance per sample, microseconds per sample)}.
+    """
+    world, _ = cornell_scene()
+    lights = find_lights(world)
+    rec = hit_record()
+    world.hit(Ray(point3(278, 278, 278), vec3(0, -1, 0)), interval.from_floats(0.001, math.inf), rec)
+    distributions = {
+        "uniform": sphere_pdf(),
+        "cosine": cosine_pdf(rec.normal),
+        "light": hittable_pdf(lights, rec.p),
+        "mixture": mixture_pdf(hittable_pdf(lights, rec.p), cosine_pdf(rec.normal)),
+    }
+
+    results = {}
+    for name, distribution in distributions.items():
+        rng.seed(0)
+        total = total_squared = 0.0
+        start_time = time.perf_counter()
+        for _ in range(count):
+            direction = distribution.generate()
+            density = distribution.value(direction)
+            cosine = rec.normal.dot(direction) / direction.length()
+            estimate = 0.0
+            if density > 0.0 and cosine > 0.0:
+                light_rec = hit_record()
+                if world.hit(Ray(rec.p, direction), interval.from_floats(0.001, math.inf), light_rec):
+                    emitted = light_rec.material.emitted(light_rec.u, light_rec.v, light_rec.p)
+                    estimate = rec.material.tex.value(rec.u, rec.v, rec.p).x * emitted.x * cosine / (math.pi * density)
+            total += estimate
+            total_squared += estimate * estimate
+        elapsed = time.perf_counter() - start_time
+
+        mean = total / count
+        results[name] = (mean, total_squared / count - mean * mean, elapsed / count * 1e6)
+        print(f"pdfs: {name:<8} mean {mean:.4f}  variance {results[name][1]:9.4f}  {results[name][2]:5.1f} us/sample")
+    return results
+
+
+def bench_adaptive(width: int, spp: int, reference_spp: int, threshold: float) -> dict[str, tuple[float, float]]:
+    """
+    Render spheres_scene with uniform progressive passes and with adaptive
+    sampling at the same budget, and compare both to a uniform
+    reference_spp render (different seed). Returns {mode: (seconds, rmse)}.
+    """
+    def rmse(image: np.ndarray, reference: np.ndarray) -> float:
+        d = np.clip(image, 0.0, 1.0) - np.clip(reference, 0.0, 1.0)
+        return float(np.sqrt(np.mean(d * d)))
+
+    world, cam = spheres_scene()
+    cam.img_width = width
+    cam.samples_per_pixel = reference_spp
+    cam.progressive = True
+    cam.seed = 1
+    start_time = time.perf_counter()
+    reference = cam.render_to_array(world)
+    print(f"adaptive: reference {reference_spp} spp ({time.perf_counter() - start_time:.1f}s)", file=sys.stderr)
+
+    results = {}
+    for mode, adaptive in (("uniform", False), ("adaptive", True)):
+        world, cam = spheres_scene()
+        cam.img_width = width
+        cam.samples_per_pixel = spp
+        cam.progressive = True
+        cam.adaptive = adaptive
+        cam.adaptive_threshold = threshold
+        start_time = time.perf_counter()
+        image = cam.render_to_array(world)
+        elapsed = time.perf_counter() - start_time
+        results[mode] = (elapsed, rmse(image, reference))
+        counts = cam.sample_counts
+        print(f"adaptive: {mode:<8} {elapsed:6.2f}s  RMSE {results[mode][1]:.4f}  "
+              f"samples/pixel min {counts.min():.0f} mean {counts.mean():.1f} max {counts.max():.0f}")
+
+    ratio = (results["uniform"][1] / results["adaptive"][1]) ** 2
+    print(f"adaptive: uniform sampling needs about {ratio:.1f}x the samples for the same RMSE")
+    return results
+
+
+def bench_samplers(width: int, spps: list[int], reference_spp: int) -> dict[str, dict[str, list[float]]]:
+    """
+    Render each scene with every camera.sampler at each count in spps and
+    compare to a sobol reference_spp render (different seed). Returns
+    {scene: {sampler: [rmse per spp]}}. Random sampling error falls as
+    1 / sqrt(spp), so it needs (rmse_random / rmse)^2 times the samples to
+    match a sampler. The reference's own noise is in every RMSE, so the
+    ratios at high spp are underestimates.
+    """
+    def rmse(image: np.ndarray, reference: np.ndarray) -> float:
+        d = np.clip(image, 0.0, 1.0) - np.clip(reference, 0.0, 1.0)
+        return float(np.sqrt(np.mean(d * d)))
+
+    def spheres_with_lens() -> tuple[hittable_list, camera]:
+        world, cam = spheres_scene()
+        cam.defocus_angle = 0.6
+        cam.focus_distance = 10.0
+        return world, cam
+
+    def cornell_with_lights() -> tuple[hittable_list, camera]:
+        world, cam = cornell_scene()
+        cam.max_depth = 5
+        cam.sample_lights = True
+        return world, cam
+
+    samplers = ("random", "stratified", "halton", "sobol")
+    results = {}
+    for name, build in (("spheres", spheres_with_lens), ("cornell", cornell_with_lights)):
+        world, cam = build()
+        cam.img_width = width
+        cam.samples_per_pixel = reference_spp
+        cam.sampler = "sobol"
+        cam.seed = 1
+        start_time = time.perf_counter()
+        reference = cam.render_to_array(world)
+        print(f"samplers: {name} reference {reference_spp} spp sobol ({time.perf_counter() - start_time:.1f}s)", file=sys.stderr)
+
+        results[name] = {}
+        for sampler in samplers:
+            errors = []
+            start_time = time.perf_counter()
+            for spp in spps:
+                world, cam = build()
+                cam.img_width = width
+                cam.samples_per_pixel = spp
+                cam.sampler = sampler
+                errors.append(rmse(cam.render_to_array(world), reference))
+            results[name][sampler] = errors
+            print(f"samplers: {name:<8} {sampler:<10} {time.perf_counter() - start_time:6.2f}s  RMSE " +
+                  "  ".join(f"{e:.4f}@{spp}" for e, spp in zip(errors, spps)))
+
+        for sampler in samplers[1:]:
+            ratios = [(r / e) ** 2 for r, e in zip(results[name]["random"], results[name][sampler])]
+            print(f"samplers: {name:<8} {sampler:<10} random needs " +
+                  "  ".join(f"{ratio:.1f}x@{spp}" for ratio, spp in zip(ratios, spps)) + " the samples")
+    return results
+
+
+def bench_output(width: int, height: int) -> dict[str, tuple[float, int]]:
+    """Save one random image in every output format; returns {format: (seconds, bytes)}."""
+    image = np.random.default_rng(0).random((height, width, 3)) * 1.2
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "p3.ppm")
+        start_time = time.perf_counter()
+        with open(path, 'w') as f:
+            f.write(f"P3\n{width} {height}\n255\n")
+            for r, g, b in image.reshape(-1, 3).tolist():
+                write_color(f, color(r, g, b))
+        results["P3 write_color"] = (time.perf_counter() - start_time, os.path.getsize(path))
+
+        for name, extension in (("P6", ".ppm"), ("PFM", ".pfm"), ("PNG", ".png")):
+            path = os.path.join(directory, "image" + extension)
+            start_time = time.perf_counter()
+            write_image(path, image)
+            results[name] = (time.perf_counter() - start_time, os.path.getsize(path))
+
+    for name, (elapsed, size) in results.items():
+        print(f"output: {name:<15} {elapsed * 1000:8.1f} ms  {size / 1e6:6.2f} MB")
+    return results
+
+
+VEC3_CASES = [
+    ("a + b", "a + b"),
+    ("a * s", "a * s"),
+    ("a * b", "a * b"),
+    ("a.dot(b)", "a.dot(b)"),
+    ("a.cross(b)", "a.cross(b)"),
+    ("a.length()", "a.length()"),
+    ("a + b * s", "a + b * s"),
+    ("a.mul_add(b, s)", "a.mul_add(b, s)"),
+    ("(a - b).dot(c)", "(a - b).dot(c)"),
+    ("a.sub_dot(b, c)", "a.sub_dot(b, c)"),
+    ("o + t * d", "o + t * d"),
+    ("vec3.at(o, d, t)", "vec3.at(o, d, t)"),
+    ("acc = acc + a", "acc = acc + a"),
+    ("acc += a", "acc += a"),
+]
+
+
+def bench_vec3(count: int) -> dict[str, float]:
+    """Time each VEC3_CASES expression; returns nanoseconds per operation."""
+    setup = ("from util import vec3\n"
+             "a = vec3(0.1, 0.2, 0.3); b = vec3(1.5, -2.5, 0.5); c = vec3(0.7, 0.1, -0.4)\n"
+             "o = vec3(1, 2, 3); d = vec3(0, 0, -1); acc = vec3(0, 0, 0); s = 0.25; t = 2.0")
+    results = {}
+    for name, stmt in VEC3_CASES:
+        best = min(timeit.repeat(stmt, setup, number=count, repeat=5))
+        results[name] = best / count * 1e9
+        print(f"vec3: {name:<18} {results[name]:7.1f} ns")
+    return results
+
+#------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renderer benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    rays = subparsers.add_parser("rays", help="scalar integrator rays per second")
+    rays.add_argument("--width", type=int, default=80)
+    rays.add_argument("--spp", type=int, default=8)
+
+    vec = subparsers.add_parser("vec3", help="util.vec3 nanoseconds per operation")
+    vec.add_argument("--count", type=int, default=200000)
+
+    roulette = subparsers.add_parser("roulette", help="fixed-depth vs Russian roulette paths")
+    roulette.add_argument("--width", type=int, default=24)
+    roulette.add_argument("--spp", type=int, default=8)
+    roulette.add_argument("--reference-spp", type=int, default=64)
+    roulette.add_argument("--depth", type=int, default=3, help="camera.roulette_depth")
+
+    lights = subparsers.add_parser("lights", help="BSDF sampling vs next-event estimation")
+    lights.add_argument("--width", type=int, default=24)
+    lights.add_argument("--spp", type=int, default=8)
+    lights.add_argument("--reference-spp", type=int, default=256)
+
+    shadow = subparsers.add_parser("shadow", help="closest-hit vs any-hit shadow rays")
+    shadow.add_argument("--count", type=int, default=20000)
+
+    pdfs = subparsers.add_parser("pdfs", help="variance per sample of each core.pdf distribution")
+    pdfs.add_argument("--count", type=int, default=20000)
+
+    output = subparsers.add_parser("output", help="image output time and size per format")
+    output.add_argument("--width", type=int, default=1920)
+    output.add_argument("--height", type=int, default=1080)
+
+    adaptive = subparsers.add_parser("adaptive", help="uniform vs adaptive sampling at equal budget")
+    adaptive.add_argument("--width", type=int, default=32)
+    adaptive.add_argument("--spp", type=int, default=32)
+    adaptive.add_argument("--reference-spp", type=int, default=256)
+    adaptive.add_argument("--threshold", type=float, default=0.05)
+
+    samplers = subparsers.add_parser("samplers", help="error against spp for each camera.sampler")
+    samplers.add_argument("--width", type=int, default=32)
+    samplers.add_argument("--spp", default="4,16,64", help="comma-separated sample counts")
+    samplers.add_argument("--reference-spp", type=int, default=1024)
+
+    args = parser.parse_args()
+    if args.benchmark == "rays":
+        bench_rays(args.width, args.spp)
+    elif args.benchmark == "vec3":
+        bench_vec3(args.count)
+    elif args.benchmark == "roulette":
+        bench_roulette(args.width, args.spp, args.reference_spp, args.depth)
+    elif args.benchmark == "lights":
+        bench_lights(args.width, args.spp, args.reference_spp)
+    elif args.benchmark == "shadow":
+        bench_shadow(args.count)
+    elif args.benchmark == "pdfs":
+        bench_pdfs(args.count)
+    elif args.benchmark == "output":
+        bench_output(args.width, args.height)
+    elif args.benchmark == "adaptive":
+        bench_adaptive(args.width, args.spp, args.reference_spp, args.threshold)
+    elif args.benchmark == "samplers":
+        bench_samplers(args.width, [int(spp) for spp in args.spp.split(",")], args.reference_spp)
+    else:
+        sys.exit(f"Unknown benchmark: {args.benchmark}")
@@ -21,10 +21,12 @@ from .camera import camera
 from .klein_bottle import KleinBottle
 from .aabb import aabb
 from .bvh_node import bvh_node
+from .flat_bvh import flat_bvh
 from .perlin import perlin
 from .quad import quad
 from .triangle import triangle
 from .mesh import mesh
+from .lights import find_lights
 
 __all__ = [
     'hittable',
@@ -36,8 +38,10 @@ __all__ = [
     'KleinBottle',
     'aabb',
     'bvh_node',
+    'flat_bvh',
     'perlin',
     'quad',
     'triangle',
     'mesh',
+    'find_lights',
 ]
@@ -7,6 +7,12 @@ class aabb:
         self.x = None
         self.y = None
         self.z = None
+        # (x.min, x.max, y.min, y.max, z.min, z.max) for hit_range; refreshed
+        # by _set_bounds whenever an interval is assigned.
+        self.bounds = None
+
+    def _set_bounds(self):
+        self.bounds = (self.x.min, self.x.max, self.y.min, self.y.max, self.z.min, self.z.max)
 
     @classmethod
     def from_intervals(cls, x_interval: interval, y_interval: interval, z_interval: interval) -> "aabb":
@@ -14,6 +20,7 @@ class aabb:
         box.x = x_interval
         box.y = y_interval
         box.z = z_interval
+        box._set_bounds()
         return box
     
     @classmethod
@@ -22,6 +29,7 @@ class aabb:
         box.x = interval.from_floats(a.x, b.x) if a.x < b.x else interval.from_floats(b.x, a.x)
         box.y = interval.from_floats(a.y, b.y) if a.y < b.y else interval.from_floats(b.y, a.y)
         box.z = interval.from_floats(a.z, b.z) if a.z < b.z else interval.from_floats(b.z, a.z)
+        box._set_bounds()
         return box
     
     @classmethod
@@ -30,6 +38,7 @@ class aabb:
         box.x = interval.from_intervals(a.x, b.x)
         box.y = interval.from_intervals(a.y, b.y)
         box.z = interval.from_intervals(a.z, b.z)
+        box._set_bounds()
         return box
 
     def axis_interval(self, n: int) -> interval:
@@ -43,42 +52,52 @@ class aabb:
             raise ValueError("Axis must be 0, 1, or 2.")
         
     def hit(self, r: Ray, ray_t: interval) -> bool:
-        ray_orig = r.origin
-        ray_dir = r.direction
-        ray_dir_arr = [ray_dir.x, ray_dir.y, ray_dir.z]
-        ray_orig_arr = [ray_orig.x, ray_orig.y, ray_orig.z]
+        return self.hit_range(r, ray_t.min, ray_t.max)
+
+    def hit_range(self, r: Ray, t_min: float, t_max: float) -> bool:
+        # Slab test using the ray's cached inverse direction. The sign bits
+        # pick the near and far bound of each axis directly, so there is no
+        # t0/t1 comparison; t_min only grows and t_max only shrinks, so one
+        # check at the end gives the same answer as checking every axis.
+        inv_x, inv_y, inv_z, sx, sy, sz = r.inverse()
+        o = r.origin
+        b = self.bounds
 
-        # Work with local copies to avoid mutating the input interval
-        t_min = ray_t.min
-        t_max = ray_t.max
+        t0 = (b[sx] - o.x) * inv_x
+        t1 = (b[1 - sx] - o.x) * inv_x
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
 
-        for axis in range(3):
-            ax = self.axis_interval(axis)
+        t0 = (b[2 + sy] - o.y) * inv_y
+        t1 = (b[3 - sy] - o.y) * inv_y
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
 
-            adivn = 1.0 / ray_dir_arr[axis]
-            t0 = (ax.min - ray_orig_arr[axis]) * adivn
-            t1 = (ax.max - ray_orig_arr[axis]) * adivn
-            if t0 < t1:
-                if t0 > t_min:
-                    t_min = t0
-                if t1 < t_max:
-                    t_max = t1
-            else:
-                if t1 > t_min:
-                    t_min = t1
-                if t0 < t_max:
-                    t_max = t0
+        t0 = (b[4 + sz] - o.z) * inv_z
+        t1 = (b[5 - sz] - o.z) * inv_z
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
 
-            if t_max <= t_min:
-                return False
-        return True
+        return t_min < t_max
     
     def longest_axis(self) -> int:
-        if self.x.size() >= self.y.size():
-            if self.x.size() >= self.z.size():
-                return 0 if self.x.size() >= self.z.size() else 2
-            else:
-                return 1 if self.y.size() >= self.z.size() else 2
+        # Returns the index of the longest axis of the bounding box.
+        if self.x.size() > self.y.size():
+            return 0 if self.x.size() > self.z.size() else 2
+        else:
+            return 1 if self.y.size() > self.z.size() else 2
+
+    def surface_area(self) -> float:
+        dx = self.x.size()
+        dy = self.y.size()
+        dz = self.z.size()
+        return 2.0 * (dx * dy + dy * dz + dz * dx)
     
     def _pad_to_minimums(self):
         # Adjust the AABB so that no side is narrower than some delta, padding if necessary.
@@ -89,5 +108,6 @@ class aabb:
             self.y = self.y.expand(delta)
         if self.z.size() < delta:
             self.z = self.z.expand(delta)
+        self._set_bounds()
 
     
\ No newline at end of file
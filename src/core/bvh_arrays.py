@@ -0,0 +1,193 @@
+"""
+BVH construction over primitive bounds arrays.
+
+These builders work on (N, 3) NumPy arrays of per-primitive bounds instead of
+hittable objects, so geometry stored as packed arrays (see mesh) never needs a
+Python object per primitive. All builders return a bvh_arrays in the depth-first
+layout used by flat_bvh.
+
+Strategies (same names as bvh_node.build):
+    "median" - split at the median centroid along the longest axis
+    "sah"    - binned surface area heuristic
+    "lbvh"   - Morton-code linear BVH (see core/lbvh.py)
+"""
+
+import numpy as np
+
+
+class bvh_arrays:
+    """
+    Node arrays in flat_bvh layout (depth-first, left child next):
+        bounds (M, 6)  x.min, x.max, y.min, y.max, z.min, z.max per node
+        offset (M,)    right child index (interior) or first index into order (leaf)
+        count  (M,)    0 for interior nodes, primitive count for leaves
+        axis   (M,)    split axis of interior nodes
+        order  (N,)    primitive indices in leaf order
+    """
+
+    def __init__(self, bounds: np.ndarray, offset: np.ndarray, count: np.ndarray, axis: np.ndarray, order: np.ndarray):
+        self.bounds = bounds
+        self.offset = offset
+        self.count = count
+        self.axis = axis
+        self.order = order
+
+    def node_count(self) -> int:
+        return len(self.count)
+
+    def sah_cost(self, traversal_cost: float = 1.0, intersection_cost: float = 1.0) -> float:
+        """Estimated SAH cost, comparable with bvh_node.sah_cost."""
+        extent = self.bounds[:, 1::2] - self.bounds[:, 0::2]
+        area = 2.0 * (extent[:, 0] * extent[:, 1] + extent[:, 1] * extent[:, 2] + extent[:, 2] * extent[:, 0])
+        node_cost = np.where(self.count > 0, self.count * intersection_cost, traversal_cost)
+        root_area = area[0] if area[0] > 0 else 1.0
+        return float((area / root_area * node_cost).sum())
+
+
+def build_bvh_arrays(lo: np.ndarray, hi: np.ndarray, strategy: str = "lbvh", leaf_size: int = 2, bins: int = 12) -> bvh_arrays:
+    """
+    Build a BVH over primitives with (N, 3) bounds lo/hi using the given strategy.
+    Nodes with at most leaf_size primitives become leaves; with "sah" they do
+    only when the SAH cost of the leaf is not above that of the best split.
+    """
+    if len(lo) == 0:
+        raise ValueError("Cannot build a BVH over zero primitives")
+
+    if strategy == "lbvh":
+        from .lbvh import build_lbvh
+        return build_lbvh(lo, hi, leaf_size)
+
+    centroids = (lo + hi) * 0.5
+    if strategy == "median":
+        split = lambda idx, node_lo, node_hi: _median_split(idx, centroids, node_lo, node_hi, leaf_size)
+    elif strategy == "sah":
+        split = lambda idx, node_lo, node_hi: _sah_split(idx, node_lo, node_hi, lo, hi, centroids, bins, leaf_size)
+    else:
+        raise ValueError(f"Unknown BVH build strategy: {strategy}")
+
+    builder = _topdown_builder(lo, hi, split)
+    builder.emit(np.arange(len(lo)))
+    return builder.result()
+
+#----------------------------------------------------------------------------------
+
+class _topdown_builder:
+    """Emits nodes depth-first while recursively splitting index sets."""
+
+    def __init__(self, lo: np.ndarray, hi: np.ndarray, split):
+        self.lo = lo
+        self.hi = hi
+        self.split = split
+        self.bounds = []
+        self.offset = []
+        self.count = []
+        self.axis = []
+        self.order = []
+        self.prim_count = 0
+
+    def emit(self, idx: np.ndarray) -> int:
+        index = len(self.count)
+        node_lo = self.lo[idx].min(axis=0)
+        node_hi = self.hi[idx].max(axis=0)
+        self.bounds.append((node_lo[0], node_hi[0], node_lo[1], node_hi[1], node_lo[2], node_hi[2]))
+
+        parts = self.split(idx, node_lo, node_hi) if len(idx) > 1 else None
+
+        if parts is None:
+            self.offset.append(self.prim_count)
+            self.count.append(len(idx))
+            self.axis.append(0)
+            self.order.append(idx)
+            self.prim_count += len(idx)
+            return index
+
+        left, right, axis = parts
+        self.offset.append(0)
+        self.count.append(0)
+        self.axis.append(axis)
+        self.emit(left)
+        self.offset[index] = self.emit(right)
+        return index
+
+    def result(self) -> bvh_arrays:
+        return bvh_arrays(np.array(self.bounds, dtype=np.float64).reshape(-1, 6),
+                          np.array(self.offset, dtype=np.int64),
+                          np.array(self.count, dtype=np.int64),
+                          np.array(self.axis, dtype=np.int64),
+                          np.concatenate(self.order))
+
+
+def _median_split(idx: np.ndarray, centroids: np.ndarray, node_lo: np.ndarray, node_hi: np.ndarray, leaf_size: int):
+    if len(idx) <= leaf_size:
+        return None
+    axis = int(np.argmax(node_hi - node_lo))
+    mid = len(idx) // 2
+    part = np.argpartition(centroids[idx, axis], mid)
+    return idx[part[:mid]], idx[part[mid:]], axis
+
+
+def _area(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    d = np.maximum(hi - lo, 0.0)
+    return 2.0 * (d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2] + d[..., 2] * d[..., 0])
+
+
+def _sah_split(idx: np.ndarray, node_lo: np.ndarray, node_hi: np.ndarray,
+               lo: np.ndarray, hi: np.ndarray, centroids: np.ndarray, bins: int, max_leaf_size: int,
+               traversal_cost: float = 1.0, intersection_cost: float = 1.0):
+    n = len(idx)
+    parent_area = _area(node_lo, node_hi)
+    c = centroids[idx]
+    c_min = c.min(axis=0)
+    c_extent = c.max(axis=0) - c_min
+
+    best_cost = np.inf
+    best_axis = -1
+    best_bin = 0
+    best_ids = None
+    for axis in range(3):
+        if c_extent[axis] <= 0.0:
+            continue
+        ids = np.minimum(((c[:, axis] - c_min[axis]) * (bins / c_extent[axis])).astype(np.int64), bins - 1)
+        counts = np.bincount(ids, minlength=bins)
+        bin_lo = np.full((bins, 3), np.inf)
+        bin_hi = np.full((bins, 3), -np.inf)
+        np.minimum.at(bin_lo, ids, lo[idx])
+        np.maximum.at(bin_hi, ids, hi[idx])
+
+        # Split k puts bins [0, k) on the left, k = 1 .. bins-1
+        left_area = _area(np.minimum.accumulate(bin_lo)[:-1], np.maximum.accumulate(bin_hi)[:-1])
+        right_area = _area(np.minimum.accumulate(bin_lo[::-1])[::-1][1:], np.maximum.accumulate(bin_hi[::-1])[::-1][1:])
+        left_count = np.cumsum(counts)[:-1]
+        right_count = n - left_count
+
+        valid = (left_count > 0) & (right_count > 0)
+        if not valid.any():
+            continue
+        cost = traversal_cost + intersection_cost * (left_area * left_count + right_area * right_count) / parent_area
+        cost = np.where(valid, cost, np.inf)
+        k = int(np.argmin(cost))
+        if cost[k] < best_cost:
+            best_cost = cost[k]
+            best_axis = axis
+            best_bin = k + 1
+            best_ids = ids
+
+    # Same rule as bvh_node._build_sah: a leaf when that is cheaper than the best split
+    if n <= max_leaf_size and (best_axis < 0 or intersection_cost * n <= best_cost):
+        return None
+
+    if best_axis < 0:
+        # All centroids coincide: split by count
+        return idx[:n // 2], idx[n // 2:], 0
+    go_left = best_ids < best_bin
+    return idx[go_left], idx[~go_left], best_axis
+
+
+def triangle_bounds(v0: np.ndarray, v1: np.ndarray, v2: np.ndarray, delta: float = 0.0001) -> tuple[np.ndarray, np.ndarray]:
+    """Per-triangle bounds, padded like aabb._pad_to_minimums so no side is thinner than delta."""
+    lo = np.minimum(np.minimum(v0, v1), v2)
+    hi = np.maximum(np.maximum(v0, v1), v2)
+    thin = (hi - lo) < delta
+    lo = np.where(thin, lo - delta / 2, lo)
+    hi = np.where(thin, hi + delta / 2, hi)
+    return lo, hi
@@ -2,13 +2,42 @@
 from util import Ray
 from core import hit_record, interval, hittable, hittable_list, aabb
 import random
+import time
 from functools import cmp_to_key
 
 class bvh_node(hittable):
 
+    # Relative costs used by the surface area heuristic
+    traversal_cost = 1.0
+    intersection_cost = 1.0
+
+    @classmethod
+    def from_list(cls, list: hittable_list, strategy: str = "median", show_progress: bool = False) -> "bvh_node":
+        return cls.build(list.objects, strategy, show_progress)
+
     @classmethod
-    def from_list(cls, list: hittable_list) -> "bvh_node":
-        return None
+    def build(cls, objects: list[hittable], strategy: str = "median", show_progress: bool = False) -> "bvh_node":
+        """
+        Build a BVH over objects with the given strategy:
+            "median" - sort along the longest axis and split at the median
+            "sah"    - binned surface area heuristic with multi-object leaves
+            "lbvh"   - linear BVH from sorted Morton codes (fastest to build)
+        With show_progress, the build time and resulting SAH cost are printed.
+        """
+        start_time = time.time()
+        if strategy == "median":
+            root = cls.from_objects(objects, 0, len(objects))
+        elif strategy == "sah":
+            root = cls.from_objects_sah(objects)
+        elif strategy == "lbvh":
+            root = cls.from_objects_lbvh(objects)
+        else:
+            raise ValueError(f"Unknown BVH build strategy: {strategy}")
+
+        if show_progress:
+            build_time = time.time() - start_time
+            print(f"  BVH ({strategy}): {len(objects)} objects, built in {build_time:.3f}s, SAH cost {root.sah_cost():.2f}")
+        return root
     
     @classmethod
     def from_objects(cls, objects: list[hittable], start: int, end: int, depth: int = 0, show_progress: bool = False) -> "bvh_node":
@@ -26,6 +55,7 @@ class bvh_node(hittable):
             instance.bbox = aabb.from_aabbs(instance.bbox, objects[object_index].bounding_box())
 
         axis = instance.bbox.longest_axis()
+        instance.axis = axis
 
         comparator = None
         if axis == 0:
@@ -65,16 +95,211 @@ class bvh_node(hittable):
         import math
         return int(math.ceil(math.log2(n))) if n > 0 else 0
     
-    def hit(self, r: Ray, ray_t: interval, rec: hit_record) -> bool:
-        if not self.bbox.hit(r, ray_t):
+    @classmethod
+    def from_objects_sah(cls, objects: list[hittable], bins: int = 12, max_leaf_size: int = 8) -> "bvh_node":
+        """
+        Build a BVH with binned SAH splits. Object centroids are binned along
+        each axis and the split with the lowest estimated cost is taken.
+        A range becomes a leaf (a hittable_list) when that is cheaper than
+        the best split and it holds at most max_leaf_size objects.
+        """
+        # Per-object bounds and centroids as plain floats: (min xyz, max xyz, centroid xyz)
+        info = []
+        for obj in objects:
+            box = obj.bounding_box()
+            lo = (box.x.min, box.y.min, box.z.min)
+            hi = (box.x.max, box.y.max, box.z.max)
+            info.append((lo, hi, ((lo[0] + hi[0]) * 0.5, (lo[1] + hi[1]) * 0.5, (lo[2] + hi[2]) * 0.5)))
+
+        node = cls._build_sah(objects, info, list(range(len(objects))), bins, max_leaf_size)
+        if isinstance(node, bvh_node):
+            return node
+
+        # Everything fits in one leaf: wrap it so the root is still a bvh_node
+        root = cls.__new__(cls)
+        root.bbox = node.bounding_box()
+        root.axis = root.bbox.longest_axis()
+        root.left = root.right = node
+        return root
+
+    @classmethod
+    def from_objects_lbvh(cls, objects: list[hittable], leaf_size: int = 2) -> "bvh_node":
+        """
+        Build a BVH with the NumPy LBVH builder (see core/lbvh.py) and convert
+        its node arrays into bvh_node objects. Leaves with more than two
+        objects become hittable_lists.
+        """
+        from .lbvh import build_lbvh, object_bounds
+
+        tree = build_lbvh(*object_bounds(objects), leaf_size)
+        order = tree.order.tolist()
+        bounds = tree.bounds.tolist()
+        offset = tree.offset.tolist()
+        count = tree.count.tolist()
+        axis = tree.axis.tolist()
+
+        # Children always follow their parent in the arrays, so build back to front
+        nodes = [None] * len(count)
+        for k in range(len(count) - 1, -1, -1):
+            b = bounds[k]
+            box = aabb.from_intervals(interval.from_floats(b[0], b[1]),
+                                      interval.from_floats(b[2], b[3]),
+                                      interval.from_floats(b[4], b[5]))
+            leaf_objects = [objects[order[p]] for p in range(offset[k], offset[k] + count[k])]
+            if count[k] > 2:
+                leaf = hittable_list()
+                for obj in leaf_objects:
+                    leaf.add(obj)
+                nodes[k] = leaf
+                if k > 0:
+                    continue
+                leaf_objects = [leaf]
+
+            node = cls.__new__(cls)
+            node.bbox = box
+            node.axis = axis[k] if count[k] == 0 else box.longest_axis()
+            if count[k] == 0:
+                node.left = nodes[k + 1]
+                node.right = nodes[offset[k]]
+            elif len(leaf_objects) == 1:
+                node.left = node.right = leaf_objects[0]
+            else:
+                node.left, node.right = leaf_objects
+            nodes[k] = node
+        return nodes[0]
+
+    @classmethod
+    def _build_sah(cls, objects: list[hittable], info: list, indices: list[int], bins: int, max_leaf_size: int) -> hittable:
+        n = len(indices)
+        if n == 1:
+            return objects[indices[0]]
+
+        lo = [min(info[i][0][a] for i in indices) for a in range(3)]
+        hi = [max(info[i][1][a] for i in indices) for a in range(3)]
+        parent_area = _area(lo, hi)
+        leaf_cost = n * cls.intersection_cost
+
+        best_cost = float('inf')
+        best_axis = -1
+        best_bin = 0
+        for axis in range(3):
+            c_min = min(info[i][2][axis] for i in indices)
+            c_max = max(info[i][2][axis] for i in indices)
+            extent = c_max - c_min
+            if extent <= 0.0:
+                continue
+
+            # Accumulate count and bounds per bin
+            scale = bins / extent
+            counts = [0] * bins
+            bin_lo = [[float('inf')] * 3 for _ in range(bins)]
+            bin_hi = [[float('-inf')] * 3 for _ in range(bins)]
+            for i in indices:
+                b = min(int((info[i][2][axis] - c_min) * scale), bins - 1)
+                counts[b] += 1
+                _grow(bin_lo[b], bin_hi[b], info[i][0], info[i][1])
+
+            # Sweep from the right to get area and count of every right partition
+            right_area = [0.0] * bins
+            right_count = [0] * bins
+            r_lo = [float('inf')] * 3
+            r_hi = [float('-inf')] * 3
+            count = 0
+            for b in range(bins - 1, 0, -1):
+                _grow(r_lo, r_hi, bin_lo[b], bin_hi[b])
+                count += counts[b]
+                right_area[b] = _area(r_lo, r_hi) if count else 0.0
+                right_count[b] = count
+
+            # Sweep from the left and evaluate the split before each bin
+            l_lo = [float('inf')] * 3
+            l_hi = [float('-inf')] * 3
+            count = 0
+            for b in range(1, bins):
+                _grow(l_lo, l_hi, bin_lo[b - 1], bin_hi[b - 1])
+                count += counts[b - 1]
+                if count == 0 or right_count[b] == 0:
+                    continue
+                cost = cls.traversal_cost + cls.intersection_cost * (
+                    _area(l_lo, l_hi) * count + right_area[b] * right_count[b]) / parent_area
+                if cost < best_cost:
+                    best_cost = cost
+                    best_axis = axis
+                    best_bin = b
+
+        if n <= max_leaf_size and (best_axis < 0 or leaf_cost <= best_cost):
+            leaf = hittable_list()
+            for i in indices:
+                leaf.add(objects[i])
+            return leaf
+
+        if best_axis < 0:
+            # All centroids coincide: split by count
+            left_indices = indices[:n // 2]
+            right_indices = indices[n // 2:]
+            best_axis = 0
+        else:
+            c_min = min(info[i][2][best_axis] for i in indices)
+            scale = bins / (max(info[i][2][best_axis] for i in indices) - c_min)
+            left_indices = []
+            right_indices = []
+            for i in indices:
+                b = min(int((info[i][2][best_axis] - c_min) * scale), bins - 1)
+                (left_indices if b < best_bin else right_indices).append(i)
+
+        node = cls.__new__(cls)
+        node.bbox = aabb.from_intervals(interval.from_floats(lo[0], hi[0]),
+                                        interval.from_floats(lo[1], hi[1]),
+                                        interval.from_floats(lo[2], hi[2]))
+        node.axis = best_axis
+        node.left = cls._build_sah(objects, info, left_indices, bins, max_leaf_size)
+        node.right = cls._build_sah(objects, info, right_indices, bins, max_leaf_size)
+        return node
+
+    def sah_cost(self) -> float:
+        """Estimated SAH cost of the tree rooted at this node (lower is better)."""
+        return self._subtree_cost(self)
+
+    @classmethod
+    def _subtree_cost(cls, node: hittable) -> float:
+        if isinstance(node, hittable_list):
+            return len(node.objects) * cls.intersection_cost
+        if not isinstance(node, bvh_node):
+            return cls.intersection_cost
+        if node.left is node.right:
+            return cls._subtree_cost(node.left)
+
+        area = node.bbox.surface_area()
+        if area <= 0.0:
+            return cls.traversal_cost + cls._subtree_cost(node.left) + cls._subtree_cost(node.right)
+        return cls.traversal_cost \
+            + node.left.bounding_box().surface_area() / area * cls._subtree_cost(node.left) \
+            + node.right.bounding_box().surface_area() / area * cls._subtree_cost(node.right)
+
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        if not self.bbox.hit_range(r, t_min, t_max):
             return False
         
-        hit_left = self.left.hit(r, ray_t, rec)
-        hit_right = self.right.hit(r, interval.from_floats(ray_t.min, rec.t if hit_left else ray_t.max), rec)
+        hit_left = self.left.hit_range(r, t_min, t_max, rec)
+        if self.right is self.left:
+            return hit_left
+        hit_right = self.right.hit_range(r, t_min, rec.t if hit_left else t_max, rec)
         return hit_left or hit_right
+
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        if not self.bbox.hit_range(r, t_min, t_max):
+            return False
+        if self.left.occluded(r, t_min, t_max):
+            return True
+        return self.right is not self.left and self.right.occluded(r, t_min, t_max)
     
     def bounding_box(self) -> aabb:
         return self.bbox
+
+    def flatten(self) -> "flat_bvh":
+        """Compile this tree into a flat_bvh with iterative traversal."""
+        from .flat_bvh import flat_bvh
+        return flat_bvh.from_node(self)
     
     @staticmethod
     def box_compare(a: hittable, b: hittable, axis_index: int) -> int:
@@ -98,3 +323,18 @@ class bvh_node(hittable):
     @staticmethod
     def box_z_compare(a: hittable, b: hittable) -> int:
         return bvh_node.box_compare(a, b, 2)
+
+
+def _grow(lo: list[float], hi: list[float], other_lo, other_hi):
+    """Grow the box (lo, hi) in place to contain (other_lo, other_hi)."""
+    for a in range(3):
+        if other_lo[a] < lo[a]:
+            lo[a] = other_lo[a]
+        if other_hi[a] > hi[a]:
+            hi[a] = other_hi[a]
+
+def _area(lo, hi) -> float:
+    dx = hi[0] - lo[0]
+    dy = hi[1] - lo[1]
+    dz = hi[2] - lo[2]
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
@@ -1,9 +1,17 @@
 import math
+import os
+import signal
 import sys
 import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Optional
+import numpy as np
 from core import hittable, hit_record, interval
-from util import point3, vec3, color, write_color, Ray, degrees_to_radians, dot, cross, normalize, random_in_unit_disk
-from random import random
+from .material import scatter_record
+from .sampler import SAMPLERS, concentric_disk
+from util import point3, vec3, color, write_image, IMAGE_FORMATS, Ray, degrees_to_radians, dot, cross, normalize, random_in_unit_disk
+from util.rng import random, seed as random_seed
 
 def format_time(seconds: float) -> str:
     """Format time in seconds to a human-readable string (e.g., '1h 59m 26s' or '0m 56s')"""
@@ -31,6 +39,82 @@ class camera:
     defocus_angle = 0.0
     focus_distance = 10.0
 
+    # Rendering draws from its own generator (util/rng.py), not the random
+    # module's. With a seed, every sample reseeds it from (seed, pixel, sample
+    # index) before it is traced, so each sample is a fixed function of the
+    # seed: a seeded render gives the same samples in every mode and the same
+    # image for any workers count and task order. None picks a seed per render
+    # and reseeds only once per run of samples of a pixel, which skips the
+    # cost of seeding for every sample.
+    seed = None
+    _base_seed = 0
+
+    # "random" draws every sample from independent random numbers.
+    # "stratified", "halton" and "sobol" use the low-discrepancy samplers in
+    # core/sampler.py, which spread a pixel's samples evenly over the pixel
+    # offset, lens point, time, bounce directions (materials whose
+    # scatter_record has a pdf) and, with sample_lights, the light and the
+    # point on it. Russian roulette and other material decisions stay random.
+    # The wavefront engine ignores this.
+    sampler = "random"
+    _sampler = None
+
+    # Parallel rendering: workers > 1 renders in a process pool. "tiles" splits
+    # the image into square tiles; "samples" gives every task the whole frame
+    # at a slice of samples_per_pixel and writes the merged image after each
+    # finished batch, which balances uneven scenes and gives early previews.
+    workers = 1
+    parallel_mode = "tiles"
+    tile_size = 16
+    samples_per_batch = 0  # 0: about four batches per worker
+
+    # Progressive rendering: passes over the whole frame at 1, 1, 2, 4, ...
+    # samples per pixel (1, 2, 4, 8, ... in total) into a running float sum.
+    # Once every pixel has a sample, the output file is atomically replaced
+    # with the current average at most every snapshot_interval seconds. Ctrl-C
+    # stops the render and still writes the image accumulated so far. Works
+    # with workers > 1 (tasks are tiles of one pass); ignores parallel_mode.
+    progressive = False
+    snapshot_interval = 10.0
+    pass_chunk = 16  # passes are rendered (and pool tasks sized) in chunks of at most this many samples
+
+    # Adaptive sampling (implies progressive): every pixel first gets
+    # adaptive_min_samples (None: a quarter of samples_per_pixel), then later passes only sample pixels whose 95%
+    # confidence interval of mean luminance is wider than adaptive_threshold
+    # times that mean (at least 0.01, so near-black pixels can stop). The
+    # budget stays samples_per_pixel * pixels in total; what converged pixels
+    # do not use goes to the noisy ones, up to adaptive_max_samples each
+    # (None: 4 * samples_per_pixel). render() writes the per-pixel sample
+    # counts next to the image as <name>.samples.<ext>; they are also left in
+    # sample_counts.
+    adaptive = False
+    adaptive_threshold = 0.05
+    adaptive_min_samples = None
+    adaptive_max_samples = None
+    sample_counts = None
+
+    # Russian roulette: after roulette_depth bounces a path survives each
+    # further bounce with probability max(throughput) (capped at
+    # roulette_max_survival) and is reweighted, instead of always running to
+    # max_depth. None traces every path to max_depth.
+    roulette_depth = None
+    roulette_max_survival = 0.95
+
+    # Next-event estimation: at every diffuse hit, also pick a point on one of
+    # the lights and trace a shadow ray to it. Multiple importance sampling
+    # (power heuristic) weighs it against hitting the light by scattering.
+    # lights=None means every emissive quad and stationary Sphere in the world
+    # (core/lights.py); moving spheres cannot be sampled. render() resolves the
+    # list; call prepare_lights before using render_pixel directly.
+    sample_lights = False
+    lights = None
+    _lights = ()
+    _light_set = frozenset()
+
+    # "scalar" traces one Ray at a time through ray_color; "wavefront" uses the
+    # batched NumPy engine in core/wavefront.py.
+    engine = "scalar"
+
     def __init__(self):
         pass
 
@@ -68,96 +152,636 @@ class camera:
         self.defocus_disk_u = defocus_radius * u
         self.defocus_disk_v = defocus_radius * v
 
-    def ray_color(self, r: Ray, depth: int, world: hittable) -> color:
-        if depth <= 0:
-            return color(0, 0, 0)
-        
-        rec = hit_record()
-
-        if not world.hit(r, interval.from_floats(0.001, float('inf')), rec):
-            return self.background
-        scattered = Ray(point3(0,0,0), vec3(0,0,0))
-        attenuation = color(0,0,0)
-        color_from_emission = rec.material.emitted(rec.u, rec.v, rec.p)
-        if not rec.material.scatter(r, rec, attenuation, scattered):
-            return color_from_emission
-        
-        color_from_scatter = rec.material.emitted(rec.u, rec.v, rec.p)
+        # Chosen here so that pool workers share it
+        self._base_seed = self.seed if self.seed is not None else int.from_bytes(os.urandom(8), 'little')
+        if self.sampler == "random":
+            self._sampler = None
+        elif self.sampler in SAMPLERS:
+            self._sampler = SAMPLERS[self.sampler](self.samples_per_pixel, self._base_seed)
+        else:
+            raise ValueError(f"Unknown sampler: {self.sampler} (use random, {', '.join(SAMPLERS)})")
+
+    def prepare_lights(self, world: hittable):
+        """Resolve the lights sampled by next-event estimation (see sample_lights)."""
+        if not self.sample_lights:
+            lights = []
+        elif self.lights is not None:
+            from .sphere import Sphere
+            lights = list(self.lights)
+            if any(isinstance(light, Sphere) and light.is_moving() for light in lights):
+                raise ValueError("Moving spheres cannot be sampled as lights (see core/lights.py)")
+        else:
+            from .lights import find_lights
+            lights = find_lights(world)
+        # One list drives both MIS sides: sample_light picks uniformly from it
+        # and ray_color divides by its length. Duplicates would make the two
+        # disagree, so drop them; the set is only for membership tests.
+        self._lights = list(dict.fromkeys(lights))
+        self._light_set = frozenset(self._lights)
 
-        if not rec.material.scatter(r, rec, attenuation, scattered):
-            return color_from_emission
-        
-        color_from_scatter = attenuation * self.ray_color(scattered, depth - 1, world)
-        return color_from_emission + color_from_scatter
-    
+    def ray_color(self, r: Ray, depth: int, world: hittable) -> color:
+        # Iterative path loop: throughput is the product of the attenuations
+        # so far, and radiance collects emission and background weighted by it.
+        radiance = color(0, 0, 0)
+        throughput = color(1, 1, 1)
+        roulette_depth = self.roulette_depth
+        lights = self._lights
+        light_set = self._light_set
+        sampler = self._sampler
+        bounce = 0
+        # Density with which r's direction was scattered; 0 when light
+        # sampling did not run at the previous hit (camera rays, specular).
+        scatter_pdf = 0.0
+
+        while bounce < depth:
+            rec = hit_record()
+            if not world.hit_range(r, 0.001, math.inf, rec):
+                radiance += throughput * self.background
+                break
+            rec.finalize(r)
+
+            # One scatter and (for lights only) one emitted call per bounce
+            mat = rec.material
+            srec = mat.scatter(r, rec)
+            if mat.is_emissive:
+                emission = mat.emitted(rec.u, rec.v, rec.p)
+                if scatter_pdf > 0.0 and rec.obj in light_set:
+                    # Also sampled directly at the previous hit: MIS weight
+                    light_pdf = rec.obj.pdf_value(r.origin, r.direction) / len(lights)
+                    emission = emission * (scatter_pdf * scatter_pdf / (scatter_pdf * scatter_pdf + light_pdf * light_pdf))
+                radiance += throughput * emission
+            if srec is None:
+                break
+            if srec.scattered is None:
+                # Deferred by the material: draw the direction from its pdf
+                direction = srec.pdf.generate() if sampler is None else srec.pdf.sample(*sampler.get_2d())
+                srec = srec._replace(scattered=Ray(rec.p, direction, r.time))
+            elif sampler is not None and srec.pdf is not None:
+                # Same distribution, direction from the sampler's next pair
+                scattered = srec.scattered
+                srec = srec._replace(scattered=Ray(scattered.origin, srec.pdf.sample(*sampler.get_2d()), scattered.time))
+
+            if lights and srec.pdf is not None:
+                direct = self.sample_light(r, rec, srec, world)
+                if direct is not None:
+                    direct *= throughput
+                    radiance += direct
+                scatter_pdf = srec.pdf.value(srec.scattered.direction)
+            else:
+                scatter_pdf = 0.0
+
+            throughput *= srec.attenuation
+            r = srec.scattered
+            bounce += 1
+
+            # Russian roulette: continue with probability q and divide the
+            # throughput by q, so the estimate stays unbiased while dim paths
+            # end early.
+            if roulette_depth is not None and roulette_depth <= bounce < depth:
+                q = min(max(throughput.x, throughput.y, throughput.z), self.roulette_max_survival)
+                if random() >= q:
+                    break
+                throughput /= q
+
+        return radiance
+
+    def sample_light(self, r: Ray, rec: hit_record, srec: scatter_record, world: hittable) -> Optional[color]:
+        """
+        Light-sampling estimate of the direct light reflected at rec, already
+        MIS-weighted against srec.pdf; None when the sample contributes nothing.
+        """
+        lights = self._lights
+        sampler = self._sampler
+        if sampler is None:
+            light = lights[int(random() * len(lights))]
+            to_light = light.random(rec.p)
+        else:
+            light = lights[min(int(sampler.get_1d() * len(lights)), len(lights) - 1)]
+            to_light = light.sample(rec.p, *sampler.get_2d())
+        light_pdf = light.pdf_value(rec.p, to_light) / len(lights)
+        if light_pdf <= 0.0:
+            return None
+
+        shadow = Ray(rec.p, to_light, r.time)
+        reflected = rec.material.scattering_pdf(r, rec, shadow)
+        if reflected <= 0.0:
+            return None
+
+        # Find the sampled point on the light, then ask the world only
+        # whether anything lies in front of it
+        light_rec = hit_record()
+        if not light.hit_range(shadow, 0.001, math.inf, light_rec):
+            return None
+        if world.occluded(shadow, 0.001, light_rec.t * (1 - 1e-6)):
+            return None
+        light_rec.finalize(shadow)
+
+        # attenuation * reflected is BRDF * cosine. With s the density of
+        # scattering towards the light, the power heuristic weight
+        # l^2 / (l^2 + s^2) divided by the light pdf l gives l / (l^2 + s^2).
+        scatter_pdf = srec.pdf.value(to_light)
+        weight = reflected * light_pdf / (light_pdf * light_pdf + scatter_pdf * scatter_pdf)
+        return srec.attenuation * light_rec.material.emitted(light_rec.u, light_rec.v, light_rec.p) * weight
 
     def sample_square(self) -> vec3:
         return vec3(random() - 0.5, random() - 0.5, 0)
 
     def defocus_disk_sample(self) -> point3:
         p = random_in_unit_disk()
-        return self.center + p.x * self.defocus_disk_u + p.y * self.defocus_disk_v
+        return self.center.mul_add(self.defocus_disk_u, p.x).mul_add(self.defocus_disk_v, p.y)
 
     def get_ray(self, w: int, h: int) -> Ray:
+        sampler = self._sampler
+        if sampler is not None:
+            return self._get_sampler_ray(sampler, w, h)
         offset = self.sample_square()
-        psample = self.pixel00_loc \
-                    + (w + offset.x) * self.delta_u \
-                    + (h + offset.y) * self.delta_v
+        psample = self.pixel00_loc.mul_add(self.delta_u, w + offset.x).mul_add(self.delta_v, h + offset.y)
         ray_origin = self.center if self.defocus_angle <= 0.0 else self.defocus_disk_sample()
-        ray_direction = psample - ray_origin
+        ray_direction = psample
+        ray_direction -= ray_origin
         ray_time = random()  # Time can be used for motion blur; here we just use a random time in [0,1)
         return Ray(ray_origin, ray_direction, ray_time)
 
+    def _get_sampler_ray(self, sampler, w: int, h: int) -> Ray:
+        """get_ray with the pixel offset, lens point and time taken from sampler (see sampler)."""
+        ox, oy = sampler.get_2d()
+        psample = self.pixel00_loc.mul_add(self.delta_u, w + ox - 0.5).mul_add(self.delta_v, h + oy - 0.5)
+        if self.defocus_angle <= 0.0:
+            ray_origin = self.center
+        else:
+            lx, ly = concentric_disk(*sampler.get_2d())
+            ray_origin = self.center.mul_add(self.defocus_disk_u, lx).mul_add(self.defocus_disk_v, ly)
+        ray_direction = psample
+        ray_direction -= ray_origin
+        return Ray(ray_origin, ray_direction, sampler.get_1d())
+
+    def render_pixel(self, world: hittable, w: int, h: int) -> color:
+        """Render all samples of pixel (w, h) and return the averaged color."""
+        pcolor = self.render_samples(world, w, h, self.samples_per_pixel)
+        pcolor *= self.pixel_samples_scale
+        return pcolor
+
+    def render_samples(self, world: hittable, w: int, h: int, count: int, first: int = 0) -> color:
+        """Sum (not average) of count samples of pixel (w, h), starting at sample index first."""
+        pcolor = color(0,0,0)
+        sampler = self._sampler
+        reseed = self._reseed_samples(w, h, first)
+        for s in range(count):
+            if reseed:
+                random_seed(self._sample_seed(w, h, first + s))
+            if sampler is not None:
+                sampler.start_pixel_sample(w, h, first + s)
+            r = self.get_ray(w, h)
+            pcolor += self.ray_color(r, self.max_depth, world)
+        return pcolor
+
+    def _reseed_samples(self, w: int, h: int, first: int) -> bool:
+        """
+        True when every sample must reseed util.rng (seeded renders).
+        Unseeded renders promise no reproducibility, so it is seeded once for
+        the whole run of samples, which still keeps pixels and worker
+        processes on distinct streams.
+        """
+        if self.seed is not None:
+            return True
+        random_seed(self._sample_seed(w, h, first))
+        return False
+
+    def _sample_seed(self, w: int, h: int, index: int) -> int:
+        """util.rng seed for sample index of pixel (w, h); distinct for every seed, pixel and index."""
+        return (((self._base_seed * self.img_height + h) * self.img_width + w) << 32) + index
+
     def render(self, world: hittable, output_file: str = "image.ppm"):
+        """Render and write output_file; the extension picks the format (see write_image)."""
+        extension = os.path.splitext(output_file)[1].lower()
+        if extension not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format '{extension}' (use {', '.join(IMAGE_FORMATS)})")
+
+        start_time = time.time()
+        image = self._render(world, output_file)
+        write_image(output_file, image)
+        if self.adaptive and self.engine != "wavefront":
+            root, extension = os.path.splitext(output_file)
+            self._write_sample_map(root + ".samples" + extension)
+        self._report_done(output_file, start_time)
+
+    def render_to_array(self, world: hittable) -> np.ndarray:
+        """Render and return a (height, width, 3) float64 array of linear colors, without writing a file."""
+        return self._render(world, None)
+
+    def _render(self, world: hittable, output_file: Optional[str]) -> np.ndarray:
         self.initialize()
+        self.prepare_lights(world)
 
         print(f"Starting render: {self.img_width}x{self.img_height} ({self.samples_per_pixel} samples/pixel, max depth {self.max_depth})", file=sys.stderr)
 
+        if self.engine == "wavefront":
+            image = self._render_wavefront(world)
+        elif self.progressive or self.adaptive:
+            image = self._render_progressive(world, output_file)
+        elif self.workers > 1 and self.parallel_mode == "samples":
+            image = self._render_sample_batches(world, output_file)
+        elif self.workers > 1 and self.parallel_mode == "tiles":
+            image = self._render_tiles(world)
+        elif self.workers > 1:
+            raise ValueError(f"Unknown parallel_mode: {self.parallel_mode}")
+        else:
+            image = self._render_scanlines(world)
+
+        # Clear the progress line
+        sys.stderr.write("\r" + " " * 100 + "\r")
+        sys.stderr.flush()
+        return image
+
+    def _render_scanlines(self, world: hittable) -> np.ndarray:
         start_time = time.time()
         last_time = start_time
         scanline_times = []  # Store recent scanline times
         window_size = 20  # Number of recent scanlines to average
 
-        with open(output_file, 'w') as f:
-            f.write(f"P3\n{self.img_width} {self.img_height}\n255\n")
-            for h in range(self.img_height):
-                for w in range(self.img_width):
+        image = np.empty((self.img_height, self.img_width, 3))
+        for h in range(self.img_height):
+            row = array('d')
+            for w in range(self.img_width):
+                pcolor = self.render_pixel(world, w, h)
+                row.extend((pcolor.x, pcolor.y, pcolor.z))
+            image[h] = np.frombuffer(row).reshape(self.img_width, 3)
+
+            # Calculate and display progress with windowed moving average
+            current_time = time.time()
+            scanline_time = current_time - last_time
+            last_time = current_time
+
+            # Maintain a sliding window of recent scanline times
+            scanline_times.append(scanline_time)
+            if len(scanline_times) > window_size:
+                scanline_times.pop(0)
+
+            # Average only recent scanlines
+            avg_scanline_time = sum(scanline_times) / len(scanline_times)
+
+            elapsed = current_time - start_time
+            scanlines_done = h + 1
+            scanlines_remaining = self.img_height - scanlines_done
+            estimated_remaining = avg_scanline_time * scanlines_remaining
 
-                    pcolor = color(0,0,0)
-                    for s in range(self.samples_per_pixel):
-                        r = self.get_ray(w, h)
-                        pcolor += self.ray_color(r, self.max_depth, world)
+            elapsed_str = format_time(elapsed)
+            eta_str = format_time(estimated_remaining)
 
-                    write_color(f, self.pixel_samples_scale * pcolor)
+            sys.stderr.write(f"\rScanlines remaining: {scanlines_remaining} | Elapsed: {elapsed_str} | ETA: {eta_str}  ")
+            sys.stderr.flush()
+
+        return image
 
-                # Calculate and display progress with windowed moving average
-                current_time = time.time()
-                scanline_time = current_time - last_time
-                last_time = current_time
+    def tiles(self) -> list[tuple[int, int, int, int]]:
+        """Split the image into (x0, y0, x1, y1) tiles in scanline order."""
+        return [(x0, y0, min(x0 + self.tile_size, self.img_width), min(y0 + self.tile_size, self.img_height))
+                for y0 in range(0, self.img_height, self.tile_size)
+                for x0 in range(0, self.img_width, self.tile_size)]
 
-                # Maintain a sliding window of recent scanline times
-                scanline_times.append(scanline_time)
-                if len(scanline_times) > window_size:
-                    scanline_times.pop(0)
+    def _render_tiles(self, world: hittable) -> np.ndarray:
+        start_time = time.time()
+        tiles = self.tiles()
+        image = np.empty((self.img_height, self.img_width, 3))
 
-                # Average only recent scanlines
-                avg_scanline_time = sum(scanline_times) / len(scanline_times)
+        # The camera and world go to each worker once through the pool
+        # initializer; tasks only carry tile coordinates.
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_tile_worker,
+                                 initargs=(self, world)) as pool:
+            futures = [pool.submit(_render_tile, tile) for tile in tiles]
 
-                elapsed = current_time - start_time
-                scanlines_done = h + 1
-                scanlines_remaining = self.img_height - scanlines_done
-                estimated_remaining = avg_scanline_time * scanlines_remaining
+            for tiles_done, future in enumerate(as_completed(futures), start=1):
+                (x0, y0, x1, y1), tile_pixels = future.result()
+                image[y0:y1, x0:x1] = np.frombuffer(tile_pixels).reshape(y1 - y0, x1 - x0, 3)
 
-                elapsed_str = format_time(elapsed)
-                eta_str = format_time(estimated_remaining)
+                elapsed = time.time() - start_time
+                tiles_remaining = len(tiles) - tiles_done
+                estimated_remaining = elapsed / tiles_done * tiles_remaining
 
-                sys.stderr.write(f"\rScanlines remaining: {scanlines_remaining} | Elapsed: {elapsed_str} | ETA: {eta_str}  ")
+                sys.stderr.write(f"\rTiles remaining: {tiles_remaining} | Elapsed: {format_time(elapsed)} | ETA: {format_time(estimated_remaining)}  ")
                 sys.stderr.flush()
 
-            # Clear the progress line and show completion message
-            elapsed_total = time.time() - start_time
-            sys.stderr.write("\r" + " " * 100 + "\r")
+        return image
+
+    def sample_batches(self) -> list[int]:
+        """Split samples_per_pixel into per-task sample counts."""
+        size = self.samples_per_batch or math.ceil(self.samples_per_pixel / (4 * self.workers))
+        full, rest = divmod(self.samples_per_pixel, size)
+        return [size] * full + ([rest] if rest else [])
+
+    def _render_sample_batches(self, world: hittable, output_file: Optional[str]) -> np.ndarray:
+        start_time = time.time()
+        batches = self.sample_batches()
+
+        # Batches are added to sums in batch order, whatever order they finish
+        # in, so the float rounding and the image do not depend on scheduling.
+        sums = np.zeros((self.img_height, self.img_width, 3))
+        finished = {}
+        next_batch = 0
+        samples_done = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_tile_worker,
+                                 initargs=(self, world)) as pool:
+            futures = [pool.submit(_render_sample_batch, index, count, sum(batches[:index]))
+                       for index, count in enumerate(batches)]
+
+            for batches_done, future in enumerate(as_completed(futures), start=1):
+                index, count, batch_sums = future.result()
+                finished[index] = np.frombuffer(batch_sums).reshape(sums.shape)
+                while next_batch in finished:
+                    sums += finished.pop(next_batch)
+                    next_batch += 1
+                samples_done += count
+
+                # Merged preview of everything finished so far
+                if output_file is not None:
+                    write_image(output_file, (sums + sum(finished.values())) / samples_done)
+
+                elapsed = time.time() - start_time
+                estimated_remaining = elapsed / samples_done * (self.samples_per_pixel - samples_done)
+                sys.stderr.write(f"\rSamples done: {samples_done}/{self.samples_per_pixel} | Elapsed: {format_time(elapsed)} | ETA: {format_time(estimated_remaining)}  ")
+                sys.stderr.flush()
+
+        sums /= samples_done
+        return sums
+
+    def passes(self) -> list[int]:
+        """Samples per pixel of each progressive pass: 1, 1, 2, 4, ... up to samples_per_pixel in total."""
+        counts = []
+        done = 0
+        while done < self.samples_per_pixel:
+            count = min(max(done, 1), self.samples_per_pixel - done)
+            counts.append(count)
+            done += count
+        return counts
+
+    def pass_chunks(self, count: int) -> list[int]:
+        """Split a pass of count samples into chunks of at most pass_chunk samples."""
+        full, rest = divmod(count, self.pass_chunk)
+        return [self.pass_chunk] * full + ([rest] if rest else [])
+
+    def render_sample_moments(self, world: hittable, w: int, h: int, count: int, first: int = 0) -> tuple[color, float]:
+        """Sum of count samples of pixel (w, h), from sample index first, and the sum of their squared luminances."""
+        pcolor = color(0,0,0)
+        squares = 0.0
+        sampler = self._sampler
+        reseed = self._reseed_samples(w, h, first)
+        for s in range(count):
+            if reseed:
+                random_seed(self._sample_seed(w, h, first + s))
+            if sampler is not None:
+                sampler.start_pixel_sample(w, h, first + s)
+            sample = self.ray_color(self.get_ray(w, h), self.max_depth, world)
+            lum = 0.2126 * sample.x + 0.7152 * sample.y + 0.0722 * sample.z
+            squares += lum * lum
+            pcolor += sample
+        return pcolor, squares
+
+    def converged(self, sums: np.ndarray, squares: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Boolean (height, width) mask of pixels that meet adaptive_threshold (see adaptive)."""
+        n = np.maximum(counts, 1)
+        mean = sums @ (0.2126, 0.7152, 0.0722) / n
+        variance = np.maximum(squares / n - mean * mean, 0.0) * n / np.maximum(n - 1, 1)
+        error = 1.96 * np.sqrt(variance / n)
+        done = error <= self.adaptive_threshold * np.maximum(mean, 0.01)
+
+        # A pixel whose few samples all missed a small bright feature looks
+        # converged; it only stops once its 3x3 neighbourhood has converged too.
+        padded = np.pad(done, 1, constant_values=True)
+        height, width = done.shape
+        for dy in range(3):
+            for dx in range(3):
+                done &= padded[dy:dy + height, dx:dx + width]
+        return done
+
+    def _progressive_passes(self, sums: np.ndarray, squares: np.ndarray, counts: np.ndarray):
+        """
+        Yield (samples, active) for each progressive pass, where active is None
+        for the whole frame or a boolean mask. Adaptive passes are planned from
+        the statistics of the passes before them.
+        """
+        if not self.adaptive:
+            for count in self.passes():
+                yield count, None
+            return
+
+        min_samples = min(self.adaptive_min_samples or max(self.samples_per_pixel // 4, 1), self.samples_per_pixel)
+        done = 0
+        while done < min_samples:
+            count = min(max(done, 1), min_samples - done)
+            yield count, None
+            done += count
+
+        budget = self.samples_per_pixel * counts.size
+        max_samples = self.adaptive_max_samples or 4 * self.samples_per_pixel
+        while True:
+            active = (counts < max_samples) & ~self.converged(sums, squares, counts)
+            active_pixels = np.count_nonzero(active)
+            if not active_pixels:
+                return
+            # Active pixels need not have the same counts: a stopped pixel
+            # starts again when a neighbour turns out noisy (see converged).
+            # Double the pixels with the fewest samples, within the per-pixel
+            # cap and what is left of the budget, and leave out pixels that
+            # this pass would take past the cap.
+            n = int(counts[active].min())
+            count = min(n, max_samples - n, int(budget - counts.sum()) // active_pixels)
+            if count <= 0:
+                return
+            active &= counts + count <= max_samples
+            yield count, active
+
+    def _render_progressive(self, world: hittable, output_file: Optional[str]) -> np.ndarray:
+        start_time = time.time()
+        height, width = self.img_height, self.img_width
+
+        sums = np.zeros((height, width, 3))
+        squares = np.zeros((height, width))
+        counts = np.zeros((height, width))
+        last_snapshot = None
+        frame_complete = False
+        pixel_samples = width * height * self.samples_per_pixel
+        samples_done = 0
+
+        def add(x0: int, y0: int, x1: int, y1: int, count: int, active: Optional[np.ndarray], pixels: array, pixel_squares: array):
+            # Fold one rendered block into the running sums, then show progress
+            # and replace the output file when a snapshot is due.
+            nonlocal last_snapshot, frame_complete, samples_done
+            sums[y0:y1, x0:x1] += np.frombuffer(pixels).reshape(y1 - y0, x1 - x0, 3)
+            squares[y0:y1, x0:x1] += np.frombuffer(pixel_squares).reshape(y1 - y0, x1 - x0)
+            if active is None:
+                counts[y0:y1, x0:x1] += count
+                samples_done += (y1 - y0) * (x1 - x0) * count
+            else:
+                block = active[y0:y1, x0:x1]
+                counts[y0:y1, x0:x1] += count * block
+                samples_done += np.count_nonzero(block) * count
+
+            now = time.time()
+            if output_file is not None and (last_snapshot is None or now - last_snapshot >= self.snapshot_interval):
+                frame_complete = frame_complete or counts.min() > 0
+                if frame_complete:
+                    write_image(output_file, sums / counts[..., None])
+                    last_snapshot = now
+
+            elapsed = now - start_time
+            estimated_remaining = elapsed / samples_done * max(pixel_samples - samples_done, 0)
+            sys.stderr.write(f"\rSamples done: {samples_done / (width * height):.1f}/{self.samples_per_pixel} | "
+                             f"Elapsed: {format_time(elapsed)} | ETA: {format_time(estimated_remaining)}  ")
             sys.stderr.flush()
 
-            total_str = format_time(elapsed_total)
-            print(f"Done. Image saved to {output_file} (Total time: {total_str})", file=sys.stderr)
+        passes = self._progressive_passes(sums, squares, counts)
+        # Sample index of each pass's first sample: pixels skipped by an
+        # adaptive pass leave a gap, but never reuse an index
+        first = 0
+        try:
+            if self.workers > 1:
+                tiles = self.tiles()
+                # Workers ignore Ctrl-C so that only this process stops; the
+                # tiles still queued are cancelled below.
+                with ProcessPoolExecutor(max_workers=self.workers,
+                                         initializer=_init_progressive_worker,
+                                         initargs=(self, world)) as pool:
+                    try:
+                        for pass_count, active in passes:
+                            tasks = ((tile, count, first + chunk * self.pass_chunk,
+                                      None if active is None else active[tile[1]:tile[3], tile[0]:tile[2]].tobytes())
+                                     for chunk, count in enumerate(self.pass_chunks(pass_count))
+                                     for tile in tiles
+                                     if active is None or active[tile[1]:tile[3], tile[0]:tile[2]].any())
+
+                            # Only a few tasks are queued at a time, so
+                            # stopping waits for at most one chunk per worker.
+                            pending = set()
+                            def submit_more():
+                                for task in tasks:
+                                    pending.add(pool.submit(_render_pass_tile, *task))
+                                    if len(pending) >= 4 * self.workers:
+                                        break
+
+                            # A tile's chunks are added in sample order, as
+                            # in-process, whatever order they finish in.
+                            finished = {}
+                            next_first = dict.fromkeys(tiles, first)
+                            submit_more()
+                            while pending:
+                                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                                for future in done:
+                                    pending.remove(future)
+                                    tile, chunk_first, count, pixels, pixel_squares = future.result()
+                                    finished[tile, chunk_first] = (count, pixels, pixel_squares)
+                                    while (tile, next_first[tile]) in finished:
+                                        count, pixels, pixel_squares = finished.pop((tile, next_first[tile]))
+                                        add(*tile, count, active, pixels, pixel_squares)
+                                        next_first[tile] += count
+                                submit_more()
+                            first += pass_count
+                    except KeyboardInterrupt:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        raise
+            else:
+                for pass_count, active in passes:
+                    for chunk, count in enumerate(self.pass_chunks(pass_count)):
+                        for h in range(height):
+                            row = array('d')
+                            row_squares = array('d')
+                            for w in range(width):
+                                if active is None or active[h, w]:
+                                    pcolor, pixel_squares = self.render_sample_moments(world, w, h, count, first + chunk * self.pass_chunk)
+                                    row.extend((pcolor.x, pcolor.y, pcolor.z))
+                                    row_squares.append(pixel_squares)
+                                else:
+                                    row.extend((0.0, 0.0, 0.0))
+                                    row_squares.append(0.0)
+                            add(0, h, width, h + 1, count, active, row, row_squares)
+                    first += pass_count
+        except KeyboardInterrupt:
+            sys.stderr.write("\r" + " " * 100 + "\r")
+            print(f"Stopped at {samples_done / (width * height):.1f} samples/pixel", file=sys.stderr)
+
+        self.sample_counts = counts
+        if self.adaptive:
+            sys.stderr.write("\r" + " " * 100 + "\r")
+            print(f"Adaptive: {np.count_nonzero(self.converged(sums, squares, counts)) / counts.size:.0%} of pixels converged, "
+                  f"samples per pixel min {counts.min():.0f} / mean {counts.mean():.1f} / max {counts.max():.0f}", file=sys.stderr)
+
+        # Pixels that never got a sample stay black
+        return sums / np.maximum(counts, 1)[..., None]
+
+    def _write_sample_map(self, path: str):
+        """Write sample_counts as a grayscale image, linear from black (0) to white (the maximum)."""
+        counts = self.sample_counts
+        scale = counts / max(counts.max(), 1)
+        # write_image applies gamma 2; squaring first keeps the gray levels linear
+        write_image(path, np.repeat((scale * scale)[..., None], 3, axis=2))
+
+    def _render_wavefront(self, world: hittable) -> np.ndarray:
+        from .wavefront import wavefront_renderer
+        return wavefront_renderer(self, world).render()
+
+    def _report_done(self, output_file: str, start_time: float):
+        elapsed_total = time.time() - start_time
+        total_str = format_time(elapsed_total)
+        print(f"Done. Image saved to {output_file} (Total time: {total_str})", file=sys.stderr)
+
+#------------------------------------------------------------------------
+# Pool worker state. Each pool process receives the camera and world once
+# through _init_tile_worker and then renders tiles or sample batches against
+# that copy.
+
+_worker_camera = None
+_worker_world = None
+
+def _init_tile_worker(cam: camera, world: hittable):
+    global _worker_camera, _worker_world
+    _worker_camera = cam
+    _worker_world = world
+
+def _init_progressive_worker(cam: camera, world: hittable):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_tile_worker(cam, world)
+
+def _render_pass_tile(tile: tuple[int, int, int, int], count: int, first: int,
+                      active: Optional[bytes]) -> tuple[tuple[int, int, int, int], int, int, array, array]:
+    """
+    Render samples first .. first + count - 1 of one tile, only at the pixels
+    set in active (row-major bools, None for all). Returns the tile, first,
+    count, RGB sums and squared-luminance sums; skipped pixels are zero.
+    """
+    x0, y0, x1, y1 = tile
+    pixels = array('d')
+    pixel_squares = array('d')
+    i = 0
+    for h in range(y0, y1):
+        for w in range(x0, x1):
+            if active is None or active[i]:
+                pcolor, squares = _worker_camera.render_sample_moments(_worker_world, w, h, count, first)
+                pixels.extend((pcolor.x, pcolor.y, pcolor.z))
+                pixel_squares.append(squares)
+            else:
+                pixels.extend((0.0, 0.0, 0.0))
+                pixel_squares.append(0.0)
+            i += 1
+    return tile, first, count, pixels, pixel_squares
+
+def _render_tile(tile: tuple[int, int, int, int]) -> tuple[tuple[int, int, int, int], array]:
+    """Render one tile; returns the tile and its RGB values in scanline order."""
+    x0, y0, x1, y1 = tile
+    pixels = array('d')
+    for h in range(y0, y1):
+        for w in range(x0, x1):
+            pcolor = _worker_camera.render_pixel(_worker_world, w, h)
+            pixels.extend((pcolor.x, pcolor.y, pcolor.z))
+    return tile, pixels
+
+def _render_sample_batch(index: int, count: int, first: int) -> tuple[int, int, array]:
+    """Render the whole frame with count samples per pixel from sample index first; returns (index, count, RGB sums)."""
+    cam = _worker_camera
+    sums = array('d')
+    for h in range(cam.img_height):
+        for w in range(cam.img_width):
+            pcolor = cam.render_samples(_worker_world, w, h, count, first)
+            sums.extend((pcolor.x, pcolor.y, pcolor.z))
+    return index, count, sums
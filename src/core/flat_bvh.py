@@ -0,0 +1,302 @@
+"""
+Flattened bounding volume hierarchy.
+
+A built bvh_node tree is compiled into a linear node array in depth-first
+order, so the left child of an interior node is always the next node and only
+the right child needs an explicit offset. Traversal is iterative and stack
+based instead of recursing through Python objects.
+
+Per node:
+    bounds[6*i : 6*i+6]  x.min, x.max, y.min, y.max, z.min, z.max
+    offset[i]            right child index (interior) or first primitive index (leaf)
+    count[i]             0 for interior nodes, number of primitives for leaves
+    axis[i]              split axis of interior nodes
+"""
+
+import time
+from array import array
+import numpy as np
+
+from util import Ray
+from .hittable import hittable, hit_record
+from .interval import interval
+from .aabb import aabb
+from .hittable_list import hittable_list
+
+
+class flat_bvh(hittable):
+
+    @classmethod
+    def build(cls, objects: list[hittable], strategy: str = "median", show_progress: bool = False) -> "flat_bvh":
+        """
+        Build a flat BVH over objects. "lbvh" goes straight from NumPy arrays
+        to the flat layout; other strategies build a bvh_node tree and compile it.
+        """
+        from .bvh_node import bvh_node
+
+        if strategy != "lbvh":
+            return bvh_node.build(objects, strategy, show_progress).flatten()
+
+        from .lbvh import build_lbvh, object_bounds
+        start_time = time.time()
+        tree = build_lbvh(*object_bounds(objects))
+        instance = cls.from_arrays(tree.bounds, tree.offset, tree.count, tree.axis,
+                                   [objects[k] for k in tree.order.tolist()])
+        if show_progress:
+            print(f"  BVH (lbvh): {len(objects)} objects, built in {time.time() - start_time:.3f}s")
+        return instance
+
+    @classmethod
+    def from_arrays(cls, bounds, offset, count, axis, prims: list[hittable]) -> "flat_bvh":
+        """Create a flat_bvh from node arrays in the layout described above."""
+        instance = cls()
+        instance.bounds.frombytes(np.ascontiguousarray(bounds, dtype=np.float64).tobytes())
+        instance.offset.frombytes(np.ascontiguousarray(offset, dtype=np.int32).tobytes())
+        instance.count.frombytes(np.ascontiguousarray(count, dtype=np.int32).tobytes())
+        instance.axis.frombytes(np.ascontiguousarray(axis, dtype=np.int8).tobytes())
+        instance.prims = prims
+        instance._set_root_bbox()
+        return instance
+
+    @classmethod
+    def from_buffers(cls, bounds: np.ndarray, offset: np.ndarray, count: np.ndarray, axis: np.ndarray, prims: list[hittable]) -> "flat_bvh":
+        """
+        Create a flat_bvh that reads its node arrays in place (for example from
+        a memory-mapped cache) instead of copying them. Arrays must be
+        contiguous float64 / int32 / int32 / int8.
+        """
+        instance = cls()
+        instance.bounds = memoryview(bounds.reshape(-1))
+        instance.offset = memoryview(offset)
+        instance.count = memoryview(count)
+        instance.axis = memoryview(axis)
+        instance.prims = prims
+        instance._set_root_bbox()
+        return instance
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Node arrays as NumPy views, in the dtypes expected by from_buffers."""
+        return {
+            "bvh_bounds": np.frombuffer(self.bounds, dtype=np.float64),
+            "bvh_offset": np.frombuffer(self.offset, dtype=np.int32),
+            "bvh_count": np.frombuffer(self.count, dtype=np.int32),
+            "bvh_axis": np.frombuffer(self.axis, dtype=np.int8),
+        }
+
+    def _set_root_bbox(self):
+        root = self.bounds[0:6]
+        self.bbox = aabb.from_intervals(interval.from_floats(root[0], root[1]),
+                                        interval.from_floats(root[2], root[3]),
+                                        interval.from_floats(root[4], root[5]))
+
+    def __getstate__(self):
+        # memoryviews over a cache mapping cannot be pickled; send copies
+        state = self.__dict__.copy()
+        for name, typecode in (('bounds', 'd'), ('offset', 'i'), ('count', 'i'), ('axis', 'b')):
+            if isinstance(state[name], memoryview):
+                state[name] = array(typecode, state[name].tobytes())
+        return state
+
+    @classmethod
+    def from_node(cls, root: hittable) -> "flat_bvh":
+        """Compile a bvh_node tree (or any single hittable) into a flat_bvh."""
+        instance = cls()
+        instance.bbox = root.bounding_box()
+        instance._emit(root)
+        return instance
+
+    def __init__(self):
+        self.bounds = array('d')
+        self.offset = array('i')
+        self.count = array('i')
+        self.axis = array('b')
+        self.prims = []
+        self.bbox = None
+
+    def _emit(self, node: hittable) -> int:
+        """Append node (and its subtree) to the arrays; returns its index."""
+        from .bvh_node import bvh_node
+
+        index = len(self.count)
+        box = node.bounding_box()
+        self.bounds.extend((box.x.min, box.x.max, box.y.min, box.y.max, box.z.min, box.z.max))
+
+        if isinstance(node, hittable_list):
+            # Multi-object leaf produced by the SAH builder
+            self._emit_leaf(node.objects)
+            return index
+        if not isinstance(node, bvh_node):
+            self._emit_leaf([node])
+            return index
+
+        # bvh_node stores a one-object span (or a root that is a single
+        # SAH leaf) as left is right.
+        if node.left is node.right:
+            self._emit_leaf(node.left.objects if isinstance(node.left, hittable_list) else [node.left])
+            return index
+
+        # A node whose children are both primitives becomes a single leaf.
+        if not isinstance(node.left, (bvh_node, hittable_list)) and not isinstance(node.right, (bvh_node, hittable_list)):
+            self._emit_leaf([node.left, node.right])
+            return index
+
+        self.offset.append(0)
+        self.count.append(0)
+        self.axis.append(node.axis)
+
+        self._emit(node.left)
+        self.offset[index] = self._emit(node.right)
+        return index
+
+    def _emit_leaf(self, objects: list[hittable]):
+        self.offset.append(len(self.prims))
+        self.count.append(len(objects))
+        self.axis.append(0)
+        self.prims.extend(objects)
+
+    def node_count(self) -> int:
+        return len(self.count)
+
+    def bounding_box(self) -> aabb:
+        return self.bbox
+
+    def hit_leaf(self, r: Ray, first: int, n: int, t_min: float, closest: float, rec: hit_record) -> bool:
+        """
+        Intersect the n primitives of a leaf starting at first, within (t_min, closest).
+        Subclasses that store primitives differently (see mesh) override this.
+        """
+        prims = self.prims
+        hit_anything = False
+        for i in range(first, first + n):
+            if prims[i].hit_range(r, t_min, closest, rec):
+                hit_anything = True
+                closest = rec.t
+        return hit_anything
+
+    def occluded_leaf(self, r: Ray, first: int, n: int, t_min: float, t_max: float) -> bool:
+        """Any-hit counterpart of hit_leaf."""
+        prims = self.prims
+        for i in range(first, first + n):
+            if prims[i].occluded(r, t_min, t_max):
+                return True
+        return False
+
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        origin = r.origin
+        ox, oy, oz = origin.x, origin.y, origin.z
+        # Inverse direction and signs are cached on the ray; the sign picks
+        # the near (+0) or far (+1) bound of each slab without a swap.
+        ix, iy, iz, sx, sy, sz = r.inverse()
+        dir_negative = (sx, sy, sz)
+
+        bounds = self.bounds
+        offset = self.offset
+        count = self.count
+        axis = self.axis
+        hit_leaf = self.hit_leaf
+
+        closest = t_max
+        hit_anything = False
+        stack = []
+        node = 0
+
+        while True:
+            # Slab test against [t_min, closest]: a node whose entry distance
+            # is already beyond the closest hit is skipped.
+            b = 6 * node
+            t0 = (bounds[b + sx] - ox) * ix
+            t1 = (bounds[b + 1 - sx] - ox) * ix
+            near = t0 if t0 > t_min else t_min
+            far = t1 if t1 < closest else closest
+            if near < far:
+                t0 = (bounds[b + 2 + sy] - oy) * iy
+                t1 = (bounds[b + 3 - sy] - oy) * iy
+                if t0 > near:
+                    near = t0
+                if t1 < far:
+                    far = t1
+                if near < far:
+                    t0 = (bounds[b + 4 + sz] - oz) * iz
+                    t1 = (bounds[b + 5 - sz] - oz) * iz
+                    if t0 > near:
+                        near = t0
+                    if t1 < far:
+                        far = t1
+
+            if near < far:
+                n = count[node]
+                if n:
+                    if hit_leaf(r, offset[node], n, t_min, closest, rec):
+                        hit_anything = True
+                        closest = rec.t
+                else:
+                    # Visit the nearer child first, defer the farther one
+                    if dir_negative[axis[node]]:
+                        stack.append(node + 1)
+                        node = offset[node]
+                    else:
+                        stack.append(offset[node])
+                        node = node + 1
+                    continue
+
+            if not stack:
+                return hit_anything
+            node = stack.pop()
+
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        # Same traversal as hit_range, but the interval never shrinks and the
+        # first leaf hit ends the query.
+        origin = r.origin
+        ox, oy, oz = origin.x, origin.y, origin.z
+        ix, iy, iz, sx, sy, sz = r.inverse()
+        dir_negative = (sx, sy, sz)
+
+        bounds = self.bounds
+        offset = self.offset
+        count = self.count
+        axis = self.axis
+        occluded_leaf = self.occluded_leaf
+
+        stack = []
+        node = 0
+
+        while True:
+            b = 6 * node
+            t0 = (bounds[b + sx] - ox) * ix
+            t1 = (bounds[b + 1 - sx] - ox) * ix
+            near = t0 if t0 > t_min else t_min
+            far = t1 if t1 < t_max else t_max
+            if near < far:
+                t0 = (bounds[b + 2 + sy] - oy) * iy
+                t1 = (bounds[b + 3 - sy] - oy) * iy
+                if t0 > near:
+                    near = t0
+                if t1 < far:
+                    far = t1
+                if near < far:
+                    t0 = (bounds[b + 4 + sz] - oz) * iz
+                    t1 = (bounds[b + 5 - sz] - oz) * iz
+                    if t0 > near:
+                        near = t0
+                    if t1 < far:
+                        far = t1
+
+            if near < far:
+                n = count[node]
+                if n:
+                    if occluded_leaf(r, offset[node], n, t_min, t_max):
+                        return True
+                else:
+                    # Nearer child first: blockers close to the origin are
+                    # found with fewer node visits on average
+                    if dir_negative[axis[node]]:
+                        stack.append(node + 1)
+                        node = offset[node]
+                    else:
+                        stack.append(offset[node])
+                        node = node + 1
+                    continue
+
+            if not stack:
+                return False
+            node = stack.pop()
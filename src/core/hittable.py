@@ -5,6 +5,13 @@ from .aabb import aabb
 from abc import ABC, abstractmethod
 
 class hit_record:
+    # Intersection is two-phase. Candidate tests (hit_range) only store t,
+    # the primitive that was hit (obj) and whatever cheap scalars it needs
+    # later (u, v, index). Once traversal is done, finalize() asks the winning
+    # primitive to fill in p, normal, front_face, material and the texture
+    # coordinates, so that work is done once per ray instead of once per
+    # closer candidate.
+
     def __init__(self, p: point3 = None, normal: vec3 = None, t: float = 0.0):
         self.p = p
         self.normal = normal
@@ -13,6 +20,12 @@ class hit_record:
         self.material = None
         self.u: float = 0.0
         self.v: float = 0.0
+        self.obj: 'hittable' = None
+        self.index: int = 0
+
+    def finalize(self, r: Ray):
+        # Computes the shading data for the closest hit found by hit_range.
+        self.obj.finalize(r, self)
 
     def set_face_normal(self, r: Ray, outward_normal: vec3):
         # Sets the hit record normal vector.
@@ -29,12 +42,59 @@ class hit_record:
         self.material = other.material
         self.u = other.u
         self.v = other.v
+        self.obj = other.obj
+        self.index = other.index
 
 class hittable(ABC):
-    @abstractmethod
+    # Subclasses implement hit_range, which takes the ray interval as two
+    # floats so aggregates do not allocate an interval per child test.
+    # hit_range only records the candidate (see hit_record); primitives that
+    # defer work override finalize to complete the record for the winner.
+    # hit is kept as the interval-based entry point and returns a finalized
+    # record.
+
     def hit(self, r: Ray, ray_t: interval, rec: hit_record) -> bool:
+        if not self.hit_range(r, ray_t.min, ray_t.max, rec):
+            return False
+        rec.finalize(r)
+        return True
+
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        # Fallback for subclasses that only override hit; their records are
+        # already complete, so the base finalize leaves them alone.
+        if type(self).hit is hittable.hit:
+            raise NotImplementedError(f"{type(self).__name__} must implement hit_range")
+        if not self.hit(r, interval.from_floats(t_min, t_max), rec):
+            return False
+        rec.obj = self
+        return True
+
+    def finalize(self, r: Ray, rec: hit_record):
+        # Nothing deferred by default: hit_range filled in the whole record.
         pass
 
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        # Any-hit query for shadow and visibility rays: is there any
+        # intersection within (t_min, t_max)? Aggregates stop at the first
+        # one they find and primitives write no record. This fallback runs
+        # the full closest-hit search.
+        return self.hit_range(r, t_min, t_max, hit_record())
+
+    # Light sampling. Shapes that can act as sampled area lights (see
+    # core/lights.py) override both: random returns a direction from origin
+    # towards a random point of the shape, and pdf_value the solid-angle
+    # density with which random picks direction. sample is random driven by
+    # a point (u, v) of the unit square (see core/sampler.py).
+
+    def pdf_value(self, origin: point3, direction: vec3) -> float:
+        return 0.0
+
+    def random(self, origin: point3) -> vec3:
+        return vec3(1, 0, 0)
+
+    def sample(self, origin: point3, u: float, v: float) -> vec3:
+        return self.random(origin)
+
     @abstractmethod
     def bounding_box(self) -> aabb:
         pass
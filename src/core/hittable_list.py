@@ -19,15 +19,21 @@ class hittable_list(hittable):
     def bounding_box(self) -> aabb:
         return self.bbox
 
-    def hit(self, r: Ray, ray_t: interval, rec: hit_record) -> bool:
-        temp_rec = hit_record()
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        # Objects only write rec when they find a hit closer than
+        # closest_so_far, so rec can be passed down directly.
         hit_anything = False
-        closest_so_far = ray_t.max
+        closest_so_far = t_max
 
         for obj in self.objects:
-            if obj.hit(r, interval.from_floats(ray_t.min, closest_so_far), temp_rec):
+            if obj.hit_range(r, t_min, closest_so_far, rec):
                 hit_anything = True
-                closest_so_far = temp_rec.t
-                rec.copy_from(temp_rec)
+                closest_so_far = rec.t
 
-        return hit_anything
\ No newline at end of file
+        return hit_anything
+
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        for obj in self.objects:
+            if obj.occluded(r, t_min, t_max):
+                return True
+        return False
@@ -1,6 +1,8 @@
 import math
+import numpy as np
 from core.material import material
-from util import vec3, point3, dot, Ray
+from util import vec3, vec3_array, point3, dot, Ray
+from .aabb import aabb
 from .hittable import hittable, hit_record
 from .interval import interval
 
@@ -45,42 +47,40 @@ class KleinBottle(hittable):
         du = (2.0 * math.pi) / self.u_steps
         dv = (2.0 * math.pi) / self.v_steps
 
-        # Pre-compute all vertices in local coordinates
-        self.vertices = []
-        for i in range(self.u_steps + 1):
-            row = []
-            for j in range(self.v_steps + 1):
-                u = i * du
-                v = j * dv
-                row.append(self._parametric_point_local(u, v))
-            self.vertices.append(row)
-
-        # Pre-compute normals at quad centers for better quality
-        self.normals = []
-        for i in range(self.u_steps):
-            row = []
-            for j in range(self.v_steps):
-                u_mid = (i + 0.5) * du
-                v_mid = (j + 0.5) * dv
-                row.append(self._parametric_normal_local(u_mid, v_mid))
-            self.normals.append(row)
+        # Vertices in local coordinates, row i * (v_steps + 1) + j is (u_i, v_j)
+        u, v = np.meshgrid(np.arange(self.u_steps + 1) * du, np.arange(self.v_steps + 1) * dv, indexing='ij')
+        self.vertices = self._parametric_points_local(u.ravel(), v.ravel())
 
-    def _parametric_point_local(self, u: float, v: float) -> vec3:
-        """Compute point on Klein bottle surface in local coordinates (no translation/scale)."""
-        cos_u = math.cos(u)
-        sin_u = math.sin(u)
-        cos_u_half = math.cos(u / 2.0)
-        sin_u_half = math.sin(u / 2.0)
-        sin_v = math.sin(v)
-        sin_2v = math.sin(2.0 * v)
+        # Normals at quad centers for better quality, row i * v_steps + j
+        u, v = np.meshgrid((np.arange(self.u_steps) + 0.5) * du, (np.arange(self.v_steps) + 0.5) * dv, indexing='ij')
+        self.normals = self._parametric_normals_local(u.ravel(), v.ravel())
+
+        # World-space vertices for intersection, and the bounds of the tessellated surface
+        self.world_vertices = self.vertices * self.scale + self.center
+        self.bbox = aabb.from_points(self.world_vertices.min(), self.world_vertices.max())
+        self.bbox._pad_to_minimums()
+
+    def _surface(self, u, v):
+        """Surface x, y, z in local coordinates; u and v may be floats or NumPy arrays."""
+        cos_u_half = np.cos(u / 2.0)
+        sin_u_half = np.sin(u / 2.0)
+        sin_v = np.sin(v)
+        sin_2v = np.sin(2.0 * v)
 
         r = self.a + self.b * cos_u_half * sin_v - self.b * sin_u_half * sin_2v
 
-        x = r * cos_u
-        y = r * sin_u
+        x = r * np.cos(u)
+        y = r * np.sin(u)
         z = self.b * sin_u_half * sin_v + self.b * cos_u_half * sin_2v
+        return x, y, z
+
+    def _parametric_point_local(self, u: float, v: float) -> vec3:
+        """Compute point on Klein bottle surface in local coordinates (no translation/scale)."""
+        return vec3(*self._surface(u, v))
 
-        return vec3(x, y, z)
+    def _parametric_points_local(self, u: np.ndarray, v: np.ndarray) -> vec3_array:
+        """_parametric_point_local for arrays of parameters."""
+        return vec3_array(np.stack(self._surface(u, v), axis=1))
 
     def parametric_point(self, u: float, v: float) -> point3:
         """Compute point on Klein bottle surface given parameters u, v."""
@@ -99,54 +99,93 @@ class KleinBottle(hittable):
         normal = pu.cross(pv)
         return normal.unit_vector()
 
+    def _parametric_normals_local(self, u: np.ndarray, v: np.ndarray) -> vec3_array:
+        """_parametric_normal_local for arrays of parameters."""
+        epsilon = 0.001
+        pu = (self._parametric_points_local(u + epsilon, v) - self._parametric_points_local(u - epsilon, v)) / (2.0 * epsilon)
+        pv = (self._parametric_points_local(u, v + epsilon) - self._parametric_points_local(u, v - epsilon)) / (2.0 * epsilon)
+        return pu.cross(pv).normalize()
+
+    def bounding_box(self) -> aabb:
+        return self.bbox
+
     def parametric_normal(self, u: float, v: float) -> vec3:
         """Compute approximate normal at parameter point (u, v) using numerical derivatives."""
         # For transformed geometry, normal direction stays the same (assuming uniform scaling)
         return self._parametric_normal_local(u, v)
 
-    def hit(self, r: Ray, ray_t: interval, rec: hit_record) -> bool:
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
         """
         Ray-Klein bottle intersection using pre-computed tessellated mesh.
         This uses cached vertices and normals for performance.
         """
-        closest_t = ray_t.max
+        # Rays that miss the bounding box cannot hit any of the triangles
+        if not self.bbox.hit_range(r, t_min, t_max):
+            return False
+
+        closest_t = t_max
         hit_anything = False
 
         # Check intersection with pre-computed tessellated surface
+        vertices = self.world_vertices
+        row = self.v_steps + 1
         for i in range(self.u_steps):
             for j in range(self.v_steps):
-                # Get pre-computed vertices and transform to world space
-                p00 = self.center + self.scale * self.vertices[i][j]
-                p10 = self.center + self.scale * self.vertices[i + 1][j]
-                p11 = self.center + self.scale * self.vertices[i + 1][j + 1]
-                p01 = self.center + self.scale * self.vertices[i][j + 1]
+                # Pre-computed world-space corners of quad (i, j)
+                k = i * row + j
+                p00 = vertices[k]
+                p10 = vertices[k + row]
+                p11 = vertices[k + row + 1]
+                p01 = vertices[k + 1]
 
-                # Get pre-computed normal for this quad
-                normal = self.normals[i][j]
+                # The normal for this quad is looked up in finalize
+                quad_index = i * self.v_steps + j
 
                 # Split quad into two triangles and test both
                 # Triangle 1: p00, p10, p11
-                t = self._intersect_triangle(r, p00, p10, p11, ray_t.min, closest_t)
+                t = self._intersect_triangle(r, p00, p10, p11, t_min, closest_t)
                 if t is not None and t < closest_t:
                     closest_t = t
                     rec.t = t
-                    rec.p = r.at(t)
-                    rec.set_face_normal(r, normal)
-                    rec.material = self.material
+                    rec.index = quad_index
+                    rec.obj = self
                     hit_anything = True
 
                 # Triangle 2: p00, p11, p01
-                t = self._intersect_triangle(r, p00, p11, p01, ray_t.min, closest_t)
+                t = self._intersect_triangle(r, p00, p11, p01, t_min, closest_t)
                 if t is not None and t < closest_t:
                     closest_t = t
                     rec.t = t
-                    rec.p = r.at(t)
-                    rec.set_face_normal(r, normal)
-                    rec.material = self.material
+                    rec.index = quad_index
+                    rec.obj = self
                     hit_anything = True
 
         return hit_anything
 
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        """True at the first tessellation triangle hit within [t_min, t_max]."""
+        if not self.bbox.hit_range(r, t_min, t_max):
+            return False
+
+        vertices = self.world_vertices
+        row = self.v_steps + 1
+        intersect = self._intersect_triangle
+        for i in range(self.u_steps):
+            for j in range(self.v_steps):
+                k = i * row + j
+                p00 = vertices[k]
+                p11 = vertices[k + row + 1]
+                if intersect(r, p00, vertices[k + row], p11, t_min, t_max) is not None:
+                    return True
+                if intersect(r, p00, p11, vertices[k + 1], t_min, t_max) is not None:
+                    return True
+        return False
+
+    def finalize(self, r: Ray, rec: hit_record):
+        rec.p = r.at(rec.t)
+        rec.set_face_normal(r, self.normals[rec.index])
+        rec.material = self.material
+
     def _intersect_triangle(self, ray: Ray, v0: point3, v1: point3, v2: point3,
                            t_min: float, t_max: float) -> float:
         """
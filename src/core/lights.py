@@ -0,0 +1,46 @@
+"""
+Light lists for next-event estimation (camera.sample_lights).
+
+find_lights walks a scene the same way the wavefront engine collects its
+primitives and returns the shapes that can be sampled as area lights: every
+quad and stationary Sphere whose material is emissive. Other emitters
+(triangles, meshes, textured skies) still light the scene through ordinary
+scattering. That includes moving spheres: light sampling has no ray time, so
+it would aim at their time-0 position while shading rays hit them elsewhere,
+and the MIS weights of the two strategies would disagree.
+"""
+
+from .hittable import hittable
+from .hittable_list import hittable_list
+from .bvh_node import bvh_node
+from .flat_bvh import flat_bvh
+from .quad import quad
+from .sphere import Sphere
+
+
+def find_lights(world: hittable) -> list[hittable]:
+    """Emissive quad and stationary Sphere objects in world, in scene order."""
+    lights = []
+    seen = set()
+    stack = [world]
+    while stack:
+        obj = stack.pop()
+        # bvh_node leaves may reference the same object twice
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, hittable_list):
+            stack.extend(reversed(obj.objects))
+        elif isinstance(obj, bvh_node):
+            stack.append(obj.right)
+            stack.append(obj.left)
+        elif isinstance(obj, flat_bvh):
+            stack.extend(reversed(obj.prims))
+        elif isinstance(obj, quad):
+            if obj.mat.is_emissive:
+                lights.append(obj)
+        elif isinstance(obj, Sphere):
+            if obj.material.is_emissive and not obj.is_moving():
+                lights.append(obj)
+    return lights
@@ -1,19 +1,54 @@
 
 from abc import ABC, abstractmethod
-from random import random
+from util.rng import random
+from typing import NamedTuple, Optional
 from .texture import texture, solid_color
-from util import Ray, color, point3, random_unit_vector, reflect, refract, vec3
-from math import log, exp
+from util import Ray, color, point3, onb, random_unit_vector, reflect, refract, vec3
+from math import log, exp, pi, cos, sin
 from core.hittable import hit_record
+from .pdf import pdf, cosine_pdf
+
+class scatter_record(NamedTuple):
+    """
+    Result of material.scatter: the color filter and the outgoing ray.
+    pdf is the distribution the ray's direction was drawn from, for materials
+    whose scattering_pdf describes it; None for specular and other sampling
+    that light sampling cannot be combined with. The attenuation must hold
+    for any direction drawn from pdf: the camera may replace scattered's
+    direction with pdf.sample(u, v) for its sampler's (u, v). scattered may
+    be None when pdf is set; the camera then draws the direction from pdf
+    itself and traces it from the hit point, so none is wasted.
+    """
+    attenuation: color
+    scattered: Optional[Ray]
+    pdf: Optional[pdf] = None
 
 class material(ABC):
 
+    # True for materials that emit light. Subclasses that override emitted are
+    # marked emissive automatically; the integrator skips emitted() otherwise.
+    is_emissive = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'is_emissive' not in cls.__dict__:
+            cls.is_emissive = cls.emitted is not material.emitted
+
     def emitted(self, u: float, v: float, p: point3) -> color:
         return color(0, 0, 0)
 
+    def scattering_pdf(self, r_in: Ray, rec: 'hit_record', scattered: Ray) -> float:
+        """
+        BRDF times cosine over the albedo, for any scattered direction: for a
+        material that returns a scatter_record.pdf, attenuation * scattering_pdf
+        is the reflected fraction light sampling needs.
+        """
+        return 0.0
+
     @abstractmethod
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
-        return False
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
+        """Sample one scattered ray, or return None if the ray is absorbed."""
+        return None
 
 class lambertian(material):
     
@@ -29,43 +64,30 @@ class lambertian(material):
         instance.tex = tex
         return instance
 
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
-        scatter_direction = rec.normal + random_unit_vector()
-        if scatter_direction.near_zero():
-            scatter_direction = rec.normal
-
-        scattered.origin = rec.p
-        scattered.direction = scatter_direction        
-        scattered.time = r_in.time
-        attenuation.x = self.tex.value(rec.u, rec.v, rec.p).x
-        attenuation.y = self.tex.value(rec.u, rec.v, rec.p).y
-        attenuation.z = self.tex.value(rec.u, rec.v, rec.p).z
-        return True
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
+        # Sampling the cosine lobe exactly makes attenuation the whole weight.
+        # The direction is left to the camera, which draws it from the pdf.
+        return scatter_record(self.tex.value(rec.u, rec.v, rec.p), None, cosine_pdf(rec.normal))
+
+    def scattering_pdf(self, r_in: Ray, rec: 'hit_record', scattered: Ray) -> float:
+        d = scattered.direction
+        cos_theta = rec.normal.dot(d) / d.length()
+        return cos_theta / pi if cos_theta > 0 else 0.0
     
 class metal(material):
     def __init__(self, albedo: color, fuzz: float):
         self.albedo = albedo
         self.fuzz = fuzz if fuzz < 1.0 else 1.0
 
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
-        scatter_direction = reflect(r_in.direction, rec.normal) + self.fuzz * random_unit_vector()
-        scattered.origin = rec.p
-        scattered.direction = scatter_direction
-        scattered.time = r_in.time
-        attenuation.x = self.albedo.x
-        attenuation.y = self.albedo.y
-        attenuation.z = self.albedo.z
-        return True
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
+        scatter_direction = reflect(r_in.direction, rec.normal).mul_add(random_unit_vector(), self.fuzz)
+        return scatter_record(self.albedo, Ray(rec.p, scatter_direction, r_in.time))
     
 class dielectric(material):
     def __init__(self, index_of_refraction: float):
         self.ir = index_of_refraction
 
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
-        attenuation.x = 1.0
-        attenuation.y = 1.0
-        attenuation.z = 1.0
-
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
         refraction_ratio = (1.0 / self.ir) if rec.front_face else self.ir
 
         unit_direction = r_in.direction.unit_vector()
@@ -80,10 +102,7 @@ class dielectric(material):
         else:
             direction = refract(unit_direction, rec.normal, refraction_ratio)
 
-        scattered.origin = rec.p
-        scattered.direction = direction
-        scattered.time = r_in.time
-        return True
+        return scatter_record(color(1.0, 1.0, 1.0), Ray(rec.p, direction, r_in.time))
     
     def _reflectance(self, cosine: float, ref_idx: float) -> float:
         r0 = (1 - ref_idx) / (1 + ref_idx)
@@ -109,8 +128,8 @@ class diffuse_light(material):
     def emitted(self, u: float, v: float, p: point3) -> color:
         return self.tex.value(u, v, p)
 
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
-        return False
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
+        return None
 #----------------------------------------------------------------------------------------
 
 class subsurface_simple(material):
@@ -121,28 +140,16 @@ class subsurface_simple(material):
         self.albedo = albedo
         self.scatter_distance = scatter_distance
     
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
         if random() < 0.5:
             # Regular diffuse scatter
-            scatter_direction = rec.normal + random_unit_vector()
             exit_point = rec.p
         else:
             # Subsurface: light exits at displaced point
-            displacement = random_unit_vector() * self.scatter_distance * random()
-            exit_point = rec.p + displacement
-            scatter_direction = rec.normal + random_unit_vector()
-        
-        if scatter_direction.near_zero():
-            scatter_direction = rec.normal
+            exit_point = rec.p.mul_add(random_unit_vector(), self.scatter_distance * random())
+        scatter_direction = cosine_pdf(rec.normal).generate()
         
-        scattered.origin = exit_point
-        scattered.direction = scatter_direction
-        scattered.time = r_in.time
-        
-        attenuation.x = self.albedo.x
-        attenuation.y = self.albedo.y
-        attenuation.z = self.albedo.z
-        return True
+        return scatter_record(self.albedo, Ray(exit_point, scatter_direction, r_in.time))
 
 class subsurface_volumetric(material):
     """
@@ -166,7 +173,7 @@ class subsurface_volumetric(material):
         self.g = g
         self.max_bounces = 64  # prevent infinite loops
     
-    def scatter(self, r_in: Ray, rec: 'hit_record', attenuation: color, scattered: Ray) -> bool:
+    def scatter(self, r_in: Ray, rec: 'hit_record') -> Optional[scatter_record]:
         # Start inside the material, just past the surface
         current_pos = rec.p - rec.normal * 0.001
         current_dir = r_in.direction.unit_vector()
@@ -176,7 +183,7 @@ class subsurface_volumetric(material):
         for _ in range(self.max_bounces):
             # Sample distance to next interaction (exponential distribution)
             t = -log(max(random(), 1e-10)) / self.sigma_t
-            current_pos = current_pos + current_dir * t
+            current_pos += current_dir * t
             
             # Check if we've exited the object
             # (In a full implementation, you'd ray-march and check geometry)
@@ -186,38 +193,24 @@ class subsurface_volumetric(material):
             
             if random() < exit_probability:
                 # Exited the material - do a diffuse scatter outward
-                scatter_direction = rec.normal + random_unit_vector()
-                if scatter_direction.near_zero():
-                    scatter_direction = rec.normal
-                
-                scattered.origin = current_pos
-                scattered.direction = scatter_direction
-                scattered.time = r_in.time
+                scatter_direction = cosine_pdf(rec.normal).generate()
                 
                 # Apply accumulated throughput and albedo
-                attenuation.x = throughput.x * self.albedo.x
-                attenuation.y = throughput.y * self.albedo.y
-                attenuation.z = throughput.z * self.albedo.z
-                return True
+                return scatter_record(throughput * self.albedo, Ray(current_pos, scatter_direction, r_in.time))
             
             # Still inside - scatter or absorb?
             if random() < self.sigma_a / self.sigma_t:
                 # Absorbed
-                attenuation.x = 0.0
-                attenuation.y = 0.0
-                attenuation.z = 0.0
-                return False
+                return None
             
             # Scatter - pick new direction using phase function
             current_dir = self._sample_henyey_greenstein(current_dir)
             
             # Attenuate based on albedo
-            throughput.x *= self.albedo.x
-            throughput.y *= self.albedo.y
-            throughput.z *= self.albedo.z
+            throughput *= self.albedo
         
         # Exceeded max bounces - treat as absorbed
-        return False
+        return None
     
     def _sample_henyey_greenstein(self, incident: vec3) -> vec3:
         """Sample direction from Henyey-Greenstein phase function."""
@@ -231,19 +224,9 @@ class subsurface_volumetric(material):
         sin_theta = (1 - cos_theta * cos_theta) ** 0.5
         
         # Random azimuthal angle
-        phi = 2 * 3.14159265 * random()
-        
-        # Create local coordinate system
-        w = incident.unit_vector()
-        a = vec3(1, 0, 0) if abs(w.x) > 0.9 else vec3(0, 1, 0)
-        v = w.cross(a).unit_vector()
-        u = w.cross(v)
+        phi = 2 * pi * random()
         
-        # Construct new direction
-        from math import cos as mcos, sin as msin
-        direction = (u * mcos(phi) * sin_theta + 
-                    v * msin(phi) * sin_theta + 
-                    w * cos_theta)
-        return direction.unit_vector()
+        # Rotate from the frame around the incident direction
+        return onb(incident.unit_vector()).transform_xyz(cos(phi) * sin_theta, sin(phi) * sin_theta, cos_theta)
     
 #----------------------------------------------------------------------------------
\ No newline at end of file
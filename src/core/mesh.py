@@ -1,28 +1,49 @@
 """
-Mesh loader using PyWavefront for OBJ files.
-Automatically finds OBJ files in a model folder and loads geometry, materials, and textures.
+Mesh loader for OBJ files.
+Automatically finds OBJ files in a model folder and loads their geometry, using
+the built-in streaming reader (core/obj_reader.py) or PyWavefront.
 """
 
 from pathlib import Path
+from math import inf
 from typing import Optional
-import pywavefront
+import sys
+import numpy as np
 
-from util import point3
+from util import point3, vec3
 from .hittable import hittable, hit_record
 from .triangle import triangle
 from .material import material
 from .aabb import aabb
 from .interval import interval
-from .bvh_node import bvh_node
-from util import ray
+from .flat_bvh import flat_bvh
+from .bvh_arrays import build_bvh_arrays, triangle_bounds
+from .obj_reader import read_obj
+from .mesh_cache import cache_key, read_cache, write_cache
+from util import ray, Ray
 
 
 class mesh(hittable):
     """
-    A mesh loaded from an OBJ file using PyWavefront.
+    A mesh loaded from an OBJ file.
     Automatically discovers OBJ files in the provided model folder.
+
+    Geometry is stored as NumPy arrays rather than one triangle object per face:
+        vertices (V, 3)   transformed vertex positions
+        faces    (F, 3)   vertex indices of each triangle, in BVH leaf order
+        packed   (F, 12)  v0, edge1, edge2 and unit normal of each triangle
+    BVH leaves index the packed rows directly, so intersection never creates
+    or touches per-triangle Python objects.
+
+    Small leaves are tested one triangle at a time in Python; leaves with at
+    least vector_leaf_min triangles are tested with a single NumPy call. Use
+    leaf_size (and tune_leaf_size) to pick the tradeoff for an asset.
     """
 
+    # Leaves (or unaccelerated meshes) with at least this many triangles use
+    # the NumPy batch test
+    vector_leaf_min = 16
+
     def __init__(
         self,
         model_path: str,
@@ -30,7 +51,12 @@ class mesh(hittable):
         scale: float = 1.0,
         offset: point3 = point3(0, 0, 0),
         obj_filename: Optional[str] = None,
-        use_bvh: bool = True
+        use_bvh: bool = True,
+        bvh_strategy: str = "median",
+        leaf_size: int = 8,
+        loader: str = "auto",
+        use_cache: bool = True,
+        cache_dir: Optional[str] = None
     ):
         """
         Load a mesh from a model folder.
@@ -41,24 +67,41 @@ class mesh(hittable):
             scale: Scale factor for the mesh (default: 1.0)
             offset: Translation offset (default: origin)
             obj_filename: Optional specific OBJ file name. If None, auto-discovers the first .obj file
-            use_bvh: Build internal BVH for faster ray-triangle intersection (default: True)
+            use_bvh: Build internal (flattened) BVH for faster ray-triangle intersection (default: True)
+            bvh_strategy: BVH build strategy, "median", "sah" or "lbvh" (see bvh_node.build)
+            leaf_size: Maximum triangles per BVH leaf (default: 8; see tune_leaf_size)
+            loader: "builtin" (streaming NumPy reader), "pywavefront", or "auto" to use
+                the built-in reader and fall back to PyWavefront if it cannot parse the file
+            use_cache: Load/save processed mesh arrays and BVH from a binary cache (default: True)
+            cache_dir: Cache folder (default: '.meshcache' next to the OBJ file)
         """
         self.model_path = model_path
         self.mat = mat
         self.scale = scale
         self.offset = offset
-        self.triangles = []
+        self.vertices = None
+        self.faces = None
+        self.packed = None
         self.scene = None
         self.use_bvh = use_bvh
+        self.bvh_strategy = bvh_strategy
+        self.leaf_size = leaf_size
+        self.loader = loader
         self.bvh = None
+        self._cache_file = None
 
         obj_file = self._find_obj_file(model_path, obj_filename)
-        self._load_with_pywavefront(obj_file)
-        self.set_bounding_box()
 
-        # Build internal BVH for this mesh's triangles
-        if self.use_bvh and self.triangles:
-            self.bvh = bvh_node.from_objects(self.triangles, 0, len(self.triangles))
+        if use_cache:
+            self._cache_file = self._cache_path(obj_file, cache_dir)
+            if self._cache_file.exists() and self._load_cache(self._cache_file):
+                return
+
+        self._load_obj(obj_file)
+        self._build()
+
+        if self._cache_file is not None:
+            self._save_cache(self._cache_file)
 
     def _find_obj_file(self, model_path: str, obj_filename: Optional[str] = None) -> str:
         """
@@ -90,73 +133,196 @@ class mesh(hittable):
 
         raise FileNotFoundError(f"No OBJ files found in {model_path}")
 
-    def _load_with_pywavefront(self, obj_file: str):
+    def _load_obj(self, obj_file: str):
         """
-        Load OBJ file using PyWavefront and convert to triangles.
+        Load the OBJ file with the selected loader into the vertex and face arrays.
 
         Args:
             obj_file: Path to the OBJ file
         """
+        if self.loader == "pywavefront":
+            positions, faces = self._load_with_pywavefront(obj_file)
+        elif self.loader == "builtin":
+            positions, faces = read_obj(obj_file)
+        elif self.loader == "auto":
+            try:
+                positions, faces = read_obj(obj_file)
+            except ValueError as e:
+                print(f"Warning: built-in OBJ reader failed on {obj_file} ({e}), using PyWavefront", file=sys.stderr)
+                positions, faces = self._load_with_pywavefront(obj_file)
+        else:
+            raise ValueError(f"Unknown OBJ loader: {self.loader}")
+
+        if not len(faces):
+            raise ValueError(f"No triangles created from OBJ file")
+
+        # Apply scale and offset
+        self.faces = faces
+        self.vertices = positions * self.scale + np.array([self.offset.x, self.offset.y, self.offset.z])
+
+    def _load_with_pywavefront(self, obj_file: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Load OBJ file using PyWavefront; returns untransformed positions (V, 3) and faces (F, 3).
+
+        Args:
+            obj_file: Path to the OBJ file
+        """
+        import pywavefront
+
         # Load the scene with PyWavefront
         # parse=True loads everything, collect_faces=True gives us face data
         self.scene = pywavefront.Wavefront(obj_file, collect_faces=True, parse=True, strict=False)
 
-        # Process all materials in the scene
-        for _, material_obj in self.scene.materials.items():
-            # Get vertices - format depends on what's in the OBJ
-            # Typical format: [x, y, z, nx, ny, nz, u, v, ...] repeated
-            vertices = material_obj.vertices
-
-            if not vertices:
-                continue
-
-            # Vertex format size (how many floats per vertex)
-            # Check the vertex format to understand the layout
-            vertex_format = material_obj.vertex_format
-
-            # Parse vertex format to find stride
-            # Common formats: 'T2F_N3F_V3F', 'N3F_V3F', 'V3F', 'T2F_V3F', etc.
-            stride = self._calculate_stride(vertex_format)
-            v_offset = self._find_position_offset(vertex_format)
-
-            # Extract position data and create triangles from faces
-            if hasattr(material_obj, 'faces'):
-                # Faces are available - use them directly
-                for face in material_obj.faces:
-                    if len(face) >= 3:
-                        # Get the vertex indices for this face
-                        # Triangulate if needed (for quads/n-gons)
-                        for i in range(1, len(face) - 1):
-                            idx0 = face[0] * stride + v_offset
-                            idx1 = face[i] * stride + v_offset
-                            idx2 = face[i + 1] * stride + v_offset
-
-                            v0 = self._extract_vertex(vertices, idx0)
-                            v1 = self._extract_vertex(vertices, idx1)
-                            v2 = self._extract_vertex(vertices, idx2)
-
-                            tri = triangle(v0, v1, v2, self.mat)
-                            self.triangles.append(tri)
-            else:
-                # No faces - vertices are already in triangle order
-                num_vertices = len(vertices) // stride
-
-                # Create triangles from sequential vertices
-                for i in range(0, num_vertices - 2, 3):
-                    idx0 = i * stride + v_offset
-                    idx1 = (i + 1) * stride + v_offset
-                    idx2 = (i + 2) * stride + v_offset
-
-                    v0 = self._extract_vertex(vertices, idx0)
-                    v1 = self._extract_vertex(vertices, idx1)
-                    v2 = self._extract_vertex(vertices, idx2)
-
-                    tri = triangle(v0, v1, v2, self.mat)
-                    self.triangles.append(tri)
-
-        if not self.triangles:
+        # collect_faces gives triangulated faces indexing the shared vertex list
+        faces = [mesh_obj.faces for mesh_obj in self.scene.mesh_list if mesh_obj.faces]
+        if faces and self.scene.vertices:
+            positions = np.array([v[:3] for v in self.scene.vertices], dtype=np.float64)
+            faces = np.concatenate([np.asarray(f, dtype=np.int32).reshape(-1, 3) for f in faces])
+        else:
+            # No faces - material vertices are already in triangle order
+            chunks = []
+            for _, material_obj in self.scene.materials.items():
+                if not material_obj.vertices:
+                    continue
+
+                # Parse vertex format to find stride
+                # Common formats: 'T2F_N3F_V3F', 'N3F_V3F', 'V3F', 'T2F_V3F', etc.
+                stride = self._calculate_stride(material_obj.vertex_format)
+                v_offset = self._find_position_offset(material_obj.vertex_format)
+                data = np.asarray(material_obj.vertices, dtype=np.float64)
+                num_vertices = len(data) // stride // 3 * 3
+                chunks.append(data[:num_vertices * stride].reshape(-1, stride)[:, v_offset:v_offset + 3])
+
+            positions = np.concatenate(chunks) if chunks else np.empty((0, 3))
+            faces = np.arange(len(positions), dtype=np.int32).reshape(-1, 3)
+
+        return positions, faces
+
+    def _build(self):
+        """Drop degenerate faces, build the BVH over the face bounds and pack triangles in leaf order."""
+        corners = self.vertices[self.faces]
+        v0, v1, v2 = corners[:, 0], corners[:, 1], corners[:, 2]
+
+        # Zero-area faces can never be hit and have no normal
+        keep = np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1) > 0.0
+        if not keep.all():
+            self.faces = self.faces[keep]
+            v0, v1, v2 = v0[keep], v1[keep], v2[keep]
+        if not len(self.faces):
             raise ValueError(f"No triangles created from OBJ file")
 
+        self._build_bvh()
+
+    def _build_bvh(self):
+        """(Re)build the BVH with the current strategy and leaf size, and pack triangles in leaf order."""
+        corners = self.vertices[self.faces]
+        lo, hi = triangle_bounds(corners[:, 0], corners[:, 1], corners[:, 2])
+        self._set_bbox(lo.min(axis=0), hi.max(axis=0))
+
+        if self.use_bvh:
+            tree = build_bvh_arrays(lo, hi, self.bvh_strategy, self.leaf_size)
+            self.faces = self.faces[tree.order]
+            self.bvh = mesh_bvh.from_arrays(tree.bounds, tree.offset, tree.count, tree.axis, [])
+            self.bvh.mesh = self
+
+        corners = self.vertices[self.faces]
+        edge1 = corners[:, 1] - corners[:, 0]
+        edge2 = corners[:, 2] - corners[:, 0]
+        normal = np.cross(edge1, edge2)
+        normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+        self._attach(np.ascontiguousarray(self.faces), np.concatenate([corners[:, 0], edge1, edge2, normal], axis=1))
+
+    def _attach(self, faces: np.ndarray, packed: np.ndarray):
+        self.faces = faces
+        self.packed = packed
+        # Flat view for scalar reads in hit_triangles
+        self._tri = memoryview(packed.reshape(-1))
+
+    def _set_bbox(self, lo: np.ndarray, hi: np.ndarray):
+        self.bbox = aabb.from_intervals(interval.from_floats(float(lo[0]), float(hi[0])),
+                                        interval.from_floats(float(lo[1]), float(hi[1])),
+                                        interval.from_floats(float(lo[2]), float(hi[2])))
+
+    @property
+    def v0(self) -> np.ndarray:
+        return self.packed[:, 0:3]
+
+    @property
+    def edge1(self) -> np.ndarray:
+        return self.packed[:, 3:6]
+
+    @property
+    def edge2(self) -> np.ndarray:
+        return self.packed[:, 6:9]
+
+    @property
+    def normal(self) -> np.ndarray:
+        return self.packed[:, 9:12]
+
+    def __getstate__(self):
+        # memoryviews cannot be pickled; _tri is rebuilt from packed
+        state = self.__dict__.copy()
+        del state['_tri']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._tri = memoryview(self.packed.reshape(-1))
+
+    def _cache_path(self, obj_file: str, cache_dir: Optional[str]) -> Path:
+        """Cache file for this OBJ content and the settings that shape the processed data."""
+        settings = {
+            "scale": self.scale,
+            "offset": [self.offset.x, self.offset.y, self.offset.z],
+            "use_bvh": self.use_bvh,
+            "bvh_strategy": self.bvh_strategy,
+            "leaf_size": self.leaf_size,
+            "loader": self.loader,
+        }
+        folder = Path(cache_dir) if cache_dir else Path(obj_file).parent / ".meshcache"
+        return folder / f"{cache_key(obj_file, settings)}.bin"
+
+    def _save_cache(self, cache_path: Path, tuned: bool = False):
+        """
+        Write the mesh arrays (faces in BVH leaf order) and the flattened BVH
+        arrays. tuned records the leaf size tune_leaf_size picked.
+        """
+        arrays = {"vertices": self.vertices, "faces": self.faces, "packed": self.packed}
+        if self.bvh:
+            arrays.update(self.bvh.to_arrays())
+        meta = {"triangle_count": self.triangle_count(), "bounds": list(self.bbox.bounds)}
+        if tuned:
+            meta["leaf_size"] = self.leaf_size
+        try:
+            write_cache(cache_path, arrays, meta)
+        except OSError as e:
+            print(f"Warning: could not write mesh cache {cache_path}: {e}", file=sys.stderr)
+
+    def _load_cache(self, cache_path: Path) -> bool:
+        """Map the mesh arrays and BVH from a cache file; returns False if it cannot be used."""
+        required = ("vertices", "faces", "packed")
+        if self.use_bvh:
+            required += ("bvh_bounds", "bvh_offset", "bvh_count", "bvh_axis")
+        try:
+            arrays, meta = read_cache(cache_path, required, ("triangle_count", "bounds"))
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring mesh cache {cache_path}: {e}", file=sys.stderr)
+            return False
+
+        # Arrays stay views into the mapping; faces are already in BVH leaf order
+        self.vertices = arrays["vertices"]
+        self._attach(arrays["faces"], arrays["packed"])
+        bounds = meta["bounds"]
+        self._set_bbox(bounds[0::2], bounds[1::2])
+        # A tuned cache keeps its BVH under the key of the requested leaf size
+        self.leaf_size = meta.get("leaf_size", self.leaf_size)
+
+        if self.use_bvh:
+            self.bvh = mesh_bvh.from_buffers(arrays["bvh_bounds"], arrays["bvh_offset"],
+                                             arrays["bvh_count"], arrays["bvh_axis"], [])
+            self.bvh.mesh = self
+        return True
+
     def _calculate_stride(self, vertex_format: str) -> int:
         """
         Calculate the stride (number of floats per vertex) from vertex format string.
@@ -189,67 +355,287 @@ class mesh(hittable):
                 offset += num
         return 0
 
-    def _extract_vertex(self, vertices: list, index: int) -> point3:
+    def bounding_box(self) -> aabb:
+        """Return the bounding box of the entire mesh."""
+        return self.bbox
+
+    def hit_range(self, r: ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        """
+        Test ray intersection with all triangles in the mesh.
+        Uses internal BVH if available for faster intersection testing.
+        Returns the closest hit.
         """
-        Extract a vertex position from the vertices list and apply transformations.
+        # Use BVH if available (much faster for large meshes)
+        if self.bvh:
+            return self.bvh.hit_range(r, t_min, t_max, rec)
 
-        Args:
-            vertices: Flat list of vertex data
-            index: Starting index for the position (x, y, z)
+        # Fallback: linear search through all triangles
+        return self.hit_triangles(r, 0, len(self.faces), t_min, t_max, rec)
 
-        Returns:
-            Transformed point3
+    def hit_triangles(self, r: ray, first: int, n: int, t_min: float, closest: float, rec: hit_record) -> bool:
         """
-        x = vertices[index]
-        y = vertices[index + 1]
-        z = vertices[index + 2]
+        Moller-Trumbore against packed triangles first .. first+n-1, within [t_min, closest].
+        Only the closest hit is written to rec.
+        """
+        if n >= self.vector_leaf_min:
+            return self.hit_triangles_batch(r, first, n, t_min, closest, rec)
+
+        tri = self._tri
+        ox, oy, oz = r.origin.x, r.origin.y, r.origin.z
+        dx, dy, dz = r.direction.x, r.direction.y, r.direction.z
+        best = -1
+        best_u = best_v = 0.0
+
+        for i in range(first, first + n):
+            b = 12 * i
+            v0x, v0y, v0z, e1x, e1y, e1z, e2x, e2y, e2z = tri[b:b + 9]
+
+            # h = direction x edge2, det = edge1 . h
+            hx = dy * e2z - dz * e2y
+            hy = dz * e2x - dx * e2z
+            hz = dx * e2y - dy * e2x
+            det = e1x * hx + e1y * hy + e1z * hz
+            if -1e-8 < det < 1e-8:
+                continue
+            inv_det = 1.0 / det
 
-        # Apply scale and offset
-        return point3(x * self.scale, y * self.scale, z * self.scale) + self.offset
+            sx = ox - v0x
+            sy = oy - v0y
+            sz = oz - v0z
+            u = inv_det * (sx * hx + sy * hy + sz * hz)
+            if u < 0.0 or u > 1.0:
+                continue
 
-    def set_bounding_box(self):
-        """Compute bounding box from all triangles."""
-        if not self.triangles:
-            self.bbox = aabb.from_intervals(interval.empty, interval.empty, interval.empty)
-            return
+            qx = sy * e1z - sz * e1y
+            qy = sz * e1x - sx * e1z
+            qz = sx * e1y - sy * e1x
+            v = inv_det * (dx * qx + dy * qy + dz * qz)
+            if v < 0.0 or u + v > 1.0:
+                continue
 
-        # Start with first triangle's bbox
-        self.bbox = self.triangles[0].bounding_box()
+            t = inv_det * (e2x * qx + e2y * qy + e2z * qz)
+            if t < t_min or t > closest:
+                continue
 
-        # Expand to include all other triangles
-        for tri in self.triangles[1:]:
-            self.bbox = aabb.from_aabbs(self.bbox, tri.bounding_box())
+            closest = t
+            best = i
+            best_u = u
+            best_v = v
 
-    def bounding_box(self) -> aabb:
-        """Return the bounding box of the entire mesh."""
-        return self.bbox
+        if best < 0:
+            return False
+        self._set_hit(r, best, closest, best_u, best_v, rec)
+        return True
 
-    def hit(self, r: ray, ray_t: interval, rec: hit_record) -> bool:
+    def hit_triangles_batch(self, r: ray, first: int, n: int, t_min: float, closest: float, rec: hit_record) -> bool:
         """
-        Test ray intersection with all triangles in the mesh.
-        Uses internal BVH if available for faster intersection testing.
-        Returns the closest hit.
+        Same test as hit_triangles with one NumPy pass over the whole range.
+        It reads the packed rows of the range only, so no other per-triangle
+        array is kept.
         """
-        # Use BVH if available (much faster for large meshes)
+        t, u, v, hit = self._hit_rows(r, first, n, t_min, closest)
+        candidates = np.flatnonzero(hit)
+        if not candidates.size:
+            return False
+
+        k = candidates[t[candidates].argmin()]
+        self._set_hit(r, first + int(k), float(t[k]), float(u[k]), float(v[k]), rec)
+        return True
+
+    def _hit_rows(self, r: ray, first: int, n: int, t_min: float, t_max: float):
+        """Moller-Trumbore over packed rows first .. first+n-1 as arrays: (t, u, v, hit mask)."""
+        rows = self.packed[first:first + n]
+        dx, dy, dz = r.direction.x, r.direction.y, r.direction.z
+        sx = r.origin.x - rows[:, 0]
+        sy = r.origin.y - rows[:, 1]
+        sz = r.origin.z - rows[:, 2]
+        e1x, e1y, e1z = rows[:, 3], rows[:, 4], rows[:, 5]
+        e2x, e2y, e2z = rows[:, 6], rows[:, 7], rows[:, 8]
+
+        # h = direction x edge2, q = s x edge1
+        hx = dy * e2z - dz * e2y
+        hy = dz * e2x - dx * e2z
+        hz = dx * e2y - dy * e2x
+        qx = sy * e1z - sz * e1y
+        qy = sz * e1x - sx * e1z
+        qz = sx * e1y - sy * e1x
+        det = e1x * hx + e1y * hy + e1z * hz
+
+        # Rays parallel to a triangle give inf/nan here and fail the tests below
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_det = 1.0 / det
+            u = inv_det * (sx * hx + sy * hy + sz * hz)
+            v = inv_det * (dx * qx + dy * qy + dz * qz)
+            t = inv_det * (e2x * qx + e2y * qy + e2z * qz)
+        hit = (np.abs(det) >= 1e-8) & (u >= 0.0) & (u <= 1.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= t_min) & (t <= t_max)
+        return t, u, v, hit
+
+    def occluded(self, r: ray, t_min: float, t_max: float) -> bool:
+        """True as soon as any triangle intersects the ray within [t_min, t_max]."""
         if self.bvh:
-            return self.bvh.hit(r, ray_t, rec)
+            return self.bvh.occluded(r, t_min, t_max)
+        return self.occluded_triangles(r, 0, len(self.faces), t_min, t_max)
+
+    def occluded_triangles(self, r: ray, first: int, n: int, t_min: float, t_max: float) -> bool:
+        """Any-hit counterpart of hit_triangles: stops at the first triangle hit."""
+        if n >= self.vector_leaf_min:
+            return bool(self._hit_rows(r, first, n, t_min, t_max)[3].any())
+
+        tri = self._tri
+        ox, oy, oz = r.origin.x, r.origin.y, r.origin.z
+        dx, dy, dz = r.direction.x, r.direction.y, r.direction.z
+
+        for i in range(first, first + n):
+            b = 12 * i
+            v0x, v0y, v0z, e1x, e1y, e1z, e2x, e2y, e2z = tri[b:b + 9]
+
+            hx = dy * e2z - dz * e2y
+            hy = dz * e2x - dx * e2z
+            hz = dx * e2y - dy * e2x
+            det = e1x * hx + e1y * hy + e1z * hz
+            if -1e-8 < det < 1e-8:
+                continue
+            inv_det = 1.0 / det
 
-        # Fallback: linear search through all triangles
-        temp_rec = hit_record()
-        hit_anything = False
-        closest_so_far = ray_t.max
+            sx = ox - v0x
+            sy = oy - v0y
+            sz = oz - v0z
+            u = inv_det * (sx * hx + sy * hy + sz * hz)
+            if u < 0.0 or u > 1.0:
+                continue
 
-        for tri in self.triangles:
-            if tri.hit(r, interval.from_floats(ray_t.min, closest_so_far), temp_rec):
-                hit_anything = True
-                closest_so_far = temp_rec.t
-                rec.copy_from(temp_rec)
+            qx = sy * e1z - sz * e1y
+            qy = sz * e1x - sx * e1z
+            qz = sx * e1y - sy * e1x
+            v = inv_det * (dx * qx + dy * qy + dz * qz)
+            if v < 0.0 or u + v > 1.0:
+                continue
 
-        return hit_anything
+            t = inv_det * (e2x * qx + e2y * qy + e2z * qz)
+            if t_min <= t <= t_max:
+                return True
+        return False
+
+    def _set_hit(self, r: ray, index: int, t: float, u: float, v: float, rec: hit_record):
+        # Barycentric coordinates become the texture coordinates
+        rec.t = t
+        rec.u = u
+        rec.v = v
+        rec.index = index
+        rec.obj = self
+
+    def finalize(self, r: ray, rec: hit_record):
+        b = 12 * rec.index + 9
+        tri = self._tri
+        rec.p = r.at(rec.t)
+        rec.set_face_normal(r, vec3(tri[b], tri[b + 1], tri[b + 2]))
+        rec.material = self.mat
+
+    def tune_leaf_size(self, sizes: tuple[int, ...] = (2, 4, 8, 16, 32, 64), ray_count: int = 2000, seed: int = 0) -> dict[int, float]:
+        """
+        Rebuild the BVH with each leaf size and time ray_count random rays
+        aimed at the mesh. Keeps the fastest leaf size and returns
+        {leaf_size: microseconds per ray}. With the cache enabled, the tuned
+        BVH and leaf size replace the cached ones, so later loads with the same
+        settings skip tuning.
+        """
+        import time
+        rng = np.random.default_rng(seed)
+        lo = np.array([self.bbox.x.min, self.bbox.y.min, self.bbox.z.min])
+        hi = np.array([self.bbox.x.max, self.bbox.y.max, self.bbox.z.max])
+        center = (lo + hi) * 0.5
+        radius = np.linalg.norm(hi - lo)
+
+        # Origins on a sphere around the mesh, aimed at random points inside its bounds
+        origins = rng.normal(size=(ray_count, 3))
+        origins = center + radius * origins / np.linalg.norm(origins, axis=1, keepdims=True)
+        targets = lo + (hi - lo) * rng.random((ray_count, 3))
+        rays = [Ray(point3(*o), vec3(*d)) for o, d in zip(origins.tolist(), (targets - origins).tolist())]
+
+        was_bvh = self.use_bvh
+        self.use_bvh = True
+        timings = {}
+        for size in sizes:
+            self.leaf_size = size
+            self._build_bvh()
+            rec = hit_record()
+            start_time = time.perf_counter()
+            for r in rays:
+                self.hit_range(r, 0.001, inf, rec)
+            timings[size] = (time.perf_counter() - start_time) / ray_count * 1e6
+            print(f"  leaf_size {size:>3}: {timings[size]:8.1f} us/ray, {self.bvh.node_count()} nodes", file=sys.stderr)
+
+        self.use_bvh = was_bvh
+        self.leaf_size = min(timings, key=timings.get)
+        self._build_bvh()
+        if self._cache_file is not None:
+            self._save_cache(self._cache_file, tuned=True)
+        return timings
 
     def triangle_count(self) -> int:
         """Return the number of triangles in the mesh."""
-        return len(self.triangles)
+        return len(self.faces)
+
+    def memory_report(self) -> str:
+        """
+        Bytes held by the mesh arrays and BVH, next to an estimate for the same
+        mesh stored as one triangle object per face (vec3 vertices, edges,
+        normal and aabb each, plus the list slots referencing them).
+        """
+        sizes = {"vertices": self.vertices.nbytes, "faces": self.faces.nbytes, "packed": self.packed.nbytes}
+        if self.bvh:
+            sizes["bvh"] = sum(a.nbytes for a in self.bvh.to_arrays().values())
+        total = sum(sizes.values())
+
+        count = self.triangle_count()
+        v0, e1, e2 = self.packed[0, 0:3], self.packed[0, 3:6], self.packed[0, 6:9]
+        sample = triangle(point3(*v0), point3(*(v0 + e1)), point3(*(v0 + e2)), self.mat)
+        per_object = _deep_sizeof(sample, skip=self.mat) + 2 * 8
+        objects_total = count * per_object
+
+        lines = [f"Memory for {self!r}:"]
+        for name, size in sizes.items():
+            lines.append(f"  {name:<10} {size / 2**20:10.2f} MB")
+        lines.append(f"  {'total':<10} {total / 2**20:10.2f} MB  ({total / count:.0f} bytes/triangle)")
+        lines.append(f"  triangle objects (estimate) {objects_total / 2**20:.2f} MB  ({per_object} bytes/triangle), "
+                     f"{objects_total / total:.1f}x more")
+        return "\n".join(lines)
 
     def __repr__(self):
-        return f"mesh('{self.model_path}', triangles={len(self.triangles)})"
+        return f"mesh('{self.model_path}', triangles={self.triangle_count()})"
+
+
+class mesh_bvh(flat_bvh):
+    """flat_bvh whose leaves are ranges of a mesh's packed triangle rows."""
+
+    def __init__(self):
+        super().__init__()
+        self.mesh = None
+
+    def hit_leaf(self, r: ray, first: int, n: int, t_min: float, closest: float, rec: hit_record) -> bool:
+        return self.mesh.hit_triangles(r, first, n, t_min, closest, rec)
+
+    def occluded_leaf(self, r: ray, first: int, n: int, t_min: float, t_max: float) -> bool:
+        return self.mesh.occluded_triangles(r, first, n, t_min, t_max)
+
+
+def _deep_sizeof(obj, skip=None) -> int:
+    """Approximate size of obj and everything it references (except skip)."""
+    total = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if o is None or o is skip or id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__'):
+            stack.append(vars(o))
+        for slot in getattr(type(o), '__slots__', ()):
+            stack.append(getattr(o, slot, None))
+    return total
@@ -0,0 +1,93 @@
+"""
+Binary cache for processed mesh data.
+
+A cache file holds named NumPy arrays plus a small JSON header:
+
+    magic       8 bytes   b"RTMESH01"
+    header_len  8 bytes   little-endian uint64
+    header      JSON      {"meta": {...}, "arrays": {name: {dtype, shape, offset}}}
+    arrays      raw data, each starting on a 64-byte boundary
+
+read_cache memory-maps the file and returns zero-copy array views into the
+mapping, so loading does not read the data up front or duplicate it in RAM.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+import numpy as np
+
+CACHE_MAGIC = b"RTMESH01"
+CACHE_VERSION = 3
+_ALIGN = 64
+
+
+def cache_key(obj_file: str, settings: dict) -> str:
+    """Hash of the OBJ file contents and the settings that affect the processed data."""
+    digest = hashlib.sha256()
+    with open(obj_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(json.dumps({"version": CACHE_VERSION, **settings}, sort_keys=True).encode())
+    return digest.hexdigest()[:32]
+
+
+def write_cache(path: Path, arrays: dict[str, np.ndarray], meta: dict):
+    """Write arrays to path atomically (write to a temporary file, then rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Lay out the arrays first so the header can record their offsets
+    entries = {}
+    offset = 0
+    for name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        arrays[name] = values
+        entries[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+        offset += (values.nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+
+    header = json.dumps({"meta": meta, "arrays": entries}).encode()
+    data_start = (16 + len(header) + _ALIGN - 1) // _ALIGN * _ALIGN
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(data_start + entries[name]["offset"])
+            f.write(values.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_cache(path: Path, required_arrays: tuple[str, ...] = (), required_meta: tuple[str, ...] = ()) -> tuple[dict[str, np.ndarray], dict]:
+    """
+    Memory-map a cache file. Returns (arrays, meta), or raises ValueError if it
+    is not a valid cache or lacks any of the required array names or meta fields.
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapping[:8] != CACHE_MAGIC:
+        raise ValueError(f"Not a mesh cache file: {path}")
+    header_len = int.from_bytes(mapping[8:16], 'little')
+    header = json.loads(mapping[16:16 + header_len])
+    data_start = (16 + header_len + _ALIGN - 1) // _ALIGN * _ALIGN
+
+    if not isinstance(header, dict) or not isinstance(header.get("arrays"), dict) or not isinstance(header.get("meta"), dict):
+        raise ValueError(f"Malformed mesh cache header: {path}")
+    missing = [name for name in required_arrays if name not in header["arrays"]] \
+              + [name for name in required_meta if name not in header["meta"]]
+    if missing:
+        raise ValueError(f"Mesh cache {path} is missing {', '.join(missing)}")
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count,
+                                     offset=data_start + entry["offset"]).reshape(entry["shape"])
+    return arrays, header["meta"]
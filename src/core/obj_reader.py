@@ -0,0 +1,164 @@
+"""
+Streaming Wavefront OBJ reader.
+
+Reads vertex positions ("v" lines) and faces ("f" lines) straight into NumPy
+arrays, a chunk of lines at a time, without building Python objects per
+number. Everything else (normals, texture coordinates, groups, materials) is
+skipped. Polygons are fan-triangulated and negative (relative) indices are
+resolved against the vertices defined before the face.
+
+The input can be a file path, read sequentially, or any bytes-like object
+such as an mmap of the file. Either way only one chunk of text is parsed at a
+time, so peak memory stays close to the size of the output arrays.
+"""
+
+import mmap
+import re
+from pathlib import Path
+from typing import Union
+import numpy as np
+
+_VERTEX_LINE = re.compile(rb'^v[ \t]+([^\r\n]*)', re.M)
+_FACE_LINE = re.compile(rb'^f[ \t]+([^\r\n]*)', re.M)
+_VERTEX_OR_FACE = re.compile(rb'^([vf])[ \t]', re.M)
+_INDEX_SUFFIX = re.compile(rb'/\S*')  # texture/normal parts of "v/vt/vn"
+
+
+def read_obj(source: Union[str, Path, bytes, mmap.mmap, memoryview], chunk_size: int = 1 << 18) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse an OBJ file (path) or OBJ data (bytes-like).
+    Returns vertices (V, 3) float64 and triangle faces (F, 3) int32 (0-based).
+    Raises ValueError for malformed v/f lines or out-of-range indices.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            return _parse_chunks(_file_chunks(f, chunk_size))
+    return _parse_chunks(_buffer_chunks(source, chunk_size))
+
+
+def _file_chunks(f, chunk_size: int):
+    """Read f sequentially, yielding blocks of whole lines."""
+    carry = b''
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            if carry:
+                yield carry
+            return
+        block = carry + block
+        cut = block.rfind(b'\n')
+        if cut < 0:
+            carry = block
+            continue
+        carry = block[cut + 1:]
+        yield block[:cut + 1]
+
+
+def _buffer_chunks(data, chunk_size: int):
+    """Slice a bytes-like object (e.g. an mmap) into blocks of whole lines."""
+    start = 0
+    size = len(data)
+    while start < size:
+        # Grow the block if a single line is longer than chunk_size
+        length = chunk_size
+        while True:
+            chunk = bytes(data[start:start + length])
+            if start + length >= size:
+                break
+            cut = chunk.rfind(b'\n')
+            if cut >= 0:
+                chunk = chunk[:cut + 1]
+                break
+            length *= 2
+        start += len(chunk)
+        yield chunk
+
+
+def _parse_chunks(chunks) -> tuple[np.ndarray, np.ndarray]:
+    vertex_parts = []
+    face_parts = []
+    vertex_count = 0
+
+    for chunk in chunks:
+        vertices = _parse_vertices(chunk)
+        faces = _parse_faces(chunk, vertex_count)
+        vertex_count += len(vertices)
+        if len(vertices):
+            vertex_parts.append(vertices)
+        if len(faces):
+            face_parts.append(faces)
+
+    vertices = np.concatenate(vertex_parts) if vertex_parts else np.empty((0, 3))
+    faces = np.concatenate(face_parts) if face_parts else np.empty((0, 3), dtype=np.int32)
+    if len(faces) and (faces.min() < 0 or faces.max() >= len(vertices)):
+        raise ValueError("OBJ face index out of range")
+    return vertices, faces
+
+
+def _tokens_per_line(text: bytes) -> np.ndarray:
+    """Number of whitespace-separated tokens on each newline-separated line of text."""
+    b = np.frombuffer(text, dtype=np.uint8)
+    newline = b == 10
+    blank = newline | (b == 32) | (b == 9) | (b == 13)
+    starts = ~blank
+    starts[1:] &= blank[:-1]
+    line = np.cumsum(newline, dtype=np.int32)
+    return np.bincount(line[starts], minlength=int(line[-1]) + 1 if len(line) else 1)
+
+
+def _parse_numbers(text: bytes, dtype, expected: int) -> np.ndarray:
+    try:
+        values = np.fromstring(text, dtype=dtype, sep=' ')
+    except ValueError:
+        raise ValueError("Malformed OBJ line") from None
+    if len(values) != expected:
+        raise ValueError("Malformed OBJ line")
+    return values
+
+
+def _parse_vertices(chunk: bytes) -> np.ndarray:
+    lines = _VERTEX_LINE.findall(chunk)
+    if not lines:
+        return np.empty((0, 3))
+    text = b'\n'.join(lines)
+    counts = _tokens_per_line(text)
+    if counts.min() < 3:
+        raise ValueError("OBJ vertex with fewer than 3 coordinates")
+    values = _parse_numbers(text, np.float64, int(counts.sum()))
+    if counts.min() == 3 and counts.max() == 3:
+        return values.reshape(-1, 3)
+    # Extra components (w, or vertex colors): keep x, y, z
+    first = np.cumsum(counts) - counts
+    return values[first[:, None] + np.arange(3)]
+
+
+def _parse_faces(chunk: bytes, vertex_count: int) -> np.ndarray:
+    lines = _FACE_LINE.findall(chunk)
+    if not lines:
+        return np.empty((0, 3), dtype=np.int32)
+    text = _INDEX_SUFFIX.sub(b'', b'\n'.join(lines))
+    counts = _tokens_per_line(text)
+    if counts.min() < 3:
+        raise ValueError("OBJ face with fewer than 3 vertices")
+    index = _parse_numbers(text, np.int64, int(counts.sum()))
+
+    # OBJ indices are 1-based; negative ones count back from the last vertex so far
+    if (index < 0).any():
+        index = np.where(index < 0, index + _vertices_before_faces(chunk, vertex_count).repeat(counts), index - 1)
+    else:
+        index -= 1
+
+    # Fan triangulation: polygon (a, b, c, d, ...) -> (a, b, c), (a, c, d), ...
+    first = np.cumsum(counts) - counts
+    triangles = counts - 2
+    fan_first = first.repeat(triangles)
+    fan_step = np.arange(len(fan_first)) - (np.cumsum(triangles) - triangles).repeat(triangles) + 1
+    faces = np.stack([index[fan_first], index[fan_first + fan_step], index[fan_first + fan_step + 1]], axis=1)
+    return faces.astype(np.int32)
+
+
+def _vertices_before_faces(chunk: bytes, vertex_count: int) -> np.ndarray:
+    """Number of vertices defined before each face line of the chunk."""
+    kinds = np.frombuffer(b''.join(_VERTEX_OR_FACE.findall(chunk)), dtype=np.uint8)
+    is_vertex = kinds == ord('v')
+    return (vertex_count + np.cumsum(is_vertex))[~is_vertex]
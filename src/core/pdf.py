@@ -0,0 +1,121 @@
+"""
+Direction probability densities for importance sampling.
+
+Usage:
+    from core.pdf import cosine_pdf, hittable_pdf, mixture_pdf
+
+    surface = cosine_pdf(rec.normal)
+    lights = hittable_pdf(find_lights(world), rec.p)
+    p = mixture_pdf(lights, surface)
+    direction = p.generate()
+    density = p.value(direction)
+
+value(direction) is the solid-angle density with which generate() returns
+direction. Directions need not be unit length. sample(u, v) is generate()
+driven by a point of the unit square instead of random numbers, for
+low-discrepancy samplers (core/sampler.py).
+"""
+
+from abc import ABC, abstractmethod
+from math import cos, pi, sin, sqrt
+from util.rng import random
+from typing import Sequence
+from util import onb, point3, random_cosine_direction, random_unit_vector, vec3
+from .hittable import hittable
+
+
+class pdf(ABC):
+
+    __slots__ = ()
+
+    @abstractmethod
+    def value(self, direction: vec3) -> float:
+        pass
+
+    @abstractmethod
+    def generate(self) -> vec3:
+        pass
+
+    def sample(self, u: float, v: float) -> vec3:
+        """generate() for the point (u, v) in [0, 1)^2; distributions that cannot use it ignore it."""
+        return self.generate()
+
+
+class sphere_pdf(pdf):
+    """Uniform over all directions."""
+
+    def value(self, direction: vec3) -> float:
+        return 1 / (4 * pi)
+
+    def generate(self) -> vec3:
+        return random_unit_vector()
+
+    def sample(self, u: float, v: float) -> vec3:
+        z = 1.0 - 2.0 * u
+        r = sqrt(1.0 - z * z)
+        phi = 2.0 * pi * v
+        return vec3(r * cos(phi), r * sin(phi), z)
+
+
+class cosine_pdf(pdf):
+    """cos(theta) / pi about a unit vector w (the Lambertian distribution)."""
+
+    __slots__ = ('w', 'basis')
+
+    def __init__(self, w: vec3):
+        self.w = w
+        self.basis = onb(w)
+
+    def value(self, direction: vec3) -> float:
+        cosine_theta = self.w.dot(direction) / direction.length()
+        return cosine_theta / pi if cosine_theta > 0 else 0.0
+
+    def generate(self) -> vec3:
+        return self.basis.transform_xyz(*random_cosine_direction())
+
+    def sample(self, u: float, v: float) -> vec3:
+        phi = 2.0 * pi * u
+        s = sqrt(v)
+        return self.basis.transform_xyz(s * cos(phi), s * sin(phi), sqrt(1.0 - v))
+
+
+class hittable_pdf(pdf):
+    """Directions from origin towards the given objects, each picked with equal probability."""
+
+    def __init__(self, objects: Sequence[hittable], origin: point3):
+        self.objects = objects
+        self.origin = origin
+
+    def value(self, direction: vec3) -> float:
+        total = 0.0
+        for obj in self.objects:
+            total += obj.pdf_value(self.origin, direction)
+        return total / len(self.objects)
+
+    def generate(self) -> vec3:
+        objects = self.objects
+        return objects[int(random() * len(objects))].random(self.origin)
+
+
+class mixture_pdf(pdf):
+    """Picks p0 with probability weight and p1 otherwise."""
+
+    def __init__(self, p0: pdf, p1: pdf, weight: float = 0.5):
+        self.p0 = p0
+        self.p1 = p1
+        self.weight = weight
+
+    def value(self, direction: vec3) -> float:
+        return self.weight * self.p0.value(direction) + (1 - self.weight) * self.p1.value(direction)
+
+    def generate(self) -> vec3:
+        if random() < self.weight:
+            return self.p0.generate()
+        return self.p1.generate()
+
+    def sample(self, u: float, v: float) -> vec3:
+        # u picks the component and, rescaled, is reused inside it
+        weight = self.weight
+        if u < weight:
+            return self.p0.sample(u / weight, v)
+        return self.p1.sample((u - weight) / (1.0 - weight), v)
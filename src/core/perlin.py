@@ -1,20 +1,39 @@
 import math
-from random import *
+from random import Random
+from typing import Optional
 from util.vec3 import vec3
-from util import point3
+from util import point3, vec3_array
+from util.rng import generator
 
 class perlin:
     point_count = 256
-    def __init__(self):
-        self.randvec = [vec3.random(-1, 1) for _ in range(self.point_count)]
+    def __init__(self, seed: Optional[int] = None):
+        # With a seed the tables come from their own generator and do not
+        # depend on earlier draws; without one, from util.rng's generator.
+        rng = Random(seed) if seed is not None else generator
+
+        # Gradients live in one packed buffer; noise reads them through _grad
+        self.randvec = vec3_array.from_vec3s(vec3(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1))
+                                             for _ in range(self.point_count))
+        self._grad = self.randvec.flat()
         
         self.perm_x = [0] * self.point_count
         self.perm_y = [0] * self.point_count
         self.perm_z = [0] * self.point_count
         
-        self._perlin_generate_perm(self.perm_x)
-        self._perlin_generate_perm(self.perm_y)
-        self._perlin_generate_perm(self.perm_z)
+        self._perlin_generate_perm(self.perm_x, rng)
+        self._perlin_generate_perm(self.perm_y, rng)
+        self._perlin_generate_perm(self.perm_z, rng)
+
+    def __getstate__(self):
+        # memoryviews cannot be pickled; _grad is rebuilt from randvec
+        state = self.__dict__.copy()
+        del state['_grad']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._grad = self.randvec.flat()
 
     def noise(self, p: point3) -> float:
         u = p.x - math.floor(p.x)
@@ -25,52 +44,39 @@ class perlin:
         j = int(math.floor(p.y))
         k = int(math.floor(p.z))
 
-        c = [
-            [[vec3(0, 0, 0), vec3(0, 0, 0)], [vec3(0, 0, 0), vec3(0, 0, 0)]],
-            [[vec3(0, 0, 0), vec3(0, 0, 0)], [vec3(0, 0, 0), vec3(0, 0, 0)]]
-        ]
+        # Trilinear blend of the eight corner gradients (Hermite smoothed),
+        # reading gradient components straight from the packed buffer.
+        uu = u * u * (3 - 2 * u)
+        vv = v * v * (3 - 2 * v)
+        ww = w * w * (3 - 2 * w)
+        g = self._grad
+        accum = 0.0
 
         for di in range(2):
+            px = self.perm_x[(i + di) & 255]
             for dj in range(2):
+                pxy = px ^ self.perm_y[(j + dj) & 255]
                 for dk in range(2):
-                    c[di][dj][dk] = self.randvec[
-                        self.perm_x[(i + di) & 255] ^
-                        self.perm_y[(j + dj) & 255] ^
-                        self.perm_z[(k + dk) & 255]
-                    ]
-
-        return self._perlin_interp(c, u, v, w)
+                    b = 3 * (pxy ^ self.perm_z[(k + dk) & 255])
+                    accum +=  (di*uu + (1-di)*(1-uu)) \
+                            * (dj*vv + (1-dj)*(1-vv)) \
+                            * (dk*ww + (1-dk)*(1-ww)) \
+                            * (g[b] * (u - di) + g[b + 1] * (v - dj) + g[b + 2] * (w - dk))
+        return accum
 
     @staticmethod
-    def _perlin_generate_perm(p: list[int]) -> None:
+    def _perlin_generate_perm(p: list[int], rng: Random) -> None:
         for i in range(perlin.point_count):
             p[i] = i
         
-        perlin._permute(p, perlin.point_count)
+        perlin._permute(p, perlin.point_count, rng)
         
     @staticmethod
-    def _permute(p: list[int], n: int) -> None:
+    def _permute(p: list[int], n: int, rng: Random) -> None:
         for i in range(n-1, 0, -1):
-            target = randint(0, i)
+            target = rng.randint(0, i)
             p[i], p[target] = p[target], p[i]
       
-    @staticmethod
-    def _perlin_interp(c: list[list[list[vec3]]], u: float, v: float, w: float) -> float:
-        uu = u * u * (3 - 2 * u)
-        vv = v * v * (3 - 2 * v)
-        ww = w * w * (3 - 2 * w)      
-        accum = 0.0
-
-        for i in range(2):
-            for j in range(2):
-                for k in range(2):
-                    weight_v = vec3(u - i, v - j, w - k)
-                    accum +=  (i*uu + (1-i)*(1-uu)) \
-                            * (j*vv + (1-j)*(1-vv)) \
-                            * (k*ww + (1-k)*(1-ww)) \
-                            * c[i][j][k].dot(weight_v)
-        return accum
-    
     def turb(self, p: point3, depth: int = 7) -> float:
         accum = 0.0
         temp_p = p.copy()
@@ -1,4 +1,5 @@
-
+import math
+from util.rng import random as random_double
 from util import ray
 from .hittable import hittable, hit_record
 from util import *
@@ -16,6 +17,7 @@ class quad(hittable):
         self.mat = mat
 
         n = vec3.cross(u, v)
+        self.area = n.length()
         self.normal = n.unit_vector()
         self.D = vec3.dot(self.normal, Q)
         self.w = n / vec3.dot(n, n)
@@ -31,14 +33,14 @@ class quad(hittable):
     def bounding_box(self):
         return self.bbox
     
-    def hit(self, r: ray, ray_t: interval, rec: hit_record) -> bool:
+    def hit_range(self, r: ray, t_min: float, t_max: float, rec: hit_record) -> bool:
         denom = vec3.dot(self.normal, r.direction)
         
         if abs(denom) < 1e-8:
             return False  # Ray is parallel to the quad
         
         t = (self.D - vec3.dot(self.normal, r.origin)) / denom
-        if not ray_t.contains(t):
+        if not t_min <= t <= t_max:
             return False
         
         # Determine if the hit point lies within the planar shape using its plane coordinates.
@@ -50,18 +52,54 @@ class quad(hittable):
         if not self.is_interior(alpha, beta, rec):
             return False
         
-        # Ray hits the 2D shape; set the rest of the hit record and return true.
+        # Ray hits the 2D shape; the normal and material are set by finalize.
         rec.t = t
         rec.p = intersection
+        rec.obj = self
+        return True
+
+    def occluded(self, r: ray, t_min: float, t_max: float) -> bool:
+        denom = vec3.dot(self.normal, r.direction)
+        if abs(denom) < 1e-8:
+            return False
+
+        t = (self.D - vec3.dot(self.normal, r.origin)) / denom
+        if not t_min <= t <= t_max:
+            return False
+
+        # Same interior test as is_interior, without touching a record
+        planar_hitpt_vector = vec3.at(r.origin, r.direction, t)
+        planar_hitpt_vector -= self.Q
+        alpha = vec3.dot(self.w, vec3.cross(planar_hitpt_vector, self.v))
+        if not 0.0 <= alpha <= 1.0:
+            return False
+        beta = vec3.dot(self.w, vec3.cross(self.u, planar_hitpt_vector))
+        return 0.0 <= beta <= 1.0
+
+    def finalize(self, r: ray, rec: hit_record):
         rec.set_face_normal(r, self.normal)
         rec.material = self.mat
 
-        return True
+    def pdf_value(self, origin: point3, direction: vec3) -> float:
+        rec = hit_record()
+        if not self.hit_range(Ray(origin, direction), 0.001, math.inf, rec):
+            return 0.0
+
+        # Area density 1/area converted to solid angle at origin
+        distance_squared = rec.t * rec.t * direction.length_squared()
+        cosine = abs(vec3.dot(direction, self.normal)) / direction.length()
+        return distance_squared / (cosine * self.area)
+
+    def random(self, origin: point3) -> vec3:
+        return self.sample(origin, random_double(), random_double())
+
+    def sample(self, origin: point3, u: float, v: float) -> vec3:
+        p = self.Q.mul_add(self.u, u).mul_add(self.v, v)
+        p -= origin
+        return p
     
     def is_interior(self, a: float, b: float, rec: hit_record) -> bool:
-        unit_interval = interval.from_floats(0.0, 1.0)
-
-        if not unit_interval.contains(a) or not unit_interval.contains(b):
+        if not 0.0 <= a <= 1.0 or not 0.0 <= b <= 1.0:
             return False
         
         rec.u = a
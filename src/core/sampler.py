@@ -0,0 +1,330 @@
+"""
+Sample points for the camera (camera.sampler).
+
+Usage:
+    from core.sampler import sobol_sampler
+
+    s = sobol_sampler(samples_per_pixel=16, seed=0)
+    s.start_pixel_sample(w, h, index)
+    dx, dy = s.get_2d()     # pixel offset
+    lens_u, lens_v = s.get_2d()
+    time = s.get_1d()
+    u, v = s.get_2d()       # first bounce direction, and so on
+
+Each sample of a pixel asks for its dimensions in the same order. A
+low-discrepancy sampler spreads sample index 0, 1, 2, ... of a pixel evenly
+over every dimension (or pair of dimensions), so a pixel's samples cover the
+pixel area, the lens and the first bounce directions better than independent
+random numbers do. All points are a function of (seed, pixel, sample index,
+dimension) alone and do not draw from util.rng.
+
+    stratified - one jittered stratum of samples_per_pixel per dimension
+                 (a square grid for pairs when samples_per_pixel is square,
+                 Latin hypercube otherwise), strata shuffled per pixel
+    halton     - Halton sequence in the first 32 prime bases with random
+                 digit permutations, randomly shifted per pixel; later
+                 dimensions fall back to random()
+    sobol      - Owen-scrambled, shuffled Sobol pairs (Burley 2020, "Practical
+                 Hash-based Owen Scrambling"); every pair of dimensions is
+                 well distributed, at any dimension
+"""
+
+from abc import ABC, abstractmethod
+from math import cos, isqrt, pi, sin, sqrt
+from util.rng import random
+
+_MASK32 = 0xFFFFFFFF
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _mix(v: int) -> int:
+    """64-bit finalizer (MurmurHash3 style)."""
+    v ^= v >> 31
+    v = (v * 0x7FB5D329728EA185) & _MASK64
+    v ^= v >> 27
+    v = (v * 0x81DADEF4BC2DD44D) & _MASK64
+    v ^= v >> 33
+    return v
+
+
+def _permute(i: int, n: int, p: int) -> int:
+    """
+    Element i of a pseudo-random permutation of range(n) selected by the
+    32-bit seed p (Kensler 2013, "Correlated Multi-Jittered Sampling").
+    """
+    if n == 1:
+        return 0
+    w = n - 1
+    w |= w >> 1
+    w |= w >> 2
+    w |= w >> 4
+    w |= w >> 8
+    w |= w >> 16
+    # Every step only carries bits upwards, so masking with w after each
+    # product leaves the result unchanged and keeps the ints small
+    while True:
+        i ^= p
+        i = (i * 0xE170893D) & w
+        i ^= p >> 16
+        i ^= (i & w) >> 4
+        i ^= p >> 8
+        i = (i * 0x0929EB3F) & w
+        i ^= p >> 23
+        i ^= (i & w) >> 1
+        i = (i * (1 | p >> 27)) & w
+        i = (i * 0x6935FA69) & w
+        i ^= (i & w) >> 11
+        i = (i * 0x74DCB303) & w
+        i ^= (i & w) >> 2
+        i = (i * 0x9E501CC3) & w
+        i ^= (i & w) >> 2
+        i = (i * 0xC860A3DF) & w
+        i &= w
+        i ^= i >> 5
+        if i < n:
+            return (i + p) % n
+
+
+def _unit(v: int) -> float:
+    """Top 53 bits of a 64-bit hash as a float in [0, 1)."""
+    return (v >> 11) * (1.0 / (1 << 53))
+
+
+def concentric_disk(u: float, v: float) -> tuple[float, float]:
+    """
+    Map the unit square onto the unit disk keeping areas and neighbourhoods
+    (Shirley and Chiu), so stratified points stay stratified on the lens.
+    """
+    x = 2.0 * u - 1.0
+    y = 2.0 * v - 1.0
+    if x == 0.0 and y == 0.0:
+        return 0.0, 0.0
+    if abs(x) > abs(y):
+        r = x
+        theta = (pi / 4) * (y / x)
+    else:
+        r = y
+        theta = (pi / 2) - (pi / 4) * (x / y)
+    return r * cos(theta), r * sin(theta)
+
+#----------------------------------------------------------------------------------------
+
+class sampler(ABC):
+    """
+    Sample points for one pixel sample at a time: start_pixel_sample selects
+    the pixel and sample index, then get_1d and get_2d return the next
+    dimensions in [0, 1). Subclasses implement _sample_1d and _sample_2d for
+    a given dimension; self._hash(dimension) is a 64-bit hash of the seed,
+    pixel and dimension, cached while the samples stay in one pixel.
+    """
+
+    __slots__ = ('samples_per_pixel', 'seed', '_pixel', '_hashes', '_index', '_dimension')
+
+    def __init__(self, samples_per_pixel: int, seed: int = 0):
+        self.samples_per_pixel = samples_per_pixel
+        self.seed = seed
+        self._pixel = None
+        self._hashes = []
+        self._index = 0
+        self._dimension = 0
+
+    def start_pixel_sample(self, w: int, h: int, index: int):
+        """Begin sample index (0, 1, ...) of pixel (w, h) at dimension 0."""
+        if self._pixel != (w, h):
+            self._pixel = (w, h)
+            self._hashes = [_mix(_mix((self.seed & _MASK64) ^ (w * 0x9E3779B97F4A7C15 & _MASK64)) ^ h)]
+        self._index = index
+        self._dimension = 0
+
+    def get_1d(self) -> float:
+        dimension = self._dimension
+        self._dimension = dimension + 1
+        return self._sample_1d(dimension)
+
+    def get_2d(self) -> tuple[float, float]:
+        dimension = self._dimension
+        self._dimension = dimension + 2
+        return self._sample_2d(dimension)
+
+    def _hash(self, dimension: int) -> int:
+        hashes = self._hashes
+        while len(hashes) <= dimension + 1:
+            hashes.append(_mix(hashes[0] ^ (len(hashes) * 0xBF58476D1CE4E5B9 & _MASK64)))
+        return hashes[dimension + 1]
+
+    @abstractmethod
+    def _sample_1d(self, dimension: int) -> float:
+        pass
+
+    @abstractmethod
+    def _sample_2d(self, dimension: int) -> tuple[float, float]:
+        pass
+
+
+class stratified_sampler(sampler):
+    """
+    Jittered strata: sample index i of a pixel falls in stratum perm(i) of
+    samples_per_pixel strata, with a different permutation per pixel and
+    dimension. Indices past samples_per_pixel (progressive and adaptive
+    rendering) start another round of strata.
+    """
+
+    __slots__ = ('_side',)
+
+    def __init__(self, samples_per_pixel: int, seed: int = 0):
+        super().__init__(samples_per_pixel, seed)
+        side = isqrt(samples_per_pixel)
+        self._side = side if side * side == samples_per_pixel else 0
+
+    def _sample_1d(self, dimension: int) -> float:
+        n = self.samples_per_pixel
+        rnd, i = divmod(self._index, n)
+        h = _mix(self._hash(dimension) ^ rnd)
+        stratum = _permute(i, n, h & _MASK32)
+        return (stratum + _unit(_mix(h ^ (i + 1)))) / n
+
+    def _sample_2d(self, dimension: int) -> tuple[float, float]:
+        n = self.samples_per_pixel
+        rnd, i = divmod(self._index, n)
+        h = _mix(self._hash(dimension) ^ rnd)
+        jitter = _mix(h ^ (i + 1))
+        jx = _unit(jitter)
+        jy = (jitter & 0x7FFFFFFF) * (1.0 / (1 << 31))
+        side = self._side
+        if side:
+            stratum = _permute(i, n, h & _MASK32)
+            return (stratum % side + jx) / side, (stratum // side + jy) / side
+        # Latin hypercube: each axis is stratified on its own
+        return (_permute(i, n, h & _MASK32) + jx) / n, (_permute(i, n, h >> 32) + jy) / n
+
+
+_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53,
+           59, 61, 67, 71, 73, 79, 83, 89, 97, 101, 103, 107, 109, 113, 127, 131)
+
+
+def _scrambled_radical_inverse(i: int, base: int, permutation: list[int]) -> float:
+    """
+    Digits of i in base, each replaced through permutation, mirrored about the
+    radix point. The infinitely many leading zeros of i become permutation[0]
+    each, a geometric series.
+    """
+    inverse_base = 1.0 / base
+    scale = inverse_base
+    value = 0.0
+    while i:
+        i, digit = divmod(i, base)
+        value += permutation[digit] * scale
+        scale *= inverse_base
+    return value + permutation[0] * scale / (1.0 - inverse_base)
+
+
+class halton_sampler(sampler):
+    """
+    Point index of the Halton sequence, dimension d in base _PRIMES[d]. The
+    digits of each dimension go through a random permutation (fixed per
+    seed), which breaks up the correlation between the larger bases over
+    short prefixes, and each pixel shifts each dimension by a random offset
+    modulo 1 (Cranley-Patterson rotation). Dimensions past the prime table
+    use random().
+    """
+
+    __slots__ = ('_permutations',)
+
+    def __init__(self, samples_per_pixel: int, seed: int = 0):
+        super().__init__(samples_per_pixel, seed)
+        self._permutations = []
+        for dimension, base in enumerate(_PRIMES):
+            p = _mix((seed & _MASK64) ^ (dimension + 1)) & _MASK32
+            self._permutations.append([_permute(digit, base, p) for digit in range(base)])
+
+    def _sample_1d(self, dimension: int) -> float:
+        if dimension >= len(_PRIMES):
+            return random()
+        value = (_scrambled_radical_inverse(self._index, _PRIMES[dimension], self._permutations[dimension])
+                 + _unit(self._hash(dimension)))
+        return value - 1.0 if value >= 1.0 else value
+
+    def _sample_2d(self, dimension: int) -> tuple[float, float]:
+        return self._sample_1d(dimension), self._sample_1d(dimension + 1)
+
+
+def _reverse_table() -> list[int]:
+    return [int(f"{b:08b}"[::-1], 2) for b in range(256)]
+
+_REVERSE8 = _reverse_table()
+
+
+def _reverse_bits(x: int) -> int:
+    r = _REVERSE8
+    return r[x & 255] << 24 | r[x >> 8 & 255] << 16 | r[x >> 16 & 255] << 8 | r[x >> 24]
+
+
+# Second Sobol dimension: direction numbers v[k] = v[k-1] ^ (v[k-1] >> 1),
+# v[0] = 2^31, tabulated per byte of the index. The tables hold the result
+# bit-reversed, the form the Owen scramble works on.
+def _sobol_tables() -> list[list[int]]:
+    directions = [0x80000000]
+    for _ in range(31):
+        directions.append(directions[-1] ^ (directions[-1] >> 1))
+    tables = []
+    for byte in range(4):
+        table = []
+        for b in range(256):
+            x = 0
+            for bit in range(8):
+                if b >> bit & 1:
+                    x ^= directions[8 * byte + bit]
+            table.append(_reverse_bits(x))
+        tables.append(table)
+    return tables
+
+_SOBOL1 = _sobol_tables()
+
+
+def _laine_karras(x: int, seed: int) -> int:
+    """Hash that only carries bits upwards: an Owen scramble of the reversed bits of x."""
+    x ^= (x * 0x3D20ADEA) & _MASK32
+    x = (x + seed) & _MASK32
+    x = (x * ((seed >> 16) | 1)) & _MASK32
+    x ^= (x * 0x05526C56) & _MASK32
+    x ^= (x * 0x53A22864) & _MASK32
+    return x
+
+
+def _owen_scramble(x: int, seed: int) -> int:
+    return _reverse_bits(_laine_karras(_reverse_bits(x), seed))
+
+
+class sobol_sampler(sampler):
+    """
+    Each pair of dimensions is the first two Sobol dimensions, Owen scrambled
+    with its own seed, at an index that is itself Owen scrambled (shuffled)
+    per pixel and dimension pair. Any power-of-two prefix of a pixel's
+    samples is a stratified (0, m, 2)-net in every such pair.
+    """
+
+    __slots__ = ()
+
+    def _sample_1d(self, dimension: int) -> float:
+        h = self._hash(dimension)
+        index = _owen_scramble(self._index & _MASK32, h & _MASK32)
+        # Sobol dimension 0 is the van der Corput sequence, the reversed
+        # index; scrambling it again is one more hash of the shuffled index
+        return _reverse_bits(_laine_karras(index, h >> 32)) * (1.0 / (1 << 32))
+
+    def _sample_2d(self, dimension: int) -> tuple[float, float]:
+        h = self._hash(dimension)
+        index = _owen_scramble(self._index & _MASK32, h & _MASK32)
+        t = _SOBOL1
+        y = t[0][index & 255] ^ t[1][index >> 8 & 255] ^ t[2][index >> 16 & 255] ^ t[3][index >> 24]
+        x = _reverse_bits(_laine_karras(index, h >> 32))
+        y = _reverse_bits(_laine_karras(y, self._hash(dimension + 1) & _MASK32))
+        return x * (1.0 / (1 << 32)), y * (1.0 / (1 << 32))
+
+
+# camera.sampler names; "random" (independent random numbers) needs no sampler
+SAMPLERS = {
+    "stratified": stratified_sampler,
+    "halton": halton_sampler,
+    "sobol": sobol_sampler,
+}
@@ -1,7 +1,8 @@
 import math
+from util.rng import random as random_double
 from .material import *
 from .aabb import aabb
-from util import point3, dot, Ray, vec3
+from util import point3, dot, Ray, vec3, onb, random_unit_vector
 from .hittable import hittable, hit_record
 from .interval import interval
 
@@ -31,12 +32,22 @@ class Sphere(hittable):
         instance.bbox = aabb.from_aabbs(box1, box2)
         return instance
 
-    def hit(self, r: Ray, ray_t: interval, rec: hit_record) -> bool:
-        current_center = self.center.at(r.time)
-        oc = current_center - r.origin
-        a = r.direction.length_squared()
-        h = dot(r.direction, oc)
-        c = oc.length_squared() - self.radius * self.radius
+    def hit_range(self, r: Ray, t_min: float, t_max: float, rec: hit_record) -> bool:
+        # oc = center(time) - origin, kept in scalars: the candidate test
+        # allocates no vectors.
+        center = self.center
+        c0 = center.origin
+        c1 = center.direction
+        o = r.origin
+        d = r.direction
+        time = r.time
+        ocx = c0.x + c1.x * time - o.x
+        ocy = c0.y + c1.y * time - o.y
+        ocz = c0.z + c1.z * time - o.z
+
+        a = d.length_squared()
+        h = d.x * ocx + d.y * ocy + d.z * ocz
+        c = ocx * ocx + ocy * ocy + ocz * ocz - self.radius * self.radius
 
         discriminant = h * h - a * c
         if discriminant < 0:
@@ -46,22 +57,86 @@ class Sphere(hittable):
 
         # Find the nearest root that lies in the acceptable range.
         root = (h - sqrtd) / a
-        if not ray_t.surrounds(root):
+        if not t_min < root < t_max:
             root = (h + sqrtd) / a
-            if not ray_t.surrounds(root):
+            if not t_min < root < t_max:
                 return False
 
         rec.t = root
+        rec.obj = self
+        return True
+
+    def occluded(self, r: Ray, t_min: float, t_max: float) -> bool:
+        center = self.center
+        c0 = center.origin
+        c1 = center.direction
+        o = r.origin
+        d = r.direction
+        time = r.time
+        ocx = c0.x + c1.x * time - o.x
+        ocy = c0.y + c1.y * time - o.y
+        ocz = c0.z + c1.z * time - o.z
+
+        a = d.length_squared()
+        h = d.x * ocx + d.y * ocy + d.z * ocz
+        c = ocx * ocx + ocy * ocy + ocz * ocz - self.radius * self.radius
+
+        discriminant = h * h - a * c
+        if discriminant < 0:
+            return False
+
+        # Either root in range blocks the ray
+        sqrtd = math.sqrt(discriminant)
+        return t_min < (h - sqrtd) / a < t_max or t_min < (h + sqrtd) / a < t_max
+
+    def finalize(self, r: Ray, rec: hit_record):
         rec.p = r.at(rec.t)
-        outward_normal = (rec.p - current_center) / self.radius
+        outward_normal = rec.p - self.center.at(r.time)
+        outward_normal /= self.radius
         rec.set_face_normal(r, outward_normal)
         rec.u, rec.v = Sphere.get_sphere_uv(outward_normal)
         rec.material = self.material
 
-        return True
-
     def bounding_box(self) -> aabb:
         return self.bbox
+
+    def is_moving(self) -> bool:
+        return self.center.direction.length_squared() > 0.0
+
+    # Light sampling picks directions uniformly inside the cone the sphere
+    # subtends at origin. pdf_value and sample take no ray time, so they only
+    # describe stationary spheres; find_lights skips moving ones.
+
+    def pdf_value(self, origin: point3, direction: vec3) -> float:
+        rec = hit_record()
+        if not self.hit_range(Ray(origin, direction), 0.001, math.inf, rec):
+            return 0.0
+
+        distance_squared = (self.center.origin - origin).length_squared()
+        if distance_squared <= self.radius * self.radius:
+            return 0.0  # origin inside the sphere: random() does not sample it either
+        cos_theta_max = math.sqrt(1 - self.radius * self.radius / distance_squared)
+        solid_angle = 2 * math.pi * (1 - cos_theta_max)
+        return 1 / solid_angle
+
+    def random(self, origin: point3) -> vec3:
+        direction = self.center.origin - origin
+        if direction.length_squared() <= self.radius * self.radius:
+            return random_unit_vector()
+        return self.sample(origin, random_double(), random_double())
+
+    def sample(self, origin: point3, u: float, v: float) -> vec3:
+        direction = self.center.origin - origin
+        distance_squared = direction.length_squared()
+        if distance_squared <= self.radius * self.radius:
+            return random_unit_vector()
+
+        z = 1 + v * (math.sqrt(1 - self.radius * self.radius / distance_squared) - 1)
+        phi = 2 * math.pi * u
+        sin_theta = math.sqrt(1 - z * z)
+
+        # Cone axis points at the center
+        return onb(direction.unit_vector()).transform_xyz(math.cos(phi) * sin_theta, math.sin(phi) * sin_theta, z)
     
     @staticmethod
     def get_sphere_uv(p: point3) -> tuple[float, float]:
@@ -1,5 +1,6 @@
 
 from abc import ABC, abstractmethod
+from typing import Optional
 import math
 from .interval import interval
 from util.rtw_image import rtw_image
@@ -82,8 +83,8 @@ class image_texture(texture):
 #----------------------------------------------------------------------------------
 
 class noise_texture(texture):
-    def __init__(self, scale: float = 1.0):
-        self.noise = perlin()
+    def __init__(self, scale: float = 1.0, seed: Optional[int] = None):
+        self.noise = perlin(seed)
         self.scale = scale
     
     def value(self, u: float, v: float, p: point3) -> color:
@@ -51,15 +51,15 @@ class triangle(hittable):
     def bounding_box(self):
         return self.bbox
 
-    def hit(self, r: ray, ray_t: interval, rec: hit_record) -> bool:
+    def hit_range(self, r: ray, t_min: float, t_max: float, rec: hit_record) -> bool:
         """
         Ray-triangle intersection using Moller-Trumbore algorithm.
         """
         epsilon = 1e-8
 
         # Compute determinant
-        h = vec3.cross(r.direction, self.edge2)
-        det = vec3.dot(self.edge1, h)
+        h = r.direction.cross(self.edge2)
+        det = self.edge1.dot(h)
 
         # Ray is parallel to triangle
         if abs(det) < epsilon:
@@ -67,34 +67,53 @@ class triangle(hittable):
 
         inv_det = 1.0 / det
 
-        # Compute u parameter
-        s = r.origin - self.v0
-        u = inv_det * vec3.dot(s, h)
+        # Compute u parameter (s = origin - v0 is only built if u passes)
+        u = inv_det * r.origin.sub_dot(self.v0, h)
 
         if u < 0.0 or u > 1.0:
             return False
 
         # Compute v parameter
-        q = vec3.cross(s, self.edge1)
-        v = inv_det * vec3.dot(r.direction, q)
+        q = (r.origin - self.v0).cross(self.edge1)
+        v = inv_det * r.direction.dot(q)
 
         if v < 0.0 or u + v > 1.0:
             return False
 
         # Compute t
-        t = inv_det * vec3.dot(self.edge2, q)
+        t = inv_det * self.edge2.dot(q)
 
-        if not ray_t.contains(t):
+        if not t_min <= t <= t_max:
             return False
 
-        # We have a valid intersection
+        # We have a valid intersection; barycentric coordinates become the
+        # texture coordinates.
         rec.t = t
-        rec.p = r.at(t)
-        rec.set_face_normal(r, self.normal)
-        rec.material = self.mat
-
-        # Set barycentric coordinates as texture coordinates
         rec.u = u
         rec.v = v
-
+        rec.obj = self
         return True
+
+    def occluded(self, r: ray, t_min: float, t_max: float) -> bool:
+        """Moller-Trumbore as in hit_range, without writing a record."""
+        h = r.direction.cross(self.edge2)
+        det = self.edge1.dot(h)
+        if abs(det) < 1e-8:
+            return False
+
+        inv_det = 1.0 / det
+        u = inv_det * r.origin.sub_dot(self.v0, h)
+        if u < 0.0 or u > 1.0:
+            return False
+
+        q = (r.origin - self.v0).cross(self.edge1)
+        v = inv_det * r.direction.dot(q)
+        if v < 0.0 or u + v > 1.0:
+            return False
+
+        return t_min <= inv_det * self.edge2.dot(q) <= t_max
+
+    def finalize(self, r: ray, rec: hit_record):
+        rec.p = r.at(rec.t)
+        rec.set_face_normal(r, self.normal)
+        rec.material = self.mat
@@ -0,0 +1,648 @@
+"""
+Wavefront path tracer built on NumPy.
+
+Instead of tracing one Ray at a time through camera.ray_color, the wavefront
+engine keeps a whole batch of paths in structure-of-arrays buffers and moves
+every bounce through four stages:
+
+    generate  -> camera rays for a slice of the (sample, pixel) space
+    intersect -> closest hit against all spheres, quads and triangles, through
+                 a BVH over every primitive in the scene
+    shade     -> emission, then material scatter for every hit
+    compact   -> drop terminated paths before the next bounce
+
+Supported primitives: Sphere (stationary and moving), quad, triangle (including
+the triangles of a mesh). Supported materials: lambertian, metal, dielectric,
+diffuse_light. Solid-color textures are evaluated as arrays; any other texture
+falls back to a per-hit call to texture.value.
+
+Select it with `cam.engine = "wavefront"` before calling cam.render.
+"""
+
+import sys
+import time
+import numpy as np
+
+from util import point3
+from .hittable_list import hittable_list
+from .bvh_node import bvh_node
+from .flat_bvh import flat_bvh
+from .sphere import Sphere
+from .quad import quad
+from .triangle import triangle
+from .mesh import mesh
+from .material import material, lambertian, metal, dielectric, diffuse_light
+from .texture import solid_color
+from .bvh_arrays import bvh_arrays, build_bvh_arrays, triangle_bounds
+
+# Material type codes
+MAT_LAMBERTIAN = 0
+MAT_METAL = 1
+MAT_DIELECTRIC = 2
+MAT_LIGHT = 3
+
+# Primitive kind codes
+KIND_NONE = -1
+KIND_SPHERE = 0
+KIND_QUAD = 1
+KIND_TRIANGLE = 2
+
+
+def _vec(v) -> tuple[float, float, float]:
+    return (v.x, v.y, v.z)
+
+
+def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum('...k,...k->...', a, b)
+
+
+def _normalize(a: np.ndarray) -> np.ndarray:
+    return a / np.linalg.norm(a, axis=-1, keepdims=True)
+
+
+# Hit distance kernels, inf for a miss. Ray and primitive arguments broadcast
+# against each other: (R, 1, 3) rays with (1, P, 3) primitives give an (R, P)
+# table, (K, 3) with (K, 3) tests K ray/primitive pairs.
+
+def _hit_spheres(origin, direction, ray_time, t_max, t_min, center, velocity, radius) -> np.ndarray:
+    center = center + ray_time[..., None] * velocity
+    oc = center - origin
+    a = _dot(direction, direction)
+    h = _dot(direction, oc)
+    c = _dot(oc, oc) - radius ** 2
+
+    discriminant = h * h - a * c
+    sqrtd = np.sqrt(np.maximum(discriminant, 0.0))
+
+    # Nearest root inside the open interval (t_min, t_max)
+    root = (h - sqrtd) / a
+    far = (h + sqrtd) / a
+    root = np.where((root > t_min) & (root < t_max), root, far)
+    valid = (discriminant >= 0) & (root > t_min) & (root < t_max)
+    return np.where(valid, root, np.inf)
+
+
+def _hit_quads(origin, direction, t_max, t_min, Q, u, v, w, normal, D) -> np.ndarray:
+    denom = _dot(direction, normal)
+    parallel = np.abs(denom) < 1e-8
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (D - _dot(origin, normal)) / denom
+
+    p = origin + t[..., None] * direction
+    planar = p - Q
+    alpha = _dot(w, np.cross(planar, v))
+    beta = _dot(w, np.cross(u, planar))
+
+    valid = ~parallel & (t >= t_min) & (t <= t_max) \
+            & (alpha >= 0) & (alpha <= 1) & (beta >= 0) & (beta <= 1)
+    return np.where(valid, t, np.inf)
+
+
+def _hit_triangles(origin, direction, t_max, t_min, v0, edge1, edge2) -> np.ndarray:
+    # Moller-Trumbore
+    h = np.cross(direction, edge2)
+    det = _dot(edge1, h)
+    parallel = np.abs(det) < 1e-8
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1.0 / det
+        s = origin - v0
+        u = inv_det * _dot(s, h)
+        q = np.cross(s, edge1)
+        v = inv_det * _dot(direction, q)
+        t = inv_det * _dot(edge2, q)
+
+    valid = ~parallel & (u >= 0) & (u <= 1) & (v >= 0) & (u + v <= 1) \
+            & (t >= t_min) & (t <= t_max)
+    return np.where(valid, t, np.inf)
+
+
+def _tree_depth(tree: bvh_arrays) -> int:
+    """Number of levels below the root; children always follow their parent in the node arrays."""
+    count = tree.count.tolist()
+    offset = tree.offset.tolist()
+    depth = [0] * len(count)
+    for i, c in enumerate(count):
+        if c == 0:
+            depth[i + 1] = depth[offset[i]] = depth[i] + 1
+    return max(depth)
+
+#----------------------------------------------------------------------------------
+
+class scene_arrays:
+    """
+    Flattened copy of a world: one array per primitive attribute plus a
+    material table indexed by material id.
+    """
+
+    def __init__(self, world):
+        self.materials = []
+        self._material_ids = {}
+
+        spheres, quads, triangles, meshes = [], [], [], []
+        self._collect(world, spheres, quads, triangles, meshes, set())
+
+        self.sphere_center = np.array([_vec(s.center.origin) for s in spheres], dtype=np.float64).reshape(-1, 3)
+        self.sphere_velocity = np.array([_vec(s.center.direction) for s in spheres], dtype=np.float64).reshape(-1, 3)
+        self.sphere_radius = np.array([s.radius for s in spheres], dtype=np.float64)
+        self.sphere_mat = np.array([self._material_id(s.material) for s in spheres], dtype=np.int64)
+
+        self.quad_Q = np.array([_vec(q.Q) for q in quads], dtype=np.float64).reshape(-1, 3)
+        self.quad_u = np.array([_vec(q.u) for q in quads], dtype=np.float64).reshape(-1, 3)
+        self.quad_v = np.array([_vec(q.v) for q in quads], dtype=np.float64).reshape(-1, 3)
+        self.quad_w = np.array([_vec(q.w) for q in quads], dtype=np.float64).reshape(-1, 3)
+        self.quad_normal = np.array([_vec(q.normal) for q in quads], dtype=np.float64).reshape(-1, 3)
+        self.quad_D = np.array([q.D for q in quads], dtype=np.float64)
+        self.quad_mat = np.array([self._material_id(q.mat) for q in quads], dtype=np.int64)
+
+        # Meshes already hold their triangles as arrays
+        self.tri_v0 = np.concatenate([np.array([_vec(t.v0) for t in triangles], dtype=np.float64).reshape(-1, 3)]
+                                     + [m.v0 for m in meshes])
+        self.tri_edge1 = np.concatenate([np.array([_vec(t.edge1) for t in triangles], dtype=np.float64).reshape(-1, 3)]
+                                        + [m.edge1 for m in meshes])
+        self.tri_edge2 = np.concatenate([np.array([_vec(t.edge2) for t in triangles], dtype=np.float64).reshape(-1, 3)]
+                                        + [m.edge2 for m in meshes])
+        self.tri_normal = np.concatenate([np.array([_vec(t.normal) for t in triangles], dtype=np.float64).reshape(-1, 3)]
+                                         + [m.normal for m in meshes])
+        self.tri_mat = np.concatenate([np.array([self._material_id(t.mat) for t in triangles], dtype=np.int64)]
+                                      + [np.full(m.triangle_count(), self._material_id(m.mat), dtype=np.int64) for m in meshes])
+
+        self._build_material_table()
+
+    def _collect(self, obj, spheres: list, quads: list, triangles: list, meshes: list, seen: set):
+        # bvh_node leaves may reference the same object twice
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+
+        if isinstance(obj, hittable_list):
+            for child in obj.objects:
+                self._collect(child, spheres, quads, triangles, meshes, seen)
+        elif isinstance(obj, bvh_node):
+            self._collect(obj.left, spheres, quads, triangles, meshes, seen)
+            self._collect(obj.right, spheres, quads, triangles, meshes, seen)
+        elif isinstance(obj, flat_bvh):
+            for child in obj.prims:
+                self._collect(child, spheres, quads, triangles, meshes, seen)
+        elif isinstance(obj, mesh):
+            meshes.append(obj)
+        elif isinstance(obj, Sphere):
+            spheres.append(obj)
+        elif isinstance(obj, quad):
+            quads.append(obj)
+        elif isinstance(obj, triangle):
+            triangles.append(obj)
+        else:
+            raise ValueError(f"wavefront engine does not support {type(obj).__name__}")
+
+    def _material_id(self, mat: material) -> int:
+        key = id(mat)
+        if key not in self._material_ids:
+            if not isinstance(mat, (lambertian, metal, dielectric, diffuse_light)):
+                raise ValueError(f"wavefront engine does not support material {type(mat).__name__}")
+            self._material_ids[key] = len(self.materials)
+            self.materials.append(mat)
+        return self._material_ids[key]
+
+    def _build_material_table(self):
+        count = len(self.materials)
+        self.mat_type = np.zeros(count, dtype=np.int64)
+        self.mat_color = np.zeros((count, 3), dtype=np.float64)  # albedo or emission for solid textures
+        self.mat_fuzz = np.zeros(count, dtype=np.float64)
+        self.mat_ir = np.ones(count, dtype=np.float64)
+        self.textured = {}  # material id -> texture that needs per-hit evaluation
+
+        for i, mat in enumerate(self.materials):
+            if isinstance(mat, lambertian):
+                self.mat_type[i] = MAT_LAMBERTIAN
+                self._set_texture(i, mat.tex)
+            elif isinstance(mat, metal):
+                self.mat_type[i] = MAT_METAL
+                self.mat_color[i] = _vec(mat.albedo)
+                self.mat_fuzz[i] = mat.fuzz
+            elif isinstance(mat, dielectric):
+                self.mat_type[i] = MAT_DIELECTRIC
+                self.mat_color[i] = (1.0, 1.0, 1.0)
+                self.mat_ir[i] = mat.ir
+            else:
+                self.mat_type[i] = MAT_LIGHT
+                self._set_texture(i, mat.tex)
+
+    def _set_texture(self, mat_id: int, tex):
+        if isinstance(tex, solid_color):
+            self.mat_color[mat_id] = _vec(tex.albedo)
+        else:
+            self.textured[mat_id] = tex
+
+    def primitive_count(self) -> int:
+        return len(self.sphere_radius) + len(self.quad_D) + len(self.tri_mat)
+
+    def primitive_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (N, 3) lo/hi bounds of every primitive, indexed spheres first, then
+        quads, then triangles. Moving spheres are bounded over time [0, 1].
+        """
+        r = self.sphere_radius[:, None]
+        end = self.sphere_center + self.sphere_velocity
+        corners = np.stack([self.quad_Q, self.quad_Q + self.quad_u, self.quad_Q + self.quad_v,
+                            self.quad_Q + self.quad_u + self.quad_v])
+        tri_lo, tri_hi = triangle_bounds(self.tri_v0, self.tri_v0 + self.tri_edge1, self.tri_v0 + self.tri_edge2)
+
+        lo = np.concatenate([np.minimum(self.sphere_center, end) - r, corners.min(axis=0), tri_lo])
+        hi = np.concatenate([np.maximum(self.sphere_center, end) + r, corners.max(axis=0), tri_hi])
+        # Pad flat quads like aabb._pad_to_minimums
+        thin = (hi - lo) < 0.0001
+        return np.where(thin, lo - 0.00005, lo), np.where(thin, hi + 0.00005, hi)
+
+#----------------------------------------------------------------------------------
+
+class ray_batch:
+    """Structure-of-arrays state for a batch of in-flight paths."""
+
+    def __init__(self, origin: np.ndarray, direction: np.ndarray, time: np.ndarray, pixel: np.ndarray):
+        self.origin = origin
+        self.direction = direction
+        self.time = time
+        self.pixel = pixel
+        self.throughput = np.ones_like(origin)
+
+        # Hit data, filled by the intersect stage
+        self.t = None
+        self.kind = None
+        self.prim = None
+
+    def size(self) -> int:
+        return len(self.pixel)
+
+    def compact(self, keep: np.ndarray) -> "ray_batch":
+        """Return a new batch holding only the paths where keep is True."""
+        batch = ray_batch.__new__(ray_batch)
+        for name in ('origin', 'direction', 'time', 'pixel', 'throughput', 't', 'kind', 'prim'):
+            values = getattr(self, name)
+            setattr(batch, name, None if values is None else values[keep])
+        return batch
+
+#----------------------------------------------------------------------------------
+
+class wavefront_renderer:
+    # Number of paths in flight per batch
+    batch_size = 1 << 16
+    # Upper bound on ray x primitive entries evaluated per intersection chunk
+    chunk_budget = 1 << 21
+
+    t_min = 0.001
+
+    # Scenes with more primitives than this are intersected through a BVH over
+    # all primitives; smaller ones test every ray against every primitive
+    bvh_min_primitives = 32
+    bvh_strategy = "lbvh"
+    bvh_leaf_size = 4
+
+    def __init__(self, cam, world):
+        self.cam = cam
+        self.scene = scene_arrays(world)
+        self.tree = None
+        if self.scene.primitive_count() > self.bvh_min_primitives:
+            scene = self.scene
+            self.tree = build_bvh_arrays(*scene.primitive_bounds(), self.bvh_strategy, self.bvh_leaf_size)
+            self.stack_size = _tree_depth(self.tree) + 2
+            self.kind_start = np.array([0, len(scene.sphere_radius), len(scene.sphere_radius) + len(scene.quad_D)])
+        self.rng = np.random.default_rng(cam.seed)
+        self.rays_traced = 0
+
+        self.pixel00_loc = np.array(_vec(cam.pixel00_loc))
+        self.delta_u = np.array(_vec(cam.delta_u))
+        self.delta_v = np.array(_vec(cam.delta_v))
+        self.center = np.array(_vec(cam.center))
+        self.defocus_disk_u = np.array(_vec(cam.defocus_disk_u))
+        self.defocus_disk_v = np.array(_vec(cam.defocus_disk_v))
+        self.background = np.array(_vec(cam.background))
+
+    def render(self) -> np.ndarray:
+        """Render the full image and return it as a (height, width, 3) array of linear colors."""
+        cam = self.cam
+        n_pixels = cam.img_width * cam.img_height
+        total = n_pixels * cam.samples_per_pixel
+        accum = np.zeros((n_pixels, 3), dtype=np.float64)
+
+        start_time = time.time()
+        for start in range(0, total, self.batch_size):
+            # Sample-major order: every batch covers whole rows of the frame
+            pixel = np.arange(start, min(start + self.batch_size, total)) % n_pixels
+            self._trace(self._generate(pixel), accum)
+
+            sys.stderr.write(f"\rWavefront: {min(start + self.batch_size, total)}/{total} samples  ")
+            sys.stderr.flush()
+
+        elapsed = max(time.time() - start_time, 1e-9)
+        sys.stderr.write("\r" + " " * 100 + "\r")
+        print(f"Wavefront: {self.rays_traced} rays in {elapsed:.2f}s ({self.rays_traced / elapsed:,.0f} rays/s)", file=sys.stderr)
+
+        return (accum * cam.pixel_samples_scale).reshape(cam.img_height, cam.img_width, 3)
+
+    #------------------------------------------------------------------------
+    # Stage 1: generate
+
+    def _generate(self, pixel: np.ndarray) -> ray_batch:
+        cam = self.cam
+        n = len(pixel)
+        w = (pixel % cam.img_width).astype(np.float64)
+        h = (pixel // cam.img_width).astype(np.float64)
+
+        offset = self.rng.random((n, 2)) - 0.5
+        psample = self.pixel00_loc \
+                    + (w + offset[:, 0])[:, None] * self.delta_u \
+                    + (h + offset[:, 1])[:, None] * self.delta_v
+
+        if cam.defocus_angle <= 0.0:
+            origin = np.broadcast_to(self.center, (n, 3)).copy()
+        else:
+            disk = self._random_in_unit_disk(n)
+            origin = self.center + disk[:, :1] * self.defocus_disk_u + disk[:, 1:] * self.defocus_disk_v
+
+        return ray_batch(origin, psample - origin, self.rng.random(n), pixel)
+
+    #------------------------------------------------------------------------
+    # Stage 2: intersect
+
+    def _intersect(self, batch: ray_batch):
+        n = batch.size()
+        batch.t = np.full(n, np.inf)
+        batch.kind = np.full(n, KIND_NONE, dtype=np.int64)
+        batch.prim = np.zeros(n, dtype=np.int64)
+        self.rays_traced += n
+
+        if self.tree is None:
+            self._intersect_all(batch)
+        else:
+            self._intersect_bvh(batch)
+
+    def _intersect_all(self, batch: ray_batch):
+        """Brute force: every ray against every primitive, in chunks of at most chunk_budget pairs."""
+        n = batch.size()
+        scene = self.scene
+        for kind, count in ((KIND_SPHERE, len(scene.sphere_radius)),
+                            (KIND_QUAD, len(scene.quad_D)),
+                            (KIND_TRIANGLE, len(scene.tri_mat))):
+            if count == 0:
+                continue
+            chunk = max(1, self.chunk_budget // count)
+            for lo in range(0, n, chunk):
+                rows = slice(lo, min(lo + chunk, n))
+                t = self._hit_kind(kind, batch.origin[rows, None], batch.direction[rows, None],
+                                   batch.time[rows, None], batch.t[rows, None], None)
+                best = np.argmin(t, axis=1)
+                best_t = t[np.arange(len(best)), best]
+                closer = best_t < batch.t[rows]
+                batch.t[rows] = np.where(closer, best_t, batch.t[rows])
+                batch.kind[rows] = np.where(closer, kind, batch.kind[rows])
+                batch.prim[rows] = np.where(closer, best, batch.prim[rows])
+
+    def _intersect_bvh(self, batch: ray_batch):
+        """
+        Traverse the scene BVH with a stack per ray. Each step pops one node
+        for every ray that still has work, slab-tests all of them at once,
+        tests the primitives of the leaves that were hit, and pushes the
+        children of the interior nodes that were hit, near child on top.
+        """
+        tree = self.tree
+        n = batch.size()
+        direction = batch.direction
+        inv_dir = 1.0 / np.where(direction == 0.0, 1e-300, direction)
+        stack = np.zeros((n, self.stack_size), dtype=np.int64)
+        depth = np.ones(n, dtype=np.int64)
+        ray = np.arange(n)
+
+        while len(ray):
+            depth[ray] -= 1
+            node = stack[ray, depth[ray]]
+
+            bounds = tree.bounds[node]
+            origin = batch.origin[ray]
+            t0 = (bounds[:, 0::2] - origin) * inv_dir[ray]
+            t1 = (bounds[:, 1::2] - origin) * inv_dir[ray]
+            t_enter = np.maximum(np.minimum(t0, t1).max(axis=1), self.t_min)
+            t_exit = np.minimum(np.maximum(t0, t1).min(axis=1), batch.t[ray])
+            hit = t_enter <= t_exit
+
+            count = tree.count[node]
+            leaf = hit & (count > 0)
+            if leaf.any():
+                self._hit_leaves(batch, ray[leaf], node[leaf])
+
+            interior = hit & (count == 0)
+            if interior.any():
+                r = ray[interior]
+                parent = node[interior]
+                flip = direction[r, tree.axis[parent]] < 0.0
+                left = parent + 1
+                right = tree.offset[parent]
+                top = depth[r]
+                stack[r, top] = np.where(flip, left, right)
+                stack[r, top + 1] = np.where(flip, right, left)
+                depth[r] = top + 2
+
+            ray = ray[depth[ray] > 0]
+
+    def _hit_leaves(self, batch: ray_batch, ray: np.ndarray, node: np.ndarray):
+        """Test each ray against the primitives of its leaf and keep the closest hit."""
+        tree = self.tree
+        count = tree.count[node]
+        slots = np.arange(int(count.max()))
+        rows, cols = np.nonzero(slots[None, :] < count[:, None])
+        prim = tree.order[tree.offset[node][rows] + cols]
+        kind = np.searchsorted(self.kind_start, prim, side='right') - 1
+        local = prim - self.kind_start[kind]
+
+        pair_t = np.full(len(prim), np.inf)
+        pair_ray = ray[rows]
+        for k in (KIND_SPHERE, KIND_QUAD, KIND_TRIANGLE):
+            sel = np.nonzero(kind == k)[0]
+            if len(sel):
+                r = pair_ray[sel]
+                pair_t[sel] = self._hit_kind(k, batch.origin[r], batch.direction[r], batch.time[r], batch.t[r], local[sel])
+
+        t = np.full((len(ray), len(slots)), np.inf)
+        t[rows, cols] = pair_t
+        best = np.argmin(t, axis=1)
+        best_t = t[np.arange(len(ray)), best]
+        closer = best_t < batch.t[ray]
+        if not closer.any():
+            return
+
+        winner = np.zeros(t.shape, dtype=np.int64)
+        winner[rows, cols] = np.arange(len(prim))
+        pair = winner[closer, best[closer]]
+        r = ray[closer]
+        batch.t[r] = best_t[closer]
+        batch.kind[r] = kind[pair]
+        batch.prim[r] = local[pair]
+
+    def _hit_kind(self, kind: int, origin, direction, ray_time, t_max, prims) -> np.ndarray:
+        """
+        Hit distances (inf for a miss) against primitives of one kind. With
+        prims None the ray arrays carry an extra axis of length 1 and the result
+        is a (rays, primitives) table; otherwise prims pairs each ray with one
+        primitive index.
+        """
+        scene = self.scene
+        if kind == KIND_SPHERE:
+            return _hit_spheres(origin, direction, ray_time, t_max, self.t_min, scene.sphere_center[prims],
+                                scene.sphere_velocity[prims], scene.sphere_radius[prims])
+        if kind == KIND_QUAD:
+            return _hit_quads(origin, direction, t_max, self.t_min, scene.quad_Q[prims], scene.quad_u[prims],
+                              scene.quad_v[prims], scene.quad_w[prims], scene.quad_normal[prims], scene.quad_D[prims])
+        return _hit_triangles(origin, direction, t_max, self.t_min, scene.tri_v0[prims],
+                              scene.tri_edge1[prims], scene.tri_edge2[prims])
+
+    #------------------------------------------------------------------------
+    # Stage 3: shade
+
+    def _surface(self, batch: ray_batch):
+        """Compute hit point, outward normal, surface (u, v) and material id for every hit."""
+        scene = self.scene
+        n = batch.size()
+        p = batch.origin + batch.t[:, None] * batch.direction
+        outward = np.zeros((n, 3))
+        u = np.zeros(n)
+        v = np.zeros(n)
+        mat = np.zeros(n, dtype=np.int64)
+
+        sel = batch.kind == KIND_SPHERE
+        if sel.any():
+            idx = batch.prim[sel]
+            center = scene.sphere_center[idx] + batch.time[sel][:, None] * scene.sphere_velocity[idx]
+            normal = (p[sel] - center) / scene.sphere_radius[idx][:, None]
+            outward[sel] = normal
+            u[sel] = (np.arctan2(-normal[:, 2], normal[:, 0]) + np.pi) / (2 * np.pi)
+            v[sel] = np.arccos(np.clip(-normal[:, 1], -1.0, 1.0)) / np.pi
+            mat[sel] = scene.sphere_mat[idx]
+
+        sel = batch.kind == KIND_QUAD
+        if sel.any():
+            idx = batch.prim[sel]
+            planar = p[sel] - scene.quad_Q[idx]
+            outward[sel] = scene.quad_normal[idx]
+            u[sel] = _dot(scene.quad_w[idx], np.cross(planar, scene.quad_v[idx]))
+            v[sel] = _dot(scene.quad_w[idx], np.cross(scene.quad_u[idx], planar))
+            mat[sel] = scene.quad_mat[idx]
+
+        sel = batch.kind == KIND_TRIANGLE
+        if sel.any():
+            idx = batch.prim[sel]
+            d = batch.direction[sel]
+            h = np.cross(d, scene.tri_edge2[idx])
+            inv_det = 1.0 / _dot(scene.tri_edge1[idx], h)
+            s = batch.origin[sel] - scene.tri_v0[idx]
+            outward[sel] = scene.tri_normal[idx]
+            u[sel] = inv_det * _dot(s, h)
+            v[sel] = inv_det * _dot(d, np.cross(s, scene.tri_edge1[idx]))
+            mat[sel] = scene.tri_mat[idx]
+
+        return p, outward, u, v, mat
+
+    def _material_color(self, mat: np.ndarray, u: np.ndarray, v: np.ndarray, p: np.ndarray) -> np.ndarray:
+        """Albedo (or emission) for each hit; non-solid textures are evaluated per hit."""
+        values = self.scene.mat_color[mat]
+        for mat_id, tex in self.scene.textured.items():
+            sel = np.nonzero(mat == mat_id)[0]
+            for i in sel:
+                c = tex.value(u[i], v[i], point3(*p[i]))
+                values[i] = (c.x, c.y, c.z)
+        return values
+
+    def _shade(self, batch: ray_batch, accum: np.ndarray) -> np.ndarray:
+        """Deposit emission and scatter every path in place. Returns the mask of surviving paths."""
+        scene = self.scene
+        n = batch.size()
+        p, outward, u, v, mat = self._surface(batch)
+        mat_type = scene.mat_type[mat]
+
+        front_face = _dot(batch.direction, outward) < 0
+        normal = np.where(front_face[:, None], outward, -outward)
+        tex_color = self._material_color(mat, u, v, p)
+
+        # Emission: diffuse_light emits and absorbs
+        light = mat_type == MAT_LIGHT
+        if light.any():
+            self._deposit(accum, batch.pixel[light], batch.throughput[light] * tex_color[light])
+
+        direction = np.zeros((n, 3))
+
+        sel = mat_type == MAT_LAMBERTIAN
+        if sel.any():
+            d = normal[sel] + self._random_unit_vectors(sel.sum())
+            degenerate = np.all(np.abs(d) < 1e-8, axis=1)
+            d[degenerate] = normal[sel][degenerate]
+            direction[sel] = d
+
+        sel = mat_type == MAT_METAL
+        if sel.any():
+            d_in = batch.direction[sel]
+            n_sel = normal[sel]
+            reflected = d_in - 2 * _dot(d_in, n_sel)[:, None] * n_sel
+            direction[sel] = reflected + scene.mat_fuzz[mat[sel]][:, None] * self._random_unit_vectors(sel.sum())
+
+        sel = mat_type == MAT_DIELECTRIC
+        if sel.any():
+            direction[sel] = self._dielectric(batch.direction[sel], normal[sel], front_face[sel], scene.mat_ir[mat[sel]])
+
+        batch.throughput = batch.throughput * tex_color
+        batch.origin = p
+        batch.direction = direction
+        return ~light
+
+    def _dielectric(self, d_in: np.ndarray, normal: np.ndarray, front_face: np.ndarray, ir: np.ndarray) -> np.ndarray:
+        ratio = np.where(front_face, 1.0 / ir, ir)
+        unit = _normalize(d_in)
+        cos_theta = np.minimum(-_dot(unit, normal), 1.0)
+        sin_theta = np.sqrt(np.maximum(1.0 - cos_theta * cos_theta, 0.0))
+
+        r0 = ((1 - ratio) / (1 + ratio)) ** 2
+        reflectance = r0 + (1 - r0) * (1 - cos_theta) ** 5
+        reflect = (ratio * sin_theta > 1.0) | (reflectance > self.rng.random(len(ratio)))
+
+        reflected = unit - 2 * _dot(unit, normal)[:, None] * normal
+        r_out_perp = ratio[:, None] * (unit + cos_theta[:, None] * normal)
+        r_out_parallel = -np.sqrt(np.abs(1.0 - _dot(r_out_perp, r_out_perp)))[:, None] * normal
+        return np.where(reflect[:, None], reflected, r_out_perp + r_out_parallel)
+
+    #------------------------------------------------------------------------
+    # Main loop with stage 4: compact
+
+    def _trace(self, batch: ray_batch, accum: np.ndarray):
+        cam = self.cam
+        for bounce in range(1, cam.max_depth + 1):
+            if batch.size() == 0:
+                return
+            self._intersect(batch)
+
+            miss = batch.kind == KIND_NONE
+            if miss.any():
+                self._deposit(accum, batch.pixel[miss], batch.throughput[miss] * self.background)
+                batch = batch.compact(~miss)
+                if batch.size() == 0:
+                    return
+
+            alive = self._shade(batch, accum)
+            batch = batch.compact(alive)
+
+            # Russian roulette, as in camera.ray_color
+            if cam.roulette_depth is not None and cam.roulette_depth <= bounce < cam.max_depth and batch.size():
+                q = np.minimum(batch.throughput.max(axis=1), cam.roulette_max_survival)
+                survive = self.rng.random(batch.size()) < q
+                batch = batch.compact(survive)
+                batch.throughput /= q[survive][:, None]
+        # Paths still alive after max_depth contribute nothing
+
+    @staticmethod
+    def _deposit(accum: np.ndarray, pixel: np.ndarray, values: np.ndarray):
+        for c in range(3):
+            accum[:, c] += np.bincount(pixel, weights=values[:, c], minlength=len(accum))
+
+    def _random_unit_vectors(self, n: int) -> np.ndarray:
+        return _normalize(self.rng.standard_normal((n, 3)))
+
+    def _random_in_unit_disk(self, n: int) -> np.ndarray:
+        r = np.sqrt(self.rng.random(n))
+        phi = 2 * np.pi * self.rng.random(n)
+        return np.stack([r * np.cos(phi), r * np.sin(phi)], axis=1)
@@ -22,7 +22,7 @@ def vol1_sec9_5():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -84,7 +84,7 @@ def vol1_sec14_1():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -147,7 +147,7 @@ def vol2_sec2_6():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -240,7 +240,7 @@ def vol2_sec4_3_simple():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -272,7 +272,7 @@ def vol2_sec4_6():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -317,7 +317,7 @@ def vol2_sec4_6_ver2():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -401,7 +401,7 @@ def vol2_sec5():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -433,7 +433,7 @@ def emmission():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -473,7 +473,7 @@ def vol2_sec6():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -536,7 +536,7 @@ def triangles():
     # Create BVH
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -577,6 +577,7 @@ def test_mesh():
     load_time = time.time() - start_time
     print(f"✓ Loaded {silo.triangle_count()} triangles in {load_time:.2f}s")
     print(f"  Bounding box: {silo.bounding_box()}")
+    print(silo.memory_report())
 
     # Build scene
     world = hittable_list()
@@ -626,7 +627,7 @@ def simple_light():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -635,6 +636,7 @@ def simple_light():
     cam.samples_per_pixel = 10
     cam.max_depth = 5
     cam.background = color(0, 0, 0)
+    cam.sample_lights = True
 
     cam.vfov = 20
     cam.lookfrom = point3(26, 3, 6)
@@ -666,7 +668,7 @@ def cornell_box():
     # Create BVH and wrap it
     bvh = bvh_node.from_objects(world.objects, 0, len(world.objects))
     world = hittable_list()
-    world.add(bvh)
+    world.add(bvh.flatten())
 
     cam = camera()
 
@@ -674,6 +676,8 @@ def cornell_box():
     cam.img_width = 200
     cam.samples_per_pixel = 100
     cam.max_depth = 20
+    cam.roulette_depth = 3
+    cam.sample_lights = True
     cam.background = color(0, 0, 0)
 
     cam.vfov = 40
@@ -14,6 +14,14 @@ Examples:
     origin = point3(0, 0, 0)
     red = color(1, 0, 0)
     
+    # Many vectors in one packed NumPy buffer
+    points = vec3_array.from_vec3s([origin, direction])
+    lo, hi = points.min(), points.max()
+
+    # Sample directions around a surface normal
+    basis = onb(vec3(0, 0, 1))
+    direction = basis.transform_xyz(*random_cosine_direction())
+
     # All vec3 operations work on point3 and color
     offset = point3(1, 2, 3) + vec3(0, 1, 0)  # point3(1, 3, 3)
     blended = color(1, 0, 0).lerp(color(0, 0, 1), 0.5)  # purple
@@ -24,9 +32,11 @@ Examples:
     unit = normalize(vec3(3, 4, 0))  # vec3(0.6, 0.8, 0)
 """
 
-from .vec3 import vec3, dot, cross, length, normalize, distance, lerp, degrees_to_radians, random_unit_vector, random_on_hemisphere, reflect, refract, random_in_unit_disk
-from .color import color, write_color
+from .vec3 import vec3, dot, cross, length, normalize, distance, lerp, degrees_to_radians, random_unit_vector, random_on_hemisphere, random_cosine_direction, reflect, refract, random_in_unit_disk
+from .onb import onb
+from .color import color, write_color, write_image, to_rgb8, IMAGE_FORMATS
 from .ray import Ray
+from .vec3_array import vec3_array
 from .rtw_image import rtw_image
 
 # Type alias for semantic clarity
@@ -35,6 +45,8 @@ point3 = vec3  # 3D point in space
 __all__ = [
     # Core class
     'vec3',
+    'vec3_array',
+    'onb',
     'Ray',
     'rtw_image',
     # Type aliases
@@ -48,9 +60,13 @@ __all__ = [
     'distance',
     'lerp',
     'write_color',
+    'write_image',
+    'to_rgb8',
+    'IMAGE_FORMATS',
     'degrees_to_radians',
     'random_unit_vector',
     'random_on_hemisphere',
+    'random_cosine_direction',
     'reflect',
     'refract',
     'random_in_unit_disk',
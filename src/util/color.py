@@ -2,18 +2,26 @@
 Color utilities for ray tracing.
 
 Usage:
-    from util.color import color, write_color
-    
+    from util.color import color, write_color, write_image
+
     pixel = color(0.5, 0.7, 1.0)
     write_color(file, pixel)
+
+    # A whole (height, width, 3) array of linear colors in one write
+    write_image("image.png", image)
 """
 
 from .vec3 import vec3
 import math
+import os
+import numpy as np
 
 # Type alias for semantic clarity
 color = vec3
 
+# File extensions write_image understands
+IMAGE_FORMATS = ('.ppm', '.pfm', '.png')
+
 def linear_to_gamma(linear_component: float) -> float:
     
     if linear_component > 0:
@@ -29,8 +37,6 @@ def write_color(file, pixel_color: color) -> None:
         file: File object to write to
         pixel_color: RGB color with components in [0, 1]
     """
-    from core.interval import interval
-
     r = pixel_color.x
     g = pixel_color.y
     b = pixel_color.z
@@ -41,9 +47,50 @@ def write_color(file, pixel_color: color) -> None:
     b = linear_to_gamma(b)
 
     # Translate [0,1] component values to byte range [0,255]
-    intensity = interval.from_floats(0.0, 0.999)
-    rbyte = int(256 * intensity.clamp(r))
-    gbyte = int(256 * intensity.clamp(g))
-    bbyte = int(256 * intensity.clamp(b))
+    rbyte = int(256 * min(r, 0.999))
+    gbyte = int(256 * min(g, 0.999))
+    bbyte = int(256 * min(b, 0.999))
+
+    file.write(f"{rbyte} {gbyte} {bbyte}\n")
+
+def to_rgb8(image: np.ndarray) -> np.ndarray:
+    """
+    Display bytes for a (height, width, 3) array of linear colors: the same
+    gamma-2 transform and clamp as write_color, over the whole array at once.
+    NaN becomes black and +inf white, as in write_color, so a bad sample
+    cannot reach the uint8 cast.
+    """
+    gamma = np.nan_to_num(image, nan=0.0, posinf=1.0, neginf=0.0)
+    np.maximum(gamma, 0.0, out=gamma)
+    np.sqrt(gamma, out=gamma)
+    np.minimum(gamma, 0.999, out=gamma)
+    gamma *= 256
+    return gamma.astype(np.uint8)
+
+def write_image(path: str, image: np.ndarray) -> None:
+    """
+    Write a (height, width, 3) array of linear colors in one bulk write. The
+    format follows the extension: .ppm (binary P6), .pfm (linear float32,
+    no gamma or clamp) or .png. The file is replaced in one step, so viewers
+    never see a half-written image.
+    """
+    height, width, _ = image.shape
+    extension = os.path.splitext(path)[1].lower()
+    tmp_path = path + ".tmp"
+
+    if extension == ".ppm":
+        with open(tmp_path, 'wb') as f:
+            f.write(f"P6\n{width} {height}\n255\n".encode('ascii'))
+            f.write(to_rgb8(image).tobytes())
+    elif extension == ".pfm":
+        # Negative scale marks little-endian data; rows run bottom to top
+        with open(tmp_path, 'wb') as f:
+            f.write(f"PF\n{width} {height}\n-1.0\n".encode('ascii'))
+            f.write(np.ascontiguousarray(image[::-1], dtype='<f4').tobytes())
+    elif extension == ".png":
+        from PIL import Image
+        Image.fromarray(to_rgb8(image), 'RGB').save(tmp_path, format='PNG')
+    else:
+        raise ValueError(f"Unsupported image format '{extension}' (use {', '.join(IMAGE_FORMATS)})")
 
-    file.write(f"{rbyte} {gbyte} {bbyte}\n")
\ No newline at end of file
+    os.replace(tmp_path, path)
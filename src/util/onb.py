@@ -0,0 +1,49 @@
+import math
+from .vec3 import vec3
+
+class onb:
+    """
+    Orthonormal basis (u, v, w) around a unit vector w.
+
+    Usage:
+        basis = onb(rec.normal)
+        direction = basis.transform_xyz(*random_cosine_direction())
+
+    Built with the branchless construction of Duff et al. (2017), which needs
+    no cross product or square root. The axes are kept as plain floats, so
+    transform_xyz allocates only the vec3 it returns.
+    """
+
+    __slots__ = ('ux', 'uy', 'uz', 'vx', 'vy', 'vz', 'wx', 'wy', 'wz')
+
+    def __init__(self, w: vec3):
+        """w must have unit length."""
+        x, y, z = w.x, w.y, w.z
+        sign = math.copysign(1.0, z)
+        a = -1.0 / (sign + z)
+        b = x * y * a
+        self.ux, self.uy, self.uz = 1.0 + sign * x * x * a, sign * b, -sign * x
+        self.vx, self.vy, self.vz = b, sign + y * y * a, -y
+        self.wx, self.wy, self.wz = x, y, z
+
+    @property
+    def u(self) -> vec3:
+        return vec3(self.ux, self.uy, self.uz)
+
+    @property
+    def v(self) -> vec3:
+        return vec3(self.vx, self.vy, self.vz)
+
+    @property
+    def w(self) -> vec3:
+        return vec3(self.wx, self.wy, self.wz)
+
+    def transform_xyz(self, x: float, y: float, z: float) -> vec3:
+        """World vector for local coordinates (x, y, z): x*u + y*v + z*w."""
+        return vec3(x * self.ux + y * self.vx + z * self.wx,
+                    x * self.uy + y * self.vy + z * self.wy,
+                    x * self.uz + y * self.vz + z * self.wz)
+
+    def transform(self, a: vec3) -> vec3:
+        """World vector for a local vector a."""
+        return self.transform_xyz(a.x, a.y, a.z)
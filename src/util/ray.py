@@ -1,34 +1,48 @@
+import math
 from .vec3 import vec3
 
 class Ray:
-    def __init__(self, origin: vec3, direction: vec3, tm: float = 0.0):
-        self._origin = origin
-        self._dir = direction
-        self._time = tm
-
-    @property
-    def origin(self) -> vec3:
-        return self._origin
-    
-    @property
-    def time(self) -> float:
-        return self._time
+    # origin, direction and time are plain slots (no property indirection).
+    # inverse() caches 1/direction and the per-axis direction signs for slab
+    # tests. The cache remembers which direction object it was computed for,
+    # so assigning a new direction (r.direction = d) invalidates it. Treat
+    # the direction vector as immutable while it belongs to a ray: assign a
+    # new vector instead of modifying it in place.
 
-    @time.setter
-    def time(self, value: float):
-        self._time = value
+    __slots__ = ('origin', 'direction', 'time', '_inv', '_inv_for')
 
-    @origin.setter
-    def origin(self, value: vec3):
-        self._origin = value
+    def __init__(self, origin: vec3, direction: vec3, tm: float = 0.0):
+        self.origin = origin
+        self.direction = direction
+        self.time = tm
+        self._inv_for = None
 
-    @property
-    def direction(self) -> vec3:
-        return self._dir
+    def __getstate__(self):
+        return (self.origin, self.direction, self.time)
 
-    @direction.setter
-    def direction(self, value: vec3):
-        self._dir = value
+    def __setstate__(self, state):
+        self.origin, self.direction, self.time = state
+        self._inv_for = None
 
     def at(self, t: float) -> vec3:
-        return self.origin + t * self.direction
\ No newline at end of file
+        return vec3.at(self.origin, self.direction, t)
+
+    def inverse(self) -> tuple[float, float, float, int, int, int]:
+        """
+        (1/dx, 1/dy, 1/dz, sx, sy, sz) for the current direction, where s is 1
+        for a negative component and 0 otherwise. A zero component gives an
+        infinite inverse with the sign of the zero.
+        """
+        d = self.direction
+        if self._inv_for is not d:
+            x, y, z = d.x, d.y, d.z
+            self._inv = (
+                1.0 / x if x else math.copysign(math.inf, x),
+                1.0 / y if y else math.copysign(math.inf, y),
+                1.0 / z if z else math.copysign(math.inf, z),
+                int(math.copysign(1.0, x) < 0),
+                int(math.copysign(1.0, y) < 0),
+                int(math.copysign(1.0, z) < 0),
+            )
+            self._inv_for = d
+        return self._inv
@@ -0,0 +1,18 @@
+"""
+Generator for the random numbers drawn while rendering.
+
+Camera ray offsets, scatter directions, light choice, Russian roulette and
+the other per-sample decisions draw from this module's own random.Random
+instead of the global generator of the random module. The camera reseeds it
+for the samples it traces, so a render does not depend on other code that
+uses the random module, and rendering leaves that generator's state alone.
+Code that needs more than random() and seed() (perlin tables built without a
+seed) takes generator itself.
+"""
+
+from random import Random
+
+generator = Random()
+
+random = generator.random
+seed = generator.seed
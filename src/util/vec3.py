@@ -1,19 +1,34 @@
 import math
 from typing import Union
-import random
+from .rng import random as _random
 
 class vec3:
     """
     A 3D vector class with common vector operations.
     Supports addition, subtraction, scalar multiplication, dot product, cross product, and more.
+
+    The arithmetic operators take no type checks on the hot path; an operand
+    of the wrong type falls through to NotImplemented and Python raises the
+    usual TypeError. In-place operators (+=, -=, *=, /=) modify the vector,
+    so only use them on vectors the caller owns (not on a shared albedo or
+    ray origin). The fused helpers mul_add, sub_dot and at compute common
+    expressions without building intermediate vectors.
     """
-    
+
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
         """Initialize a 3D vector with x, y, z components."""
         self.x = float(x)
         self.y = float(y)
         self.z = float(z)
-    
+
+    def __getstate__(self):
+        return (self.x, self.y, self.z)
+
+    def __setstate__(self, state):
+        self.x, self.y, self.z = state
+
     def __repr__(self) -> str:
         """String representation of the vector."""
         return f"vec3({self.x}, {self.y}, {self.z})"
@@ -30,24 +45,26 @@ class vec3:
     
     def __add__(self, other: 'vec3') -> 'vec3':
         """Vector addition: self + other."""
-        if not isinstance(other, vec3):
-            raise TypeError("Can only add vec3 to vec3")
-        return vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+        try:
+            return vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+        except AttributeError:
+            return NotImplemented
     
     def __sub__(self, other: 'vec3') -> 'vec3':
         """Vector subtraction: self - other."""
-        if not isinstance(other, vec3):
-            raise TypeError("Can only subtract vec3 from vec3")
-        return vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+        try:
+            return vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+        except AttributeError:
+            return NotImplemented
     
     def __mul__(self, other: Union[int, float, 'vec3']) -> 'vec3':
         """Scalar multiplication: self * scalar or component-wise multiplication: self * vec3."""
-        if isinstance(other, (int, float)):
-            return vec3(self.x * other, self.y * other, self.z * other)
-        elif isinstance(other, vec3):
+        if type(other) is vec3:
             return vec3(self.x * other.x, self.y * other.y, self.z * other.z)
-        else:
-            raise TypeError("Can only multiply vec3 by scalar (int or float) or vec3")
+        try:
+            return vec3(self.x * other, self.y * other, self.z * other)
+        except TypeError:
+            return NotImplemented
     
     def __rmul__(self, scalar: Union[int, float]) -> 'vec3':
         """Scalar multiplication: scalar * self."""
@@ -55,11 +72,55 @@ class vec3:
     
     def __truediv__(self, scalar: Union[int, float]) -> 'vec3':
         """Scalar division: self / scalar."""
-        if not isinstance(scalar, (int, float)):
-            raise TypeError("Can only divide vec3 by scalar (int or float)")
-        if scalar == 0:
-            raise ZeroDivisionError("Cannot divide by zero")
-        return vec3(self.x / scalar, self.y / scalar, self.z / scalar)
+        try:
+            return vec3(self.x / scalar, self.y / scalar, self.z / scalar)
+        except TypeError:
+            return NotImplemented
+
+    def __iadd__(self, other: 'vec3') -> 'vec3':
+        """In-place vector addition: self += other."""
+        try:
+            self.x += other.x
+            self.y += other.y
+            self.z += other.z
+        except AttributeError:
+            return NotImplemented
+        return self
+
+    def __isub__(self, other: 'vec3') -> 'vec3':
+        """In-place vector subtraction: self -= other."""
+        try:
+            self.x -= other.x
+            self.y -= other.y
+            self.z -= other.z
+        except AttributeError:
+            return NotImplemented
+        return self
+
+    def __imul__(self, other: Union[int, float, 'vec3']) -> 'vec3':
+        """In-place scalar or component-wise multiplication: self *= other."""
+        if type(other) is vec3:
+            self.x *= other.x
+            self.y *= other.y
+            self.z *= other.z
+            return self
+        try:
+            self.x *= other
+            self.y *= other
+            self.z *= other
+        except TypeError:
+            return NotImplemented
+        return self
+
+    def __itruediv__(self, scalar: Union[int, float]) -> 'vec3':
+        """In-place scalar division: self /= scalar."""
+        try:
+            self.x /= scalar
+            self.y /= scalar
+            self.z /= scalar
+        except TypeError:
+            return NotImplemented
+        return self
     
     def __neg__(self) -> 'vec3':
         """Unary negation: -self."""
@@ -74,8 +135,6 @@ class vec3:
         Dot product of two vectors.
         Returns: self · other = self.x * other.x + self.y * other.y + self.z * other.z
         """
-        if not isinstance(other, vec3):
-            raise TypeError("Dot product requires two vec3 objects")
         return self.x * other.x + self.y * other.y + self.z * other.z
     
     def cross(self, other: 'vec3') -> 'vec3':
@@ -83,21 +142,32 @@ class vec3:
         Cross product of two vectors.
         Returns: self × other
         """
-        if not isinstance(other, vec3):
-            raise TypeError("Cross product requires two vec3 objects")
         return vec3(
             self.y * other.z - self.z * other.y,
             self.z * other.x - self.x * other.z,
             self.x * other.y - self.y * other.x
         )
+
+    def mul_add(self, other: 'vec3', s: float) -> 'vec3':
+        """self + other * s, without the temporary for other * s."""
+        return vec3(self.x + other.x * s, self.y + other.y * s, self.z + other.z * s)
+
+    def sub_dot(self, other: 'vec3', w: 'vec3') -> float:
+        """(self - other) · w, without the temporary for self - other."""
+        return (self.x - other.x) * w.x + (self.y - other.y) * w.y + (self.z - other.z) * w.z
+
+    @staticmethod
+    def at(origin: 'vec3', direction: 'vec3', t: float) -> 'vec3':
+        """Point origin + t * direction along a ray."""
+        return vec3(origin.x + direction.x * t, origin.y + direction.y * t, origin.z + direction.z * t)
     
     def length(self) -> float:
         """Magnitude (length) of the vector."""
-        return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
     
     def length_squared(self) -> float:
         """Squared magnitude of the vector (faster than length() for comparisons)."""
-        return self.x**2 + self.y**2 + self.z**2
+        return self.x * self.x + self.y * self.y + self.z * self.z
     
     def normalize(self) -> 'vec3':
         """Return a unit vector in the same direction."""
@@ -267,36 +337,48 @@ def degrees_to_radians(degrees: float) -> float:
     """Convert degrees to radians."""
     return degrees * math.pi / 180.0
 
+# The samplers below map uniform random numbers directly onto their domain
+# (no rejection loop), so each call costs two random numbers and one vec3.
+
 def random_unit_vector() -> vec3:
-    """Generate a random unit vector."""
-    while True:
-        p = vec3.random(-1, 1)
-        if p.length_squared() >= 1 or p.length_squared() <= 1e-20:
-            continue
-        return p.normalize()
-    
+    """Uniformly distributed random unit vector."""
+    z = 1.0 - 2.0 * _random()
+    r = math.sqrt(1.0 - z * z)
+    phi = 2.0 * math.pi * _random()
+    return vec3(r * math.cos(phi), r * math.sin(phi), z)
+
 def random_on_hemisphere(normal: vec3) -> vec3:
+    """Uniformly distributed unit vector in the hemisphere around normal."""
     on_unit_sphere = random_unit_vector()
     if dot(on_unit_sphere, normal) > 0.0:
         return on_unit_sphere
     else:
         return -on_unit_sphere
-    
+
+def random_cosine_direction() -> tuple[float, float, float]:
+    """
+    Unit vector about +z with density cos(theta) / pi, as plain (x, y, z)
+    floats for onb.transform_xyz.
+    """
+    r1 = _random()
+    r2 = _random()
+    phi = 2.0 * math.pi * r1
+    s = math.sqrt(r2)
+    return s * math.cos(phi), s * math.sin(phi), math.sqrt(1.0 - r2)
+
 def reflect(v: vec3, n: vec3) -> vec3:
     """Reflect vector v around normal n."""
-    return v - n * (2 * dot(v, n))
+    return v.mul_add(n, -2 * v.dot(n))
 
 def refract(uv: vec3, n: vec3, etai_over_etat: float) -> vec3:
     """Refract vector uv with normal n and ratio etai_over_etat."""
-    cos_theta = min(dot(-uv, n), 1.0)
-    r_out_perp = etai_over_etat * (uv + cos_theta * n)
-    r_out_parallel = -math.sqrt(abs(1.0 - r_out_perp.length_squared())) * n
-    return r_out_perp + r_out_parallel
+    cos_theta = min(-uv.dot(n), 1.0)
+    r_out_perp = uv.mul_add(n, cos_theta)
+    r_out_perp *= etai_over_etat
+    return r_out_perp.mul_add(n, -math.sqrt(abs(1.0 - r_out_perp.length_squared())))
 
 def random_in_unit_disk() -> vec3:
-    """Generate a random point inside a unit disk in the XY plane."""
-    while True:
-        p = vec3(random.uniform(-1, 1), random.uniform(-1, 1), 0)
-        if p.length_squared() >= 1:
-            continue
-        return p
\ No newline at end of file
+    """Uniformly distributed random point inside the unit disk in the XY plane."""
+    r = math.sqrt(_random())
+    phi = 2.0 * math.pi * _random()
+    return vec3(r * math.cos(phi), r * math.sin(phi), 0)
\ No newline at end of file
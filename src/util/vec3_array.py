@@ -0,0 +1,185 @@
+"""
+Packed arrays of 3D vectors.
+
+Usage:
+    from util import vec3_array, vec3
+
+    points = vec3_array.from_vec3s([vec3(0, 0, 0), vec3(1, 2, 3)])
+    moved = points * 2.0 + vec3(0, 1, 0)
+    lo, hi = moved.min(), moved.max()   # vec3 bounds
+    first = moved[0]                    # vec3 copy of one row
+    view = moved[1:]                    # vec3_array sharing moved's buffer
+
+A vec3_array wraps a contiguous (N, 3) float64 or float32 NumPy array, so N
+vectors cost 24 (or 12) bytes each instead of one Python object per vector.
+Operations are vectorized over all rows and accept a scalar, a per-row (N,)
+array, a vec3 (broadcast to every row) or another vec3_array of length N.
+"""
+
+import numpy as np
+from typing import Iterable, Union
+from .vec3 import vec3
+
+_operand = Union[int, float, np.ndarray, vec3, 'vec3_array']
+
+
+def _values(other):
+    """Operand as something NumPy can broadcast against an (N, 3) array."""
+    if isinstance(other, vec3_array):
+        return other.data
+    if isinstance(other, vec3):
+        return np.array((other.x, other.y, other.z))
+    if isinstance(other, np.ndarray) and other.ndim == 1:
+        return other[:, None]  # one scale per row
+    return other
+
+
+class vec3_array:
+    """A contiguous (N, 3) array of vectors with vectorized vec3 operations."""
+
+    __slots__ = ('data',)
+    __array_ufunc__ = None  # ndarray <op> vec3_array uses our reflected operators
+
+    def __init__(self, data, dtype=None):
+        """Wrap data (anything array-like of shape (N, 3)); no copy if it already fits."""
+        data = np.asarray(data, dtype=dtype)
+        if dtype is None and data.dtype not in (np.float32, np.float64):
+            data = data.astype(np.float64)
+        if data.ndim != 2 or data.shape[1] != 3:
+            raise ValueError(f"vec3_array needs shape (N, 3), got {data.shape}")
+        self.data = np.ascontiguousarray(data)
+
+    @classmethod
+    def zeros(cls, n: int, dtype=np.float64) -> 'vec3_array':
+        """n zero vectors."""
+        return cls(np.zeros((n, 3), dtype=dtype))
+
+    @classmethod
+    def from_vec3s(cls, vectors: Iterable[vec3], dtype=np.float64) -> 'vec3_array':
+        """Pack vec3 objects (any iterable, consumed once) into a new array."""
+        flat = np.fromiter((c for v in vectors for c in (v.x, v.y, v.z)), dtype=dtype)
+        return cls(flat.reshape(-1, 3))
+
+    def to_vec3s(self) -> list[vec3]:
+        """Unpack every row into a vec3."""
+        return [vec3(x, y, z) for x, y, z in self.data.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        for x, y, z in self.data.tolist():
+            yield vec3(x, y, z)
+
+    def __getitem__(self, index):
+        """An int gives a vec3 copy; a slice or index array gives a vec3_array (slices share the buffer)."""
+        if isinstance(index, (int, np.integer)):
+            x, y, z = self.data[index].tolist()
+            return vec3(x, y, z)
+        return vec3_array(self.data[index])
+
+    def __setitem__(self, index, value: _operand):
+        self.data[index] = _values(value)
+
+    def row(self, index: int) -> np.ndarray:
+        """Zero-copy (3,) view of one vector; writes go to this array."""
+        return self.data[index]
+
+    def flat(self) -> memoryview:
+        """Zero-copy memoryview of the x, y, z components of all rows, in order.
+        Indexing it gives plain Python floats, which suits scalar inner loops."""
+        return memoryview(self.data.reshape(-1))
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def __repr__(self) -> str:
+        return f"vec3_array({len(self)}, dtype={self.data.dtype})"
+
+    def copy(self) -> 'vec3_array':
+        return vec3_array(self.data.copy())
+
+    def astype(self, dtype) -> 'vec3_array':
+        return vec3_array(self.data.astype(dtype))
+
+    # Arithmetic --------------------------------------------------------
+
+    def __add__(self, other: _operand) -> 'vec3_array':
+        return vec3_array(self.data + _values(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other: _operand) -> 'vec3_array':
+        return vec3_array(self.data - _values(other))
+
+    def __rsub__(self, other: _operand) -> 'vec3_array':
+        return vec3_array(_values(other) - self.data)
+
+    def __mul__(self, other: _operand) -> 'vec3_array':
+        """Scale by a scalar or per-row array, or multiply component-wise by a vec3/vec3_array."""
+        return vec3_array(self.data * _values(other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: _operand) -> 'vec3_array':
+        return vec3_array(self.data / _values(other))
+
+    def __neg__(self) -> 'vec3_array':
+        return vec3_array(-self.data)
+
+    def __iadd__(self, other: _operand) -> 'vec3_array':
+        self.data += _values(other)
+        return self
+
+    def __isub__(self, other: _operand) -> 'vec3_array':
+        self.data -= _values(other)
+        return self
+
+    def __imul__(self, other: _operand) -> 'vec3_array':
+        self.data *= _values(other)
+        return self
+
+    def __itruediv__(self, other: _operand) -> 'vec3_array':
+        self.data /= _values(other)
+        return self
+
+    # Vector operations -------------------------------------------------
+
+    def dot(self, other: Union[vec3, 'vec3_array']) -> np.ndarray:
+        """Row-wise dot products, shape (N,)."""
+        d = self.data * _values(other)
+        return d[:, 0] + d[:, 1] + d[:, 2]
+
+    def cross(self, other: Union[vec3, 'vec3_array']) -> 'vec3_array':
+        """Row-wise cross products self × other."""
+        return vec3_array(np.cross(self.data, _values(other)))
+
+    def length_squared(self) -> np.ndarray:
+        """Squared length of each row, shape (N,)."""
+        return self.dot(self)
+
+    def length(self) -> np.ndarray:
+        """Length of each row, shape (N,)."""
+        return np.sqrt(self.length_squared())
+
+    def normalize(self) -> 'vec3_array':
+        """Unit vectors; zero-length rows stay zero."""
+        length = self.length()
+        return vec3_array(self.data / np.where(length > 0, length, 1)[:, None])
+
+    def unit_vector(self) -> 'vec3_array':
+        """Alias for normalize()."""
+        return self.normalize()
+
+    def min(self) -> vec3:
+        """Component-wise minimum over all rows."""
+        return vec3(*self.data.min(axis=0).tolist())
+
+    def max(self) -> vec3:
+        """Component-wise maximum over all rows."""
+        return vec3(*self.data.max(axis=0).tolist())
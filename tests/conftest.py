@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The renderer runs from src/ (python main.py), so its packages import as core and util
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
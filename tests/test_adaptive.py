@@ -0,0 +1,38 @@
+import numpy as np
+
+from core.camera import camera
+
+
+def test_reactivated_pixel_keeps_others_within_max_samples():
+    # A 1x4 frame: pixel 3 is noisy from the start, which keeps pixel 2
+    # sampling too. Once pixel 2 has 4 samples its later ones turn noisy, and
+    # that restarts pixel 1, stopped at the minimum, when pixels 2 and 3 are
+    # already close to the cap.
+    cam = camera()
+    cam.adaptive = True
+    cam.samples_per_pixel = 8
+    cam.adaptive_min_samples = 2
+    cam.adaptive_max_samples = 9
+
+    sums = np.zeros((1, 4, 3))
+    squares = np.zeros((1, 4))
+    counts = np.zeros((1, 4))
+    noisy = np.array([[False, False, False, True]])
+    stopped = reactivated = False
+
+    for count, active in cam._progressive_passes(sums, squares, counts):
+        mask = np.ones(counts.shape, dtype=bool) if active is None else active
+        if active is not None:
+            stopped = stopped or not active[0, 1]
+            reactivated = reactivated or (stopped and active[0, 1])
+        # Noisy pixels alternate between black and white, quiet ones stay gray
+        for _ in range(count):
+            value = np.where(noisy, counts % 2, 0.5) * mask
+            sums += value[..., None]
+            squares += value * value
+            counts += mask
+        if counts[0, 2] >= 4:
+            noisy[0, 2] = True
+
+    assert reactivated
+    assert counts.max() <= cam.adaptive_max_samples